@@ -21,6 +21,7 @@ INSTALLED_APPS = [
     'django.contrib.sessions',
     'django.contrib.messages',
     'django.contrib.staticfiles',
+    'django.contrib.postgres',
 
     'rest_framework',
 
@@ -28,6 +29,8 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    'stocks.middleware.MetricsMiddleware',
+    'stocks.middleware.APIGZipMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
@@ -61,6 +64,19 @@ DATABASES = {
     'default': env.db()
 }
 
+# Read replicas of default database, used by read-only views
+REPLICA_DATABASES = []
+for num, url in enumerate(env.list('DATABASE_REPLICA_URLS', default=[])):
+    alias = f'replica{num + 1}'
+    DATABASES[alias] = dict(env.db_url_config(url), TEST={'MIRROR': 'default'})
+    REPLICA_DATABASES.append(alias)
+
+DATABASE_ROUTERS = ['stocks.db_routers.ReplicaRouter']
+
+CACHES = {
+    'default': env.cache(default='locmemcache://')
+}
+
 LOGGING = {
     'version': 1,
     'disable_existing_loggers': False,
@@ -90,3 +106,20 @@ USE_TZ = True
 STATIC_URL = '/static/'
 
 DATE_INPUT_FORMATS = ['%m/%d/%Y']
+
+# Base URL of NASDAQ pages (e.g. URL of `stocks.stub_server` for load tests)
+NASDAQ_BASE_URL = env(
+    'NASDAQ_BASE_URL', default='http://www.nasdaq.com/symbol/'
+)
+
+# Store prices as bigint number of 1e-4 units instead of numeric (see
+# `stocks.fields.FixedPointPriceField`), is applied only by migration 0006
+FIXED_POINT_PRICES = env.bool('FIXED_POINT_PRICES', default=False)
+
+# Directory for sharing metrics between processes (see `stocks.metrics`)
+METRICS_DIR = env('METRICS_DIR', default=None)
+
+# Directory of memory-mapped price snapshots (see `stocks.snapshots`)
+SNAPSHOTS_DIR = env(
+    'SNAPSHOTS_DIR', default=os.path.join(BASE_DIR, 'snapshots')
+)
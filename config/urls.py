@@ -1,6 +1,8 @@
 from django.contrib import admin
 from django.urls import path, include
 
+from stocks.views import MetricsView
+
 
 api_urlpatterns = [
     path('', ('stocks.api.urls', 'stocks', 'stocks')),
@@ -9,6 +11,7 @@ api_urlpatterns = [
 urlpatterns = [
     path('admin/', admin.site.urls),
     path('api/', (api_urlpatterns, 'api', 'api')),
+    path('metrics/', MetricsView.as_view(), name='metrics'),
 
     path('', ('stocks.urls', 'stocks', 'stocks')),
 ]
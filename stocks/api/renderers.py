@@ -0,0 +1,45 @@
+from rest_framework.renderers import JSONRenderer
+
+__all__ = ('ColumnarJSONRenderer', 'to_columnar')
+
+
+def to_columnar(rows):
+    """Convert list of serialized objects to columnar layout.
+
+    Nested objects (e.g. insider of trade) are replaced with their ids in
+    column and stored once in side table, so result is:
+    `{columns: [...], data: {column: [...]}, tables: {column: [...]}}`.
+    """
+    columns = list(rows[0]) if rows else []
+    data = {column: [row[column] for row in rows] for column in columns}
+
+    tables = {}
+    for column, values in data.items():
+        if not any(isinstance(value, dict) for value in values):
+            continue
+
+        table = {}
+        for value in values:
+            if value is not None:
+                table.setdefault(value['id'], value)
+        data[column] = [
+            value['id'] if value is not None else None for value in values
+        ]
+        tables[column] = list(table.values())
+
+    return {'columns': columns, 'data': data, 'tables': tables}
+
+
+class ColumnarJSONRenderer(JSONRenderer):
+    """Render list responses in columnar layout (`?format=columnar`).
+
+    Key names are not repeated for every row, which makes large lists
+    several times smaller. Other responses (e.g. errors) are rendered as
+    usual JSON.
+    """
+    format = 'columnar'
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if isinstance(data, list):
+            data = to_columnar(data)
+        return super().render(data, accepted_media_type, renderer_context)
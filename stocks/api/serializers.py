@@ -1,6 +1,28 @@
 from rest_framework import serializers
 
-from ..models import Company, Insider, StockDay, Trade
+from ..bars import INTERVALS
+from ..changes import parse_token
+from ..fields import format_price, normalize_price
+from ..indicators import INDICATORS, MIN_WINDOWS
+from ..models import Company, Insider, InsiderActivity, StockDay, Trade
+
+
+class PriceField(serializers.Field):
+    """Serializer field for fixed-point prices, represented as decimal string
+    (same as `DecimalField`).
+    """
+    default_error_messages = {
+        'invalid': 'A valid number is required.',
+    }
+
+    def to_representation(self, value):
+        return format_price(value)
+
+    def to_internal_value(self, data):
+        try:
+            return normalize_price(str(data).strip())
+        except ArithmeticError:
+            self.fail('invalid')
 
 
 class CompanySerializer(serializers.ModelSerializer):
@@ -14,12 +36,27 @@ class CompanySerializer(serializers.ModelSerializer):
 class StockDaySerializer(serializers.ModelSerializer):
     """Serializer for `StockDay` model.
     """
+    open_price = PriceField()
+    close_price = PriceField()
+    high_price = PriceField()
+    low_price = PriceField()
+
     class Meta:
         model = StockDay
-        fields = '__all__'
+        fields = (
+            'id', 'created_date', 'open_price', 'close_price', 'high_price',
+            'low_price', 'volume', 'company',
+        )
         ordering = ('-created_date', )
 
 
+class StockDayChangeSerializer(StockDaySerializer):
+    """Serializer for `StockDay` model in change feed, with import batch.
+    """
+    class Meta(StockDaySerializer.Meta):
+        fields = StockDaySerializer.Meta.fields + ('batch', )
+
+
 class InsiderSerializer(serializers.ModelSerializer):
     """Serializer for `Insider` model.
     """
@@ -32,18 +69,220 @@ class TradeSerializer(serializers.ModelSerializer):
     """Serializer for `Trade` model.
     """
     insider = InsiderSerializer(many=False, read_only=True)
+    last_price = PriceField()
 
     class Meta:
         model = Trade
-        fields = '__all__'
+        fields = (
+            'id', 'last_date', 'insider', 'relation', 'transaction_type',
+            'owner_type', 'last_price', 'traded_shares', 'held_shares',
+            'company',
+        )
         ordering = ('-last_date', )
 
 
+class TradeChangeSerializer(TradeSerializer):
+    """Serializer for `Trade` model in change feed, with import batch.
+    """
+    class Meta(TradeSerializer.Meta):
+        fields = TradeSerializer.Meta.fields + ('batch', )
+
+
 class StockPriceAnalyticsSerializer(serializers.Serializer):
     date_from = serializers.DateField()
     date_to = serializers.DateField()
 
 
 class StockPeriodsAnalyticsSerializer(serializers.Serializer):
-    type = serializers.ChoiceField(choices=('open', 'high', 'low', 'close')) 
-    value = serializers.DecimalField(max_digits=10, decimal_places=4)
+    """Serializer for price periods query params.
+
+    Price types and values are passed as comma-separated lists, e.g.
+    `type=open,close&value=1,5,10`.
+    """
+    price_types = ('open', 'high', 'low', 'close')
+
+    type = serializers.CharField()
+    value = serializers.CharField()
+
+    def validate_type(self, value):
+        types = [item.strip() for item in value.split(',') if item.strip()]
+        for price_type in types:
+            if price_type not in self.price_types:
+                raise serializers.ValidationError(
+                    f'Wrong price type: "{price_type}", available types are '
+                    f'{self.price_types}'
+                )
+        return types
+
+    def validate_value(self, value):
+        field = serializers.DecimalField(max_digits=10, decimal_places=4)
+        return [
+            field.run_validation(item.strip())
+            for item in value.split(',') if item.strip()
+        ]
+
+
+class StockIndicatorsSerializer(serializers.Serializer):
+    """Serializer for indicators query params.
+
+    Indicators are passed as comma-separated `name:window` list,
+    e.g. `sma:20,rsi:14,returns`.
+    """
+    indicators = serializers.CharField()
+    price = serializers.ChoiceField(
+        choices=('open', 'high', 'low', 'close'), default='close'
+    )
+    date_from = serializers.DateField(required=False)
+    date_to = serializers.DateField(required=False)
+
+    def validate_indicators(self, value):
+        specs = []
+        for item in value.split(','):
+            name, _, window = item.strip().partition(':')
+
+            if name not in INDICATORS:
+                raise serializers.ValidationError(
+                    f'Unknown indicator "{name}", available indicators are '
+                    f'{tuple(INDICATORS)}'
+                )
+            try:
+                window = int(window or 1)
+            except ValueError:
+                raise serializers.ValidationError(
+                    f'Window of "{name}" should be an integer number.'
+                )
+            if window < MIN_WINDOWS[name]:
+                raise serializers.ValidationError(
+                    f'Window of "{name}" should be >= {MIN_WINDOWS[name]}.'
+                )
+
+            specs.append((name, window))
+
+        return specs
+
+
+class StockBarsSerializer(serializers.Serializer):
+    """Serializer for OHLCV bars query params.
+    """
+    interval = serializers.ChoiceField(choices=INTERVALS)
+    date_from = serializers.DateField(required=False)
+    date_to = serializers.DateField(required=False)
+
+
+class CorrelationSerializer(serializers.Serializer):
+    """Serializer for correlation query params.
+
+    Tickers are passed as comma-separated list.
+    """
+    tickers = serializers.CharField()
+    date_from = serializers.DateField(required=False)
+    date_to = serializers.DateField(required=False)
+    min_periods = serializers.IntegerField(min_value=2, default=20)
+
+    def validate_tickers(self, value):
+        tickers = [
+            ticker.strip().lower() for ticker in value.split(',')
+            if ticker.strip()
+        ]
+        if len(tickers) < 2:
+            raise serializers.ValidationError(
+                'At least two tickers are required.'
+            )
+        return tickers
+
+
+class InsiderActivityFilterSerializer(serializers.Serializer):
+    """Serializer for months range of insider activity query params.
+    """
+    month_from = serializers.DateField(required=False)
+    month_to = serializers.DateField(required=False)
+
+
+class InsiderActivitySerializer(serializers.ModelSerializer):
+    """Serializer for `InsiderActivity` model.
+    """
+    ticker = serializers.CharField(source='company.ticker')
+    insider = serializers.CharField(source='insider.name')
+
+    class Meta:
+        model = InsiderActivity
+        fields = (
+            'ticker', 'insider', 'month', 'trades_count', 'bought_shares',
+            'sold_shares', 'net_shares', 'held_shares', 'last_date',
+        )
+
+
+class InsiderHoldingSerializer(serializers.Serializer):
+    """Serializer for activity of insider in company aggregated by months.
+    """
+    insider = serializers.CharField(source='insider__name')
+    slug = serializers.CharField(source='insider__slug')
+    trades_count = serializers.IntegerField(source='total_trades')
+    bought_shares = serializers.IntegerField(source='total_bought')
+    sold_shares = serializers.IntegerField(source='total_sold')
+    net_shares = serializers.IntegerField(source='total_net')
+    held_shares = serializers.IntegerField(source='last_held')
+    last_date = serializers.DateField(source='last_trade_date')
+
+
+class SearchSerializer(serializers.Serializer):
+    """Serializer for search query params.
+    """
+    q = serializers.CharField(max_length=128)
+    limit = serializers.IntegerField(min_value=1, max_value=50, default=10)
+
+
+class ChangesSerializer(serializers.Serializer):
+    """Serializer for change feed query params.
+
+    `since` is token of position returned as `next` by previous request,
+    feed is read from the beginning without it.
+    """
+    since = serializers.CharField(required=False)
+    limit = serializers.IntegerField(
+        min_value=1, max_value=10000, default=1000
+    )
+
+    def validate_since(self, value):
+        try:
+            return parse_token(value)
+        except ValueError:
+            raise serializers.ValidationError('Wrong token.')
+
+
+class PricesSerializer(serializers.Serializer):
+    """Serializer for multi-ticker prices query params.
+
+    Tickers and fields are passed as comma-separated lists, e.g.
+    `tickers=aapl,msft&fields=close,volume`.
+    """
+    price_fields = ('open', 'high', 'low', 'close', 'volume')
+
+    tickers = serializers.CharField()
+    fields = serializers.CharField(default='close')
+    date_from = serializers.DateField(required=False)
+    date_to = serializers.DateField(required=False)
+    layout = serializers.ChoiceField(
+        choices=('rows', 'columnar'), default='rows'
+    )
+
+    def validate_tickers(self, value):
+        tickers = [
+            ticker.strip().lower() for ticker in value.split(',')
+            if ticker.strip()
+        ]
+        if not tickers:
+            raise serializers.ValidationError('Tickers are required.')
+        return list(dict.fromkeys(tickers))
+
+    def validate_fields(self, value):
+        fields = [field.strip() for field in value.split(',') if field.strip()]
+        for field in fields:
+            if field not in self.price_fields:
+                raise serializers.ValidationError(
+                    f'Unknown field "{field}", available fields are '
+                    f'{self.price_fields}'
+                )
+        if not fields:
+            raise serializers.ValidationError('Fields are required.')
+        return list(dict.fromkeys(fields))
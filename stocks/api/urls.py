@@ -1,11 +1,27 @@
 from django.urls import path
 
-from .views import (CompanyListAPIView, StockDayListAPIView,
-                    StockPeriodsAnalyticsAPIView, StockPriceAnalyticsAPIView,
-                    TradeInsiderListAPIView, TradeListAPIView)
+from .views import (ChangesAPIView, CompanyInsidersAPIView, CompanyListAPIView,
+                    CorrelationAPIView, InsiderActivityAPIView, PricesAPIView,
+                    SearchAPIView, StockBarsAPIView, StockDayListAPIView,
+                    StockIndicatorsAPIView, StockPeriodsAnalyticsAPIView,
+                    StockPriceAnalyticsAPIView, TradeInsiderListAPIView,
+                    TradeListAPIView)
 
 urlpatterns = [
     path('', CompanyListAPIView.as_view(), name='companies-list'),
+    # Endpoints of several tickers are under `_/`, which is not a ticker,
+    # so they don't hide tickers with the same names
+    path(
+        '_/correlation/',
+        CorrelationAPIView.as_view(), name='correlation'
+    ),
+    path('_/search/', SearchAPIView.as_view(), name='search'),
+    path('_/changes/', ChangesAPIView.as_view(), name='changes'),
+    path('_/prices/', PricesAPIView.as_view(), name='prices'),
+    path(
+        '_/insiders/<slug:insider>/',
+        InsiderActivityAPIView.as_view(), name='insider-activity'
+    ),
     path(
         '<slug:ticker>/',
         StockDayListAPIView.as_view(), name='stocks-list'
@@ -18,6 +34,10 @@ urlpatterns = [
         '<slug:ticker>/insider/<slug:insider>/',
         TradeInsiderListAPIView.as_view(), name='insider-trades-list'
     ),
+    path(
+        '<slug:ticker>/insiders/',
+        CompanyInsidersAPIView.as_view(), name='company-insiders'
+    ),
     path(
         '<slug:ticker>/analytics/',
         StockPriceAnalyticsAPIView.as_view(), name='stock-analytics'
@@ -26,4 +46,12 @@ urlpatterns = [
         '<slug:ticker>/delta/',
         StockPeriodsAnalyticsAPIView.as_view(), name='stock-delta'
     ),
+    path(
+        '<slug:ticker>/bars/',
+        StockBarsAPIView.as_view(), name='stock-bars'
+    ),
+    path(
+        '<slug:ticker>/indicators/',
+        StockIndicatorsAPIView.as_view(), name='stock-indicators'
+    ),
 ]
@@ -1,28 +1,62 @@
+from bisect import bisect_left, bisect_right
+from itertools import groupby
+from operator import itemgetter
+
+import numpy as np
+from django.core.cache import cache
+from django.db.models import Max, OuterRef, Subquery, Sum
 from django.shortcuts import get_object_or_404
+from rest_framework.exceptions import ValidationError
 from rest_framework.generics import ListAPIView
 from rest_framework.response import Response
+from rest_framework.settings import api_settings
 from rest_framework.views import APIView
 
-from ..models import Company, StockDay, Trade
-from .serializers import (CompanySerializer, StockDaySerializer,
+from ..bars import BAR_FIELDS, calc_bars, get_cache_key
+from ..changes import get_changes, make_token
+from ..correlation import (DEFAULT_MEMORY_LIMIT, MemoryLimitError,
+                           calc_correlation, calc_returns, load_close_matrix)
+from ..db_routers import ReplicaReadMixin
+from ..fields import PRICE_SCALE, format_price
+from ..indicators import calc_indicators
+from ..metrics import record_cache
+from ..models import Company, InsiderActivity, StockDay, Trade
+from ..search import search_companies, search_insiders
+from .renderers import ColumnarJSONRenderer
+from .serializers import (ChangesSerializer, CompanySerializer,
+                          CorrelationSerializer,
+                          InsiderActivityFilterSerializer,
+                          InsiderActivitySerializer, InsiderHoldingSerializer,
+                          PricesSerializer, SearchSerializer,
+                          StockBarsSerializer, StockDayChangeSerializer,
+                          StockDaySerializer, StockIndicatorsSerializer,
                           StockPeriodsAnalyticsSerializer,
-                          StockPriceAnalyticsSerializer, TradeSerializer)
+                          StockPriceAnalyticsSerializer,
+                          TradeChangeSerializer, TradeSerializer)
+
+
+# Renderers of large lists, `?format=columnar` gives compact layout
+LIST_RENDERER_CLASSES = api_settings.DEFAULT_RENDERER_CLASSES + [
+    ColumnarJSONRenderer,
+]
 
 
-class CompanyListAPIView(ListAPIView):
+class CompanyListAPIView(ReplicaReadMixin, ListAPIView):
     queryset = Company.objects.all()
     serializer_class = CompanySerializer
 
 
-class StockDayListAPIView(ListAPIView):
+class StockDayListAPIView(ReplicaReadMixin, ListAPIView):
     serializer_class = StockDaySerializer
+    renderer_classes = LIST_RENDERER_CLASSES
 
     def get_queryset(self):
         return StockDay.objects.filter(company__ticker=self.kwargs['ticker'])
 
 
-class TradeListAPIView(ListAPIView):
+class TradeListAPIView(ReplicaReadMixin, ListAPIView):
     serializer_class = TradeSerializer
+    renderer_classes = LIST_RENDERER_CLASSES
 
     def get_queryset(self):
         return Trade.objects.filter(
@@ -37,6 +71,165 @@ class TradeInsiderListAPIView(TradeListAPIView):
         return qs.filter(insider__slug=self.kwargs.get('insider'))
 
 
+class BaseInsiderActivityAPIView(ReplicaReadMixin, ListAPIView):
+    """Base view for insider activity rollups filtered by months range.
+    """
+    def get_activities(self):
+        serializer = InsiderActivityFilterSerializer(
+            data=self.request.query_params
+        )
+        if not serializer.is_valid():
+            raise ValidationError({'errors': serializer.errors})
+
+        qs = InsiderActivity.objects.all()
+        if serializer.validated_data.get('month_from'):
+            qs = qs.filter(
+                month__gte=serializer.validated_data['month_from']
+                .replace(day=1)
+            )
+        if serializer.validated_data.get('month_to'):
+            qs = qs.filter(month__lte=serializer.validated_data['month_to'])
+        return qs
+
+
+class CompanyInsidersAPIView(BaseInsiderActivityAPIView):
+    """Insiders of company with their aggregated activity, largest holders
+    first.
+    """
+    serializer_class = InsiderHoldingSerializer
+
+    def get_queryset(self):
+        activities = self.get_activities() \
+            .filter(company__ticker=self.kwargs['ticker'])
+        last_held = activities \
+            .filter(insider=OuterRef('insider')) \
+            .order_by('-month') \
+            .values('held_shares')[:1]
+
+        return activities \
+            .values('insider', 'insider__name', 'insider__slug') \
+            .annotate(
+                total_trades=Sum('trades_count'),
+                total_bought=Sum('bought_shares'),
+                total_sold=Sum('sold_shares'),
+                total_net=Sum('net_shares'),
+                last_trade_date=Max('last_date'),
+                last_held=Subquery(last_held),
+            ) \
+            .order_by('-last_held', 'insider__name')
+
+
+class InsiderActivityAPIView(BaseInsiderActivityAPIView):
+    """Monthly activity of insider in all companies.
+    """
+    serializer_class = InsiderActivitySerializer
+
+    def get_queryset(self):
+        return self.get_activities() \
+            .filter(insider__slug=self.kwargs['insider']) \
+            .select_related('company', 'insider') \
+            .order_by('-month', 'company__ticker')
+
+
+class SearchAPIView(ReplicaReadMixin, APIView):
+    """Ranked search of tickers and insiders (e.g. for autocomplete).
+    """
+    def get(self, request, *args, **kwargs):
+        serializer = SearchSerializer(data=self.request.query_params)
+        if not serializer.is_valid():
+            return Response(data={'errors': serializer.errors})
+
+        query, limit = serializer.validated_data['q'], \
+            serializer.validated_data['limit']
+        return Response(data={
+            'companies': search_companies(query, limit),
+            'insiders': [
+                {'name': name, 'slug': slug, 'score': round(score, 4)}
+                for name, slug, score in search_insiders(query, limit)
+            ],
+        })
+
+
+class ChangesAPIView(ReplicaReadMixin, APIView):
+    """Feed of prices and trades inserted after position (see
+    `stocks.changes`), paginated by `next` token.
+    """
+    serializers = {
+        'stockday': StockDayChangeSerializer,
+        'trade': TradeChangeSerializer,
+    }
+
+    def get(self, request, *args, **kwargs):
+        serializer = ChangesSerializer(data=self.request.query_params)
+        if not serializer.is_valid():
+            return Response(data={'errors': serializer.errors})
+
+        rows, position = get_changes(
+            serializer.validated_data.get('since', (0, 0)),
+            serializer.validated_data['limit'],
+        )
+        return Response(data={
+            'changes': [
+                {
+                    'model': model,
+                    'ticker': instance.company.ticker,
+                    'data': self.serializers[model](instance).data,
+                }
+                for model, instance in rows
+            ],
+            'next': make_token(*position),
+        })
+
+
+class PricesAPIView(ReplicaReadMixin, APIView):
+    """Prices of several tickers for date range, grouped by ticker.
+
+    Only requested fields are selected, by one query. With `columnar`
+    layout prices of ticker are lists of values by field, otherwise list
+    of rows.
+    """
+    def get(self, request, *args, **kwargs):
+        serializer = PricesSerializer(data=self.request.query_params)
+        if not serializer.is_valid():
+            return Response(data={'errors': serializer.errors})
+
+        data = serializer.validated_data
+        columns = ['date'] + data['fields']
+        formatters = [str] + [
+            int if field == 'volume' else format_price
+            for field in data['fields']
+        ]
+
+        qs = StockDay.objects.filter(company__ticker__in=data['tickers'])
+        if data.get('date_from'):
+            qs = qs.filter(created_date__gte=data['date_from'])
+        if data.get('date_to'):
+            qs = qs.filter(created_date__lte=data['date_to'])
+        rows = qs \
+            .order_by('company__ticker', 'created_date') \
+            .values_list(
+                'company__ticker', 'created_date',
+                *[self.get_model_field(field) for field in data['fields']]
+            )
+
+        prices = {}
+        for ticker, ticker_rows in groupby(rows, key=itemgetter(0)):
+            values = [
+                [format_value(value) for format_value, value in
+                 zip(formatters, row[1:])]
+                for row in ticker_rows
+            ]
+            if data['layout'] == 'columnar':
+                prices[ticker] = dict(zip(columns, map(list, zip(*values))))
+            else:
+                prices[ticker] = [dict(zip(columns, row)) for row in values]
+
+        return Response(data={'fields': columns, 'prices': prices})
+
+    def get_model_field(self, field):
+        return field if field == 'volume' else f'{field}_price'
+
+
 class BaseStockAnalyticsAPIView(APIView):
     serializer_class = None
 
@@ -56,7 +249,7 @@ class BaseStockAnalyticsAPIView(APIView):
         raise NotImplementedError('Provide logic for analytics.')
 
 
-class StockPriceAnalyticsAPIView(BaseStockAnalyticsAPIView):
+class StockPriceAnalyticsAPIView(ReplicaReadMixin, BaseStockAnalyticsAPIView):
     serializer_class = StockPriceAnalyticsSerializer
 
     def calc_analytics(self, data):
@@ -79,7 +272,148 @@ class StockPeriodsAnalyticsAPIView(BaseStockAnalyticsAPIView):
 
     def calc_analytics(self, data):
         """Calculate price periods for company.
+
+        Periods of several types or values are grouped by them.
         """
-        return self.company.get_min_price_periods(
+        results = self.company.get_min_price_periods(
             data['type'], data['value']
         )
+        if len(results) == 1:
+            return next(iter(results.values()))
+
+        return [
+            {'type': price_type, 'value': value, 'periods': periods}
+            for (price_type, value), periods in results.items()
+        ]
+
+
+class StockIndicatorsAPIView(ReplicaReadMixin, BaseStockAnalyticsAPIView):
+    serializer_class = StockIndicatorsSerializer
+    cache_timeout = 60 * 60 * 24
+
+    def calc_analytics(self, data):
+        """Calculate technical indicators over company prices.
+
+        Indicators are calculated over the whole history and cropped by
+        dates. Result is cached by time of last import of company data.
+        """
+        company = self.company
+        version = company.imported_at.timestamp() \
+            if company.imported_at else None
+        specs = ','.join(
+            f'{name}:{window}' for name, window in data['indicators']
+        )
+        cache_key = 'indicators:{}:{}:{}:{}:{}:{}'.format(
+            company.id, version, data['price'], specs,
+            data.get('date_from'), data.get('date_to'),
+        )
+
+        result = cache.get(cache_key)
+        record_cache('indicators', result is not None)
+
+        if result is None:
+            result = self.get_indicators(company, data)
+            cache.set(cache_key, result, self.cache_timeout)
+
+        return result
+
+    def get_indicators(self, company, data):
+        price_field = f'{data["price"]}_price'
+        arrays = StockDay.objects \
+            .filter(company=company) \
+            .order_by('created_date') \
+            .price_arrays('created_date', price_field)
+        dates = arrays['created_date'].tolist()
+        prices = arrays[price_field] / PRICE_SCALE
+
+        start = bisect_left(dates, data['date_from']) \
+            if data.get('date_from') else 0
+        end = bisect_right(dates, data['date_to']) \
+            if data.get('date_to') else len(dates)
+
+        indicators = calc_indicators(prices, data['indicators'])
+        return {
+            'price': data['price'],
+            'dates': dates[start:end],
+            'indicators': {
+                key: np.where(
+                    np.isnan(values), None, np.round(values, 6)
+                )[start:end].tolist()
+                for key, values in indicators.items()
+            },
+        }
+
+
+class StockBarsAPIView(ReplicaReadMixin, BaseStockAnalyticsAPIView):
+    """OHLCV bars of company prices by week, month or quarter.
+
+    Bars of closed periods are cached until next import of company data,
+    so only days of last (open) period are loaded and aggregated on each
+    request. Bar is closed when there are prices of next period.
+    """
+    serializer_class = StockBarsSerializer
+    cache_timeout = 60 * 60 * 24
+
+    def calc_analytics(self, data):
+        company = self.company
+        cache_key = get_cache_key(company, data['interval'])
+
+        cached = cache.get(cache_key)
+        record_cache('bars', cached is not None)
+        closed_bars, open_start = cached or ([], None)
+
+        qs = StockDay.objects.filter(company=company)
+        if open_start is not None:
+            qs = qs.filter(created_date__gte=open_start)
+        bars = calc_bars(
+            qs.order_by('created_date').price_arrays(*BAR_FIELDS),
+            data['interval']
+        )
+
+        if len(bars) > 1 or open_start is None:
+            closed_bars = closed_bars + bars[:-1]
+            open_start = bars[-1]['date'] if bars else None
+            cache.set(
+                cache_key, (closed_bars, open_start), self.cache_timeout
+            )
+
+        bars = [
+            bar for bar in closed_bars + bars[-1:]
+            if data.get('date_from', bar['date']) <= bar['date'] <=
+            data.get('date_to', bar['date'])
+        ]
+        return {'interval': data['interval'], 'bars': bars}
+
+
+class CorrelationAPIView(ReplicaReadMixin, BaseStockAnalyticsAPIView):
+    serializer_class = CorrelationSerializer
+    memory_limit = DEFAULT_MEMORY_LIMIT
+
+    def calc_analytics(self, data):
+        """Calculate correlation and covariance of tickers daily returns.
+
+        Requests which don't fit into `memory_limit` are rejected.
+        """
+        try:
+            tickers, dates, prices = load_close_matrix(
+                data['tickers'], data.get('date_from'), data.get('date_to'),
+                memory_limit=self.memory_limit,
+            )
+            correlation, covariance = calc_correlation(
+                calc_returns(prices), min_periods=data['min_periods'],
+                memory_limit=self.memory_limit,
+            )
+        except MemoryLimitError as exc:
+            raise ValidationError({'errors': [str(exc)]})
+
+        def to_list(matrix):
+            return np.where(
+                np.isnan(matrix), None, np.round(matrix, 8)
+            ).tolist()
+
+        return {
+            'tickers': tickers,
+            'days': len(dates),
+            'correlation': to_list(correlation),
+            'covariance': to_list(covariance),
+        }
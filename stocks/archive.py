@@ -0,0 +1,94 @@
+import fcntl
+import json
+import os
+import time
+import zlib
+
+__all__ = ('PageArchive', )
+
+
+class PageArchive:
+    """Append-only archive of raw pages loaded from NASDAQ site.
+
+    Archive is a directory with two files: `pages.dat` with concatenated
+    zlib-compressed pages and `index.jsonl` with one JSON record per page
+    (ticker, related url, page number, timestamp and position of data).
+    Writing is guarded by file lock, so archive can be shared between
+    parallel workers. On reading, the latest record for page wins.
+    """
+    data_filename = 'pages.dat'
+    index_filename = 'index.jsonl'
+
+    def __init__(self, path):
+        self.path = path
+        self._index = None
+
+        os.makedirs(path, exist_ok=True)
+
+    @property
+    def data_path(self):
+        return os.path.join(self.path, self.data_filename)
+
+    @property
+    def index_path(self):
+        return os.path.join(self.path, self.index_filename)
+
+    def write(self, ticker, related_url, page, content):
+        """Compress page content and append it to archive.
+        """
+        blob = zlib.compress(content)
+
+        with open(self.data_path, 'ab') as data_file, \
+                open(self.index_path, 'a') as index_file:
+            fcntl.flock(data_file, fcntl.LOCK_EX)
+            try:
+                data_file.seek(0, os.SEEK_END)
+                offset = data_file.tell()
+                data_file.write(blob)
+                data_file.flush()
+
+                index_file.write(json.dumps({
+                    'ticker': ticker,
+                    'url': related_url,
+                    'page': page or 1,
+                    'timestamp': time.time(),
+                    'offset': offset,
+                    'size': len(blob),
+                }) + '\n')
+                index_file.flush()
+            finally:
+                fcntl.flock(data_file, fcntl.LOCK_UN)
+
+        self._index = None
+
+    @property
+    def index(self):
+        """Dict with latest index record for each `(url, page)` pair.
+        """
+        if self._index is None:
+            self._index = {}
+
+            if os.path.exists(self.index_path):
+                with open(self.index_path, 'r') as index_file:
+                    for line in index_file:
+                        record = json.loads(line)
+                        self._index[record['url'], record['page']] = record
+
+        return self._index
+
+    def read(self, related_url, page=None):
+        """Get decompressed content of page.
+
+        Raises:
+            KeyError - if page was not recorded in archive.
+        """
+        record = self.index[related_url, page or 1]
+
+        with open(self.data_path, 'rb') as data_file:
+            data_file.seek(record['offset'])
+            return zlib.decompress(data_file.read(record['size']))
+
+    def tickers(self):
+        """Get sorted list of tickers which pages are stored in archive.
+        """
+        return sorted({record['ticker'] for record in self.index.values()})
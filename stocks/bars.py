@@ -0,0 +1,93 @@
+"""OHLCV bars of daily prices aggregated by week, month or quarter.
+
+Bars are calculated in one vectorized pass over price history ordered by
+date: days are grouped by start of their period and groups are reduced
+with `ufunc.reduceat`.
+"""
+import numpy as np
+
+from .fields import format_price_units
+
+__all__ = (
+    'INTERVALS', 'BAR_FIELDS', 'get_period_starts', 'calc_bars',
+    'get_cache_key',
+)
+
+INTERVALS = ('week', 'month', 'quarter')
+
+BAR_FIELDS = (
+    'created_date', 'open_price', 'high_price', 'low_price', 'close_price',
+    'volume',
+)
+
+
+def get_period_starts(dates, interval):
+    """Get start date of period (Monday of week, first day of month or
+    quarter) for each of dates.
+    """
+    dates = np.asarray(dates, dtype='datetime64[D]')
+
+    if interval == 'week':
+        days = dates.astype(np.int64)
+        # 1970-01-01 is Thursday
+        return (days - (days + 3) % 7).astype('datetime64[D]')
+
+    months = dates.astype('datetime64[M]').astype(np.int64)
+    if interval == 'quarter':
+        months -= months % 3
+    return months.astype('datetime64[M]').astype('datetime64[D]')
+
+
+def get_cache_key(company, interval):
+    """Get key of cached closed bars of company.
+
+    Key includes time of last import of company data, so bars are
+    recalculated after import of days of closed periods (e.g. backfill
+    or full reload).
+    """
+    version = company.imported_at.timestamp() \
+        if company.imported_at else None
+    return f'bars:{company.id}:{version}:{interval}'
+
+
+def calc_bars(arrays, interval):
+    """Aggregate daily prices into bars.
+
+    Args:
+        arrays - dict of `BAR_FIELDS` arrays ordered by date (see
+            `StockDayQuerySet.price_arrays`).
+        interval - one of `INTERVALS`.
+
+    Returns:
+        list - bars as dicts, prices are decimal strings.
+    """
+    if not len(arrays['created_date']):
+        return []
+
+    periods = get_period_starts(arrays['created_date'], interval)
+    bounds = np.flatnonzero(periods[1:] != periods[:-1]) + 1
+    starts = np.concatenate(([0], bounds))
+    ends = np.concatenate((bounds, [len(periods)])) - 1
+
+    columns = {
+        'date': periods[starts].tolist(),
+        'open': arrays['open_price'][starts].tolist(),
+        'high': np.maximum.reduceat(arrays['high_price'], starts).tolist(),
+        'low': np.minimum.reduceat(arrays['low_price'], starts).tolist(),
+        'close': arrays['close_price'][ends].tolist(),
+        'volume': np.add.reduceat(arrays['volume'], starts).tolist(),
+        'days': (ends - starts + 1).tolist(),
+    }
+
+    return [
+        {
+            'date': columns['date'][num],
+            'open': format_price_units(columns['open'][num]),
+            'high': format_price_units(columns['high'][num]),
+            'low': format_price_units(columns['low'][num]),
+            'close': format_price_units(columns['close'][num]),
+            'volume': columns['volume'][num],
+            'days': columns['days'][num],
+        }
+        for num in range(len(starts))
+    ]
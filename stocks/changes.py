@@ -0,0 +1,133 @@
+"""Change feed of rows inserted by imports.
+
+Each import of rows creates `ImportBatch` and marks its rows with it, so
+position in feed is `(batch id, row id)` and rows inserted after position
+are read by keyset pagination over `(batch, id)` indexes.
+
+Batches are created (as pending) before their rows are inserted, and are
+committed in the same transaction as rows. Ids of batches are allocated in
+order of creation but may be committed in other order, so feed is read
+only up to watermark: last batch id before first pending batch. Pending
+batch which is older than `PENDING_TIMEOUT` is considered abandoned (its
+process died), such batch can't be committed anymore.
+"""
+from datetime import timedelta
+
+from django.db.models import Max, Min
+from django.utils import timezone
+
+from .models import ImportBatch, StockDay, Trade
+
+__all__ = (
+    'start_batch', 'commit_batch', 'get_watermark', 'get_changes',
+    'parse_token', 'make_token', 'BatchAbandoned',
+)
+
+PENDING_TIMEOUT = timedelta(minutes=10)
+
+FEED_MODELS = {
+    StockDay._meta.model_name: StockDay,
+    Trade._meta.model_name: Trade,
+}
+
+
+class BatchAbandoned(Exception):
+    pass
+
+
+def start_batch(company, model, rows_count):
+    """Create pending batch for rows which are going to be inserted.
+    """
+    return ImportBatch.objects.create(
+        company=company, model=model._meta.model_name, rows_count=rows_count
+    )
+
+
+def commit_batch(batch):
+    """Mark batch as committed, should be called in transaction of rows.
+
+    Raises `BatchAbandoned` (and so rolls back rows) if batch was pending
+    too long and feed readers could skip it already.
+    """
+    now = timezone.now()
+    updated = ImportBatch.objects \
+        .filter(
+            pk=batch.pk, committed_at__isnull=True,
+            created_at__gt=now - PENDING_TIMEOUT,
+        ) \
+        .update(committed_at=now)
+
+    if not updated:
+        raise BatchAbandoned(f'Import batch #{batch.pk} is abandoned')
+
+
+def get_watermark():
+    """Get id of last batch which can be read from feed.
+    """
+    first_pending = ImportBatch.objects \
+        .filter(
+            committed_at__isnull=True,
+            created_at__gt=timezone.now() - PENDING_TIMEOUT,
+        ) \
+        .aggregate(first=Min('id'))['first']
+
+    if first_pending is not None:
+        return first_pending - 1
+    return ImportBatch.objects.aggregate(last=Max('id'))['last'] or 0
+
+
+def make_token(batch_id, row_id):
+    return f'{batch_id}-{row_id}'
+
+
+def parse_token(token):
+    """Get `(batch id, row id)` position from token.
+    """
+    batch_id, _, row_id = token.partition('-')
+    position = int(batch_id), int(row_id or 0)
+    if position[0] < 0 or position[1] < 0:
+        raise ValueError(f'Wrong token: {token}')
+    return position
+
+
+def get_changes(since=(0, 0), limit=1000):
+    """Get rows inserted after position, ordered by `(batch, id)`.
+
+    Returns:
+        tuple - list of `(model name, instance)` and position after them
+        (`since` if there are no changes).
+    """
+    since_batch, since_row = since
+    watermark = get_watermark()
+
+    batches = ImportBatch.objects \
+        .filter(
+            id__gte=since_batch, id__lte=watermark,
+            committed_at__isnull=False,
+        ) \
+        .order_by('id') \
+        .values_list('id', 'model')[:limit + 1]
+
+    batch_ids = {}
+    for batch_id, model in batches:
+        batch_ids.setdefault(model, []).append(batch_id)
+
+    rows = []
+    for model_name, ids in batch_ids.items():
+        model = FEED_MODELS[model_name]
+        qs = model.objects \
+            .filter(batch_id__in=ids) \
+            .exclude(batch_id=since_batch, id__lte=since_row) \
+            .select_related('company') \
+            .order_by('batch_id', 'id')
+        if model is Trade:
+            qs = qs.select_related('insider')
+
+        rows += [(model_name, instance) for instance in qs[:limit]]
+
+    rows.sort(key=lambda row: (row[1].batch_id, row[1].id))
+    rows = rows[:limit]
+
+    if not rows:
+        return [], since
+    return rows, (rows[-1][1].batch_id, rows[-1][1].id)
@@ -0,0 +1,197 @@
+"""Pairwise correlation and covariance of daily returns across tickers.
+
+Close prices of all tickers are streamed by one query and aligned on
+trading days into dense `days x tickers` matrix (NaN for missing days).
+Statistics are pairwise-complete: each pair uses only days when both
+tickers have returns. They are calculated by blocks of tickers with matrix
+products. Memory of all arrays (prices, returns, result matrices and block
+intermediates) is bounded by `memory_limit`, calculations which don't fit
+even with one-ticker blocks are rejected with `MemoryLimitError`.
+"""
+import itertools
+import math
+
+import numpy as np
+from django.db.models import Count
+
+from .fields import PRICE_SCALE, PriceUnits
+from .models import StockDay
+
+__all__ = (
+    'MemoryLimitError', 'load_close_matrix', 'calc_returns',
+    'calc_correlation', 'check_memory_limit',
+)
+
+DEFAULT_MEMORY_LIMIT = 256 * 1024 ** 2
+
+# Num of price rows placed into matrix at once
+CHUNK_SIZE = 10000
+
+
+class MemoryLimitError(Exception):
+    pass
+
+
+def get_fixed_memory(days_count, tickers_count):
+    """Get size of arrays kept during whole calculation.
+
+    Prices, returns and its mask, values and squares are `days x tickers`
+    arrays and correlation and covariance are `tickers x tickers` arrays
+    of float64.
+    """
+    return 8 * (5 * days_count * tickers_count + 2 * tickers_count ** 2)
+
+
+def check_memory_limit(days_count, tickers_count, memory_limit):
+    """Ensure that calculation with one-ticker blocks fits into memory limit.
+    """
+    required = get_fixed_memory(days_count, tickers_count) + \
+        80 + 48 * days_count
+    if required > memory_limit:
+        raise MemoryLimitError(
+            f'Calculation for {tickers_count} tickers and {days_count} days '
+            f'needs {required / 1024 ** 2:.1f} MB of memory, limit is '
+            f'{memory_limit / 1024 ** 2:.1f} MB'
+        )
+
+
+def load_close_matrix(tickers, date_from=None, date_to=None,
+                      memory_limit=None):
+    """Load close prices of tickers aligned on trading days.
+
+    If `memory_limit` is passed, num of days and tickers is counted first
+    and nothing is loaded for calculation which doesn't fit into it (see
+    `check_memory_limit`). Rows are streamed into preallocated matrix by
+    chunks.
+
+    Returns:
+        tuple - found tickers (in requested order), sorted dates and
+        `len(dates) x len(tickers)` matrix of close prices.
+    """
+    qs = StockDay.objects.filter(company__ticker__in=tickers).order_by()
+    if date_from:
+        qs = qs.filter(created_date__gte=date_from)
+    if date_to:
+        qs = qs.filter(created_date__lte=date_to)
+
+    if memory_limit is not None:
+        counts = qs.aggregate(
+            days=Count('created_date', distinct=True),
+            tickers=Count('company', distinct=True),
+        )
+        check_memory_limit(counts['days'], counts['tickers'], memory_limit)
+
+    found = set(qs.values_list('company__ticker', flat=True).distinct())
+    tickers = [ticker for ticker in dict.fromkeys(tickers) if ticker in found]
+    dates = list(
+        qs.values_list('created_date', flat=True)
+        .distinct()
+        .order_by('created_date')
+    )
+
+    ticker_index = {ticker: num for num, ticker in enumerate(tickers)}
+    date_index = {day: num for num, day in enumerate(dates)}
+
+    matrix = np.full((len(dates), len(tickers)), np.nan)
+    rows = qs \
+        .values_list(
+            'company__ticker', 'created_date', PriceUnits('close_price')
+        ) \
+        .iterator(chunk_size=CHUNK_SIZE)
+
+    while True:
+        chunk = list(itertools.islice(rows, CHUNK_SIZE))
+        if not chunk:
+            break
+
+        # Rows inserted after dates and tickers were loaded are skipped
+        chunk = [
+            (date_index[day], ticker_index[ticker], price)
+            for ticker, day, price in chunk
+            if day in date_index and ticker in ticker_index
+        ]
+        if chunk:
+            row_dates, row_tickers, prices = zip(*chunk)
+            matrix[row_dates, row_tickers] = \
+                np.array(prices, dtype=np.int64) / PRICE_SCALE
+
+    return tickers, dates, matrix
+
+
+def calc_returns(prices):
+    """Daily returns from aligned prices (NaN if any of two days is missing).
+    """
+    with np.errstate(divide='ignore', invalid='ignore'):
+        return prices[1:] / prices[:-1] - 1
+
+
+def get_block_size(days_count, tickers_count, memory_limit):
+    """Get num of tickers in block which fits into memory left after fixed
+    arrays (see `get_fixed_memory`).
+
+    Block pair needs about 10 `block x block` arrays and 6 `days x block`
+    arrays of float64.
+    """
+    memory_limit -= get_fixed_memory(days_count, tickers_count)
+
+    # 80 * b^2 + 48 * days * b <= limit
+    a, b, c = 80, 48 * days_count, -memory_limit
+    size = int((-b + math.sqrt(b * b - 4 * a * c)) / (2 * a))
+    return max(1, min(tickers_count, size))
+
+
+def calc_correlation(returns, min_periods=2,
+                     memory_limit=DEFAULT_MEMORY_LIMIT):
+    """Calculate pairwise correlation and covariance matrices of returns.
+
+    Pairs with less than `min_periods` common days get NaN.
+
+    Raises:
+        MemoryLimitError - if arrays don't fit into `memory_limit` bytes.
+
+    Returns:
+        tuple - correlation and covariance matrices.
+    """
+    days_count, tickers_count = returns.shape
+    check_memory_limit(days_count, tickers_count, memory_limit)
+
+    mask = (~np.isnan(returns)).astype(np.float64)
+    values = np.nan_to_num(returns)
+    squares = values ** 2
+
+    correlation = np.full((tickers_count, tickers_count), np.nan)
+    covariance = np.full((tickers_count, tickers_count), np.nan)
+    block = get_block_size(days_count, tickers_count, memory_limit)
+
+    for i in range(0, tickers_count, block):
+        x, mx, xx = (
+            values[:, i:i + block], mask[:, i:i + block],
+            squares[:, i:i + block],
+        )
+        for j in range(i, tickers_count, block):
+            y, my, yy = (
+                values[:, j:j + block], mask[:, j:j + block],
+                squares[:, j:j + block],
+            )
+            # Sums over days when both tickers of pair have returns
+            count = mx.T @ my
+            sum_x, sum_y = x.T @ my, mx.T @ y
+            sum_xy = x.T @ y
+            sum_xx, sum_yy = xx.T @ my, mx.T @ yy
+
+            with np.errstate(divide='ignore', invalid='ignore'):
+                cov = (sum_xy - sum_x * sum_y / count) / (count - 1)
+                var_x = (sum_xx - sum_x ** 2 / count) / (count - 1)
+                var_y = (sum_yy - sum_y ** 2 / count) / (count - 1)
+                corr = cov / np.sqrt(var_x * var_y)
+
+            cov[count < min_periods] = np.nan
+            corr[count < min_periods] = np.nan
+
+            rows, cols = slice(i, i + block), slice(j, j + block)
+            covariance[rows, cols] = cov
+            correlation[rows, cols] = np.clip(corr, -1, 1)
+            covariance[cols, rows] = cov.T
+            correlation[cols, rows] = correlation[rows, cols].T
+
+    return correlation, covariance
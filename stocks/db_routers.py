@@ -0,0 +1,106 @@
+import random
+import threading
+from contextlib import contextmanager
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import DEFAULT_DB_ALIAS
+
+from .models import Company
+
+__all__ = (
+    'ReplicaRouter', 'ReplicaReadMixin', 'use_database', 'get_read_database',
+)
+
+# Seconds for which replica lag check of ticker is reused
+LAG_CHECK_TIMEOUT = 5
+
+_state = threading.local()
+
+
+@contextmanager
+def use_database(alias):
+    """Route reads of code block to `alias` database.
+    """
+    previous = getattr(_state, 'alias', None)
+    _state.alias = alias
+    try:
+        yield
+    finally:
+        _state.alias = previous
+
+
+class ReplicaRouter:
+    """Database router for read replicas.
+
+    Reads go to database selected by `use_database` (primary by default),
+    so only explicitly marked read-only code hits replicas. Writes and
+    migrations always go to primary.
+    """
+    def db_for_read(self, model, **hints):
+        return getattr(_state, 'alias', None)
+
+    def db_for_write(self, model, **hints):
+        return DEFAULT_DB_ALIAS
+
+    def allow_relation(self, obj1, obj2, **hints):
+        return True
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        return db == DEFAULT_DB_ALIAS
+
+
+def get_imported_at(ticker, using):
+    return Company.objects.using(using) \
+        .filter(ticker=ticker) \
+        .values_list('imported_at', flat=True) \
+        .first()
+
+
+def is_replica_lagging(alias, ticker):
+    """Check whether replica has not replicated last import of company yet.
+
+    Result is cached for `LAG_CHECK_TIMEOUT` seconds, so reads of ticker
+    don't query both databases on every request.
+    """
+    key = f'replica_lag:{alias}:{ticker}'
+    lagging = cache.get(key)
+    if lagging is None:
+        lagging = get_imported_at(ticker, alias) != \
+            get_imported_at(ticker, DEFAULT_DB_ALIAS)
+        cache.set(key, lagging, LAG_CHECK_TIMEOUT)
+
+    return lagging
+
+
+def get_read_database(ticker=None):
+    """Select database for read-only request.
+
+    Random replica is selected from `REPLICA_DATABASES` setting. If ticker
+    is passed and replica has not replicated last import of the company yet
+    (see `is_replica_lagging`), primary is used.
+    """
+    replicas = getattr(settings, 'REPLICA_DATABASES', [])
+    if not replicas:
+        return DEFAULT_DB_ALIAS
+
+    alias = random.choice(replicas)
+    if ticker is not None and is_replica_lagging(alias, ticker):
+        return DEFAULT_DB_ALIAS
+
+    return alias
+
+
+class ReplicaReadMixin:
+    """Mixin for read-only views which routes their reads to replica.
+
+    Lazy responses are rendered inside of view, because templates also
+    query database.
+    """
+    def dispatch(self, request, *args, **kwargs):
+        alias = get_read_database(kwargs.get('ticker'))
+        with use_database(alias):
+            response = super().dispatch(request, *args, **kwargs)
+            if hasattr(response, 'render') and not response.is_rendered:
+                response.render()
+            return response
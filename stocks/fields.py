@@ -0,0 +1,285 @@
+import threading
+from contextlib import contextmanager
+from decimal import ROUND_HALF_UP, Context, Decimal, InvalidOperation
+
+from django import forms
+from django.conf import settings
+from django.core import exceptions
+from django.db import DEFAULT_DB_ALIAS, connections, models
+from django.db.models.query import ModelIterable
+from django.db.models.query_utils import DeferredAttribute
+from django.utils.functional import cached_property
+
+__all__ = (
+    'PRICE_SCALE', 'FixedPointPriceField', 'PriceUnits', 'PriceQuerySet',
+    'to_price_units', 'from_price_units', 'normalize_price', 'format_price',
+    'format_price_units', 'is_fixed_point', 'set_price_storage',
+    'reset_price_storage', 'stored_prices',
+)
+
+PRICE_SCALE = 10000
+
+PRICE_QUANTUM = Decimal(1).scaleb(-4)
+
+
+def to_price_units(value):
+    """Get price as integer number of 1e-4 units.
+
+    Any number or numeric string is treated as price in currency units
+    (e.g. `120` is 1200000 and `'120.3'` is 1203000).
+    """
+    if isinstance(value, float):
+        value = repr(value)
+
+    units = Decimal(value) * PRICE_SCALE
+    return int(units.to_integral_value(ROUND_HALF_UP))
+
+
+def from_price_units(units):
+    """Get exact decimal price from units.
+    """
+    return Decimal(int(units)) * PRICE_QUANTUM
+
+
+def normalize_price(value):
+    """Get price as `Decimal` with 4 decimal places (e.g. `120.3000`).
+    """
+    if isinstance(value, float):
+        value = repr(value)
+    return Decimal(value).quantize(PRICE_QUANTUM, ROUND_HALF_UP)
+
+
+def format_price(value):
+    """Get decimal string of price (e.g. `120.3000`).
+    """
+    return str(normalize_price(value))
+
+
+def format_price_units(units):
+    """Get decimal string of price in units (e.g. `120.3000` for 1203000).
+    """
+    return str(from_price_units(units))
+
+
+# Table and column whose type defines storage of all prices
+STORAGE_COLUMN = ('stocks_stockday', 'close_price')
+
+_storage = {}
+
+_state = threading.local()
+
+
+def is_fixed_point(connection=None):
+    """Check whether prices are stored as integer units in database.
+
+    Storage is defined by type of price columns, which is set by migration
+    0006 (see `FIXED_POINT_PRICES` setting), so changed setting doesn't
+    make existing columns read wrong. Setting is used only while price
+    table doesn't exist yet.
+    """
+    connection = connection or connections[DEFAULT_DB_ALIAS]
+    key = connection.alias, connection.settings_dict['NAME']
+    if key not in _storage:
+        column_type = get_column_type(connection)
+        if column_type is None:
+            return settings.FIXED_POINT_PRICES
+        _storage[key] = column_type == 'BigIntegerField'
+
+    return _storage[key]
+
+
+def get_column_type(connection):
+    table, column = STORAGE_COLUMN
+    introspection = connection.introspection
+
+    with connection.cursor() as cursor:
+        if table not in introspection.table_names(cursor):
+            return None
+        for info in introspection.get_table_description(cursor, table):
+            if info.name == column:
+                return introspection.get_field_type(info.type_code, info)
+
+
+def set_price_storage(connection, fixed_point):
+    """Set storage of prices for connection instead of detected one (e.g.
+    while price columns are migrated).
+    """
+    _storage[connection.alias, connection.settings_dict['NAME']] = \
+        fixed_point
+
+
+def reset_price_storage():
+    """Forget storage of prices detected by `is_fixed_point` (e.g. after
+    migration of price columns).
+    """
+    _storage.clear()
+
+
+@contextmanager
+def stored_prices():
+    """Keep prices of model instances created in block as they are loaded
+    from database (see `PriceDescriptor`).
+    """
+    previous = getattr(_state, 'stored', False)
+    _state.stored = True
+    try:
+        yield
+    finally:
+        _state.stored = previous
+
+
+class PriceDescriptor(DeferredAttribute):
+    """Normalize prices assigned to model instance by `normalize_price`,
+    so unsaved instance has the same values as loaded one.
+
+    Values loaded by `PriceQuerySet` are kept as they are stored: integer
+    units of fixed-point column are converted to `Decimal` only on first
+    access, decimal ones already have 4 decimal places.
+    """
+    def __init__(self, field):
+        super().__init__(field.attname)
+        self.field = field
+
+    def __get__(self, instance, cls=None):
+        if instance is None:
+            return self
+
+        value = super().__get__(instance, cls)
+        if type(value) is int:
+            value = from_price_units(value)
+            instance.__dict__[self.field.attname] = value
+        return value
+
+    def __set__(self, instance, value):
+        if value is not None and not getattr(_state, 'stored', False) and \
+                not hasattr(value, 'resolve_expression'):
+            value = self.field.to_python(value)
+        instance.__dict__[self.field.attname] = value
+
+
+class PriceModelIterable(ModelIterable):
+    """Create instances with prices as they are loaded from database.
+    """
+    def __iter__(self):
+        instances = super().__iter__()
+        while True:
+            previous = getattr(_state, 'stored', False)
+            _state.stored = True
+            try:
+                instance = next(instances)
+            except StopIteration:
+                return
+            finally:
+                _state.stored = previous
+            yield instance
+
+
+class PriceQuerySet(models.QuerySet):
+    """Queryset of models with price fields which loads instances without
+    conversion of prices (see `PriceDescriptor`).
+    """
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self._iterable_class = PriceModelIterable
+
+
+class FixedPointPriceField(models.Field):
+    """Price which is used same way as `DecimalField` with 4 decimal places.
+
+    Values are read and assigned as `Decimal`, any assigned or filtered
+    number (including `int`) is price in currency units. Column is either
+    `bigint` number of 1e-4 units (see `to_price_units`) or `numeric`, as
+    it was migrated (see `is_fixed_point`).
+
+    Integer units are loaded only explicitly, by `PriceUnits` expression
+    (see `StockDayQuerySet.price_arrays`).
+    """
+    description = 'Price (fixed-point or decimal column)'
+
+    def __init__(self, *args, **kwargs):
+        # Column of decimal storage, same as before fixed-point storage
+        self.max_digits, self.decimal_places = 10, 4
+        super().__init__(*args, **kwargs)
+
+    @cached_property
+    def context(self):
+        # Used by converters of decimal columns of DB backends
+        return Context(prec=self.max_digits)
+
+    def contribute_to_class(self, cls, name, **kwargs):
+        super().contribute_to_class(cls, name, **kwargs)
+        setattr(cls, self.attname, PriceDescriptor(self))
+
+    def get_internal_type(self):
+        return 'BigIntegerField' if is_fixed_point() else 'DecimalField'
+
+    def db_type(self, connection):
+        data_type = 'BigIntegerField' if is_fixed_point(connection) \
+            else 'DecimalField'
+        return connection.data_types[data_type] % self.db_type_parameters(
+            connection
+        )
+
+    def get_db_converters(self, connection):
+        # Decimal columns are loaded with 4 decimal places by backends.
+        # Units are left for instances loaded by `PriceQuerySet`.
+        converters = super().get_db_converters(connection)
+        if is_fixed_point(connection) and \
+                not getattr(_state, 'stored', False):
+            converters.append(self.convert_units)
+        return converters
+
+    def convert_units(self, value, expression, connection):
+        if value is None:
+            return value
+        return from_price_units(value)
+
+    def to_python(self, value):
+        if value is None:
+            return value
+        try:
+            return normalize_price(value)
+        except (InvalidOperation, TypeError, ValueError):
+            raise exceptions.ValidationError(
+                self.error_messages['invalid'],
+                code='invalid',
+                params={'value': value},
+            )
+
+    def get_prep_value(self, value):
+        value = super().get_prep_value(value)
+        if value is None:
+            return value
+        return normalize_price(value)
+
+    def get_db_prep_value(self, value, connection, prepared=False):
+        if not prepared:
+            value = self.get_prep_value(value)
+        if value is None or not is_fixed_point(connection):
+            return value
+        return to_price_units(value)
+
+    def formfield(self, **kwargs):
+        return super().formfield(**{
+            'form_class': forms.DecimalField,
+            'max_digits': self.max_digits,
+            'decimal_places': self.decimal_places,
+            **kwargs,
+        })
+
+
+class PriceUnits(models.Func):
+    """Price field as integer number of 1e-4 units, for vectorized analytics
+    over loaded prices (e.g. `values_list(PriceUnits('close_price'))`).
+    """
+    output_field = models.BigIntegerField()
+
+    def as_sql(self, compiler, connection, **extra_context):
+        if is_fixed_point(connection):
+            template = '%(expressions)s'
+        else:
+            template = \
+                f'CAST(ROUND(%(expressions)s * {PRICE_SCALE}) AS BIGINT)'
+        return super().as_sql(
+            compiler, connection, template=template, **extra_context
+        )
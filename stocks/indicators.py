@@ -0,0 +1,96 @@
+"""Technical indicators over price series.
+
+Each indicator takes NumPy array of prices in chronological order and
+window size, and returns array of the same length (with NaN where there is
+not enough data for window). Indicators are vectorized, without per-row
+Python loops.
+"""
+import numpy as np
+
+__all__ = ('INDICATORS', 'calc_indicators')
+
+
+def rolling_sum(values, window):
+    result = np.full(len(values), np.nan)
+    if window > len(values):
+        return result
+
+    cumsum = np.concatenate(([0.0], np.cumsum(values)))
+    result[window - 1:] = cumsum[window:] - cumsum[:-window]
+    return result
+
+
+def sma(prices, window):
+    """Simple moving average.
+    """
+    return rolling_sum(prices, window) / window
+
+
+def returns(prices, window=1):
+    """Relative price change over `window` days.
+    """
+    result = np.full(len(prices), np.nan)
+    if window < len(prices):
+        result[window:] = prices[window:] / prices[:-window] - 1
+    return result
+
+
+def volatility(prices, window):
+    """Rolling standard deviation of daily returns.
+    """
+    daily_returns = returns(prices)[1:]
+    mean = rolling_sum(daily_returns, window) / window
+    mean_sq = rolling_sum(daily_returns ** 2, window) / window
+    variance = np.clip(mean_sq - mean ** 2, 0, None) * window / (window - 1)
+
+    return np.concatenate(([np.nan], np.sqrt(variance)))
+
+
+def rsi(prices, window):
+    """Relative strength index (with simple moving averages of changes).
+    """
+    changes = np.diff(prices)
+    gains = rolling_sum(np.clip(changes, 0, None), window)
+    losses = rolling_sum(np.clip(-changes, 0, None), window)
+
+    with np.errstate(divide='ignore', invalid='ignore'):
+        result = 100 - 100 / (1 + gains / losses)
+    # Only gains in window
+    result[(losses == 0) & (gains > 0)] = 100
+    result[(losses == 0) & (gains == 0)] = 50
+
+    return np.concatenate(([np.nan], result))
+
+
+INDICATORS = {
+    'sma': sma,
+    'returns': returns,
+    'volatility': volatility,
+    'rsi': rsi,
+}
+
+# Min window of indicators (`returns` is defined for any shift)
+MIN_WINDOWS = {
+    'sma': 1,
+    'returns': 1,
+    'volatility': 2,
+    'rsi': 1,
+}
+
+
+def calc_indicators(prices, specs):
+    """Calculate indicators for prices.
+
+    Args:
+        prices - array of prices in chronological order.
+        specs - list of `(name, window)` pairs.
+
+    Returns:
+        dict - arrays of indicator values by `name:window` key.
+    """
+    prices = np.asarray(prices, dtype=np.float64)
+
+    return {
+        f'{name}:{window}': INDICATORS[name](prices, window)
+        for name, window in specs
+    }
@@ -0,0 +1,151 @@
+import resource
+import threading
+
+from django.core.management.base import BaseCommand
+from django.db import connection
+from django.test import override_settings
+
+from ...parsers import parse_nasdaq_data
+from ...stub_server import StubConfig, create_stub_server, start_stub_server
+
+
+class ConnectionsSampler(threading.Thread):
+    """Sample num of DB connections (of other sessions) during run.
+
+    Only PostgreSQL is supported, `peak` is `None` for other DBs.
+    """
+    interval = 0.1
+
+    def __init__(self):
+        super().__init__(daemon=True)
+        self.peak = None
+        self.stopped = threading.Event()
+
+    def run(self):
+        if connection.vendor != 'postgresql':
+            return
+
+        try:
+            with connection.cursor() as cursor:
+                while not self.stopped.is_set():
+                    cursor.execute(
+                        'SELECT count(*) FROM pg_stat_activity '
+                        'WHERE datname = current_database() '
+                        'AND pid <> pg_backend_pid()'
+                    )
+                    self.peak = max(self.peak or 0, cursor.fetchone()[0])
+                    self.stopped.wait(self.interval)
+        finally:
+            connection.close()
+
+    def stop(self):
+        self.stopped.set()
+        self.join()
+
+
+class Command(BaseCommand):
+    help = (
+        'Benchmark ingestion against local stub of NASDAQ site '
+        '(use scratch DB, synthetic tickers are imported)'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--tickers', type=int, default=100, help='Num of tickers'
+        )
+        parser.add_argument(
+            '--max-workers', type=int, help='Max num of workers'
+        )
+        parser.add_argument(
+            '--days', type=int, default=250,
+            help='Num of rows of historical prices table'
+        )
+        parser.add_argument(
+            '--pages', type=int, default=3,
+            help='Num of pages of insider trades table'
+        )
+        parser.add_argument(
+            '--rows', type=int, default=50,
+            help='Num of rows on page of insider trades table'
+        )
+        parser.add_argument(
+            '--latency', type=float, default=50,
+            help='Latency of response, ms'
+        )
+        parser.add_argument(
+            '--jitter', type=float, default=20,
+            help='Max deviation of latency, ms'
+        )
+        parser.add_argument(
+            '--error-rate', type=float, default=0,
+            help='Share of responses with 500 status'
+        )
+        parser.add_argument(
+            '--force', action='store_true',
+            help='Import tables even if they are unchanged since last run'
+        )
+        parser.add_argument(
+            '--serve', type=int, metavar='PORT',
+            help='Only run stub server on port, e.g. for `parse_stocks` '
+                 'with `NASDAQ_BASE_URL=http://127.0.0.1:PORT/symbol/`'
+        )
+
+    def handle(self, *args, **kwargs):
+        config = StubConfig(
+            days=kwargs['days'], pages=kwargs['pages'], rows=kwargs['rows'],
+            latency=kwargs['latency'] / 1000, jitter=kwargs['jitter'] / 1000,
+            error_rate=kwargs['error_rate'],
+        )
+
+        if kwargs['serve'] is not None:
+            server = create_stub_server(config, port=kwargs['serve'])
+            self.stdout.write(
+                f'Stub server: http://127.0.0.1:{kwargs["serve"]}/symbol/'
+            )
+            try:
+                server.serve_forever()
+            except KeyboardInterrupt:
+                self.stdout.write('Stub server stopped')
+            return
+
+        tickers = [f'st{num:04d}' for num in range(kwargs['tickers'])]
+        server, base_url = start_stub_server(config)
+        sampler = ConnectionsSampler()
+
+        self.stdout.write(
+            f'{len(tickers)} tickers: {config.days} days, '
+            f'{config.pages} pages x {config.rows} trades, '
+            f'latency {kwargs["latency"]:.0f}+-{kwargs["jitter"]:.0f} ms, '
+            f'errors {config.error_rate:.1%}'
+        )
+
+        sampler.start()
+        try:
+            with override_settings(NASDAQ_BASE_URL=base_url):
+                report = parse_nasdaq_data(
+                    tickers, max_workers=kwargs['max_workers'],
+                    force=kwargs['force'],
+                )
+        finally:
+            sampler.stop()
+            server.shutdown()
+            server.server_close()
+
+        summary = report.summary()
+        self.stdout.write(report.format())
+        self.stdout.write(
+            f'\nThroughput: {len(tickers) / summary["elapsed"]:,.1f} '
+            f'tickers/sec, {summary["rows_per_sec"]:,.0f} rows/sec'
+        )
+        self.stdout.write(
+            f'Peak RSS: parent {self.get_peak_rss(resource.RUSAGE_SELF)}, '
+            f'worker {self.get_peak_rss(resource.RUSAGE_CHILDREN)}'
+        )
+        self.stdout.write(
+            f'Peak DB connections: '
+            f'{sampler.peak if sampler.peak is not None else "n/a"}'
+        )
+
+    def get_peak_rss(self, who):
+        # Max RSS is in kilobytes on Linux
+        return f'{resource.getrusage(who).ru_maxrss / 1024:,.1f} MB'
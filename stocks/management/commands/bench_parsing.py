@@ -0,0 +1,165 @@
+import random
+import time
+from datetime import date, datetime, timedelta
+
+from django.core.management.base import BaseCommand, CommandError
+
+from ...archive import PageArchive
+from ...parsers import NASDAQPriceParser, NASDAQTradeParser, _parse_date
+
+PARSERS = {
+    'price': NASDAQPriceParser,
+    'trade': NASDAQTradeParser,
+}
+
+
+def legacy_parse_date(value):
+    if ':' in value:
+        return date.today()
+
+    return datetime.strptime(value, '%m/%d/%Y').date()
+
+
+def legacy_parse_int(value):
+    return value.replace(',', '')
+
+
+def legacy_clean(parser, raw_table):
+    """Previous row-by-row cleaning: dict per row and converters per dict.
+    """
+    data = [dict(zip(
+        parser.fields, [parser.clean_value(value) for value in row]
+    )) for row in raw_table]
+
+    for obj in data:
+        if isinstance(parser, NASDAQPriceParser):
+            obj['volume'] = legacy_parse_int(obj['volume'])
+            obj['created_date'] = legacy_parse_date(obj['created_date'])
+        else:
+            obj['traded_shares'] = legacy_parse_int(obj['traded_shares'])
+            obj['held_shares'] = legacy_parse_int(obj['held_shares'])
+            obj['last_date'] = legacy_parse_date(obj['last_date'])
+            if not obj['last_price']:
+                obj.pop('last_price')
+
+    return data
+
+
+def columnar_clean(parser, raw_table):
+    """Current column-by-column cleaning with rows as tuples.
+    """
+    columns = parser.clean_table(raw_table)
+    return list(zip(*[columns[field] for field in parser.fields]))
+
+
+class Command(BaseCommand):
+    help = 'Benchmark cleaning of NASDAQ tables (rows/sec), without DB'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--parser', choices=sorted(PARSERS), default='price',
+            help='Parser which tables are cleaned'
+        )
+        parser.add_argument(
+            '--archive', type=str,
+            help='Archive with recorded pages (synthetic table by default)'
+        )
+        parser.add_argument(
+            '--rows', type=int, default=200000,
+            help='Min num of rows in table (recorded rows are repeated)'
+        )
+        parser.add_argument(
+            '--repeat', type=int, default=3, help='Num of runs, best is used'
+        )
+
+    def handle(self, *args, **kwargs):
+        parser_class = PARSERS[kwargs['parser']]
+        parser = parser_class('bench')
+
+        if kwargs['archive']:
+            raw_table = self.load_archive_table(
+                parser_class, kwargs['archive']
+            )
+        else:
+            raw_table = self.make_synthetic_table(parser_class, kwargs['rows'])
+
+        if not raw_table:
+            raise CommandError('There are no rows for benchmark')
+
+        while len(raw_table) < kwargs['rows']:
+            raw_table = raw_table * 2
+
+        self.stdout.write(
+            f'{parser_class.__name__}: {len(raw_table)} rows, '
+            f'best of {kwargs["repeat"]} runs'
+        )
+        results = {}
+        for name, func in (('legacy', legacy_clean),
+                           ('columnar', columnar_clean)):
+            results[name] = self.measure(
+                func, parser, raw_table, kwargs['repeat']
+            )
+            self.stdout.write(f'  {name:<10}{results[name]:>12,.0f} rows/sec')
+
+        self.stdout.write(
+            f'  speedup   {results["columnar"] / results["legacy"]:>12.2f}x'
+        )
+
+    def measure(self, func, parser, raw_table, repeat):
+        best = None
+        for _ in range(repeat):
+            _parse_date.cache_clear()
+
+            start = time.perf_counter()
+            func(parser, raw_table)
+            elapsed = time.perf_counter() - start
+
+            best = elapsed if best is None else min(best, elapsed)
+
+        return len(raw_table) / best
+
+    def load_archive_table(self, parser_class, archive_path):
+        """Load raw tables of all tickers recorded in archive.
+        """
+        archive = PageArchive(archive_path)
+        raw_table = []
+
+        for ticker in archive.tickers():
+            parser = parser_class(ticker, archive=archive, replay=True)
+            try:
+                raw_table += parser.load_table(
+                    parser.url, handle_pagination=parser.paginated
+                )
+            except KeyError:
+                continue
+
+        return raw_table
+
+    def make_synthetic_table(self, parser_class, rows_count):
+        """Make raw table with values formatted as on NASDAQ pages.
+        """
+        start_date = date(2000, 1, 1)
+
+        def random_date():
+            value = start_date + timedelta(days=random.randint(0, 365 * 18))
+            return f'\r\n   {value:%m/%d/%Y}   '
+
+        def random_number():
+            return f'\r\n   {random.randint(100, 5000000):,}   '
+
+        def random_price():
+            return f'\r\n   {random.uniform(1, 500):.2f}   '
+
+        if parser_class is NASDAQPriceParser:
+            return [
+                [random_date(), random_price(), random_price(),
+                 random_price(), random_price(), random_number()]
+                for _ in range(rows_count)
+            ]
+
+        return [
+            [f'Insider {random.randint(1, 500)}', 'Director', random_date(),
+             'Sell', 'Direct', random_number(), random_price(),
+             random_number()]
+            for _ in range(rows_count)
+        ]
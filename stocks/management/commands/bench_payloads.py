@@ -0,0 +1,96 @@
+import gzip
+import json
+import random
+import time
+from datetime import date, timedelta
+
+from django.core.management.base import BaseCommand
+from rest_framework.renderers import JSONRenderer
+
+from ...api.renderers import ColumnarJSONRenderer
+
+
+def make_stock_days(rows_count):
+    """Rows as rendered by `StockDaySerializer`.
+    """
+    return [
+        {
+            'id': num + 1,
+            'created_date': str(date(2000, 1, 1) + timedelta(days=num)),
+            'open_price': f'{random.uniform(1, 500):.4f}',
+            'close_price': f'{random.uniform(1, 500):.4f}',
+            'high_price': f'{random.uniform(1, 500):.4f}',
+            'low_price': f'{random.uniform(1, 500):.4f}',
+            'volume': random.randint(1000, 10 ** 8),
+            'company': 1,
+            'batch': num // 100 + 1,
+        }
+        for num in range(rows_count)
+    ]
+
+
+def make_trades(rows_count, insiders_count=50):
+    """Rows as rendered by `TradeSerializer`.
+    """
+    insiders = [
+        {
+            'id': num + 1,
+            'name': f'INSIDER NAME {num}',
+            'slug': f'insider-{num}',
+        }
+        for num in range(insiders_count)
+    ]
+    return [
+        {
+            'id': num + 1,
+            'insider': random.choice(insiders),
+            'last_date': str(date(2000, 1, 1) + timedelta(days=num)),
+            'relation': 'Director',
+            'transaction_type': random.choice(('Buy', 'Sell', 'Gift')),
+            'owner_type': 'direct',
+            'last_price': f'{random.uniform(1, 500):.4f}',
+            'traded_shares': random.randint(1, 10 ** 6),
+            'held_shares': random.randint(1, 10 ** 7),
+            'company': 1,
+            'batch': num // 100 + 1,
+        }
+        for num in range(rows_count)
+    ]
+
+
+class Command(BaseCommand):
+    help = 'Benchmark size and client parse time of list payloads, without DB'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--rows', type=int, default=5000, help='Num of rows in list'
+        )
+        parser.add_argument(
+            '--repeat', type=int, default=5, help='Num of runs, best is used'
+        )
+
+    def handle(self, *args, **kwargs):
+        rows_count, repeat = kwargs['rows'], kwargs['repeat']
+        self.stdout.write(f'{rows_count} rows, best of {repeat} runs')
+
+        for name, rows in (
+            ('stock days', make_stock_days(rows_count)),
+            ('trades', make_trades(rows_count)),
+        ):
+            self.stdout.write(f'{name.capitalize()}:')
+            for renderer in (JSONRenderer(), ColumnarJSONRenderer()):
+                self.report(renderer.format, renderer.render(rows), repeat)
+
+    def report(self, name, payload, repeat):
+        best = None
+        for _ in range(repeat):
+            start = time.perf_counter()
+            json.loads(payload)
+            elapsed = time.perf_counter() - start
+            best = elapsed if best is None else min(best, elapsed)
+
+        self.stdout.write(
+            f'  {name:<10}{len(payload):>12,} bytes'
+            f'{len(gzip.compress(payload)):>12,} gzipped'
+            f'{best * 1000:>10.1f} ms parse'
+        )
@@ -0,0 +1,93 @@
+import random
+import time
+from decimal import Decimal
+
+import numpy as np
+from django.core.management.base import BaseCommand
+
+from ...fields import PRICE_SCALE, stored_prices
+from ...models import StockDay
+
+PRICE_FIELDS = ('open_price', 'close_price', 'high_price', 'low_price')
+
+
+def hydrate(rows):
+    """Instances created from loaded prices, as `StockDay.objects` does.
+    """
+    with stored_prices():
+        return [StockDay.from_db('default', PRICE_FIELDS, row) for row in rows]
+
+
+def hydrate_and_read(rows):
+    """Instances created from loaded prices, with all prices read.
+    """
+    instances = hydrate(rows)
+    for instance in instances:
+        for name in PRICE_FIELDS:
+            getattr(instance, name)
+    return instances
+
+
+def rows_diff(rows):
+    """Day-over-day differences of prices, row by row.
+    """
+    return [
+        [end - start for start, end in zip(prev_row, row)]
+        for prev_row, row in zip(rows, rows[1:])
+    ]
+
+
+def vectorized_diff(rows):
+    """Day-over-day differences of prices as int64 arrays.
+    """
+    return np.diff(np.array(rows, dtype=np.int64), axis=0)
+
+
+class Command(BaseCommand):
+    help = 'Benchmark hydration and analytics of prices (rows/sec), without DB'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--rows', type=int, default=200000, help='Num of price rows'
+        )
+        parser.add_argument(
+            '--repeat', type=int, default=3, help='Num of runs, best is used'
+        )
+
+    def handle(self, *args, **kwargs):
+        rows_count, repeat = kwargs['rows'], kwargs['repeat']
+        # Prices as they are loaded by DB driver for each storage
+        decimals = [
+            [Decimal(f'{random.uniform(1, 500):.4f}') for _ in PRICE_FIELDS]
+            for _ in range(rows_count)
+        ]
+        units = [
+            [int(value * PRICE_SCALE) for value in row] for row in decimals
+        ]
+
+        self.stdout.write(
+            f'{rows_count} rows x {len(PRICE_FIELDS)} prices, '
+            f'best of {repeat} runs'
+        )
+
+        self.stdout.write('Hydration:')
+        self.report('decimal', hydrate, decimals, repeat)
+        self.report('fixed', hydrate, units, repeat)
+        self.report('decimal+read', hydrate_and_read, decimals, repeat)
+        self.report('fixed+read', hydrate_and_read, units, repeat)
+
+        self.stdout.write('Day-over-day diff:')
+        self.report('decimal', rows_diff, decimals, repeat)
+        self.report('units', rows_diff, units, repeat)
+        self.report('vector', vectorized_diff, units, repeat)
+
+    def report(self, name, func, rows, repeat):
+        best, result = None, None
+        for _ in range(repeat):
+            start = time.perf_counter()
+            result = func(rows)
+            elapsed = time.perf_counter() - start
+            best = elapsed if best is None else min(best, elapsed)
+
+        self.stdout.write(f'  {name:<14}{len(rows) / best:>14,.0f} rows/sec')
+        return result
@@ -0,0 +1,72 @@
+import csv
+
+from django.core.management.base import BaseCommand, CommandError
+
+from ...correlation import (DEFAULT_MEMORY_LIMIT, MemoryLimitError,
+                            calc_correlation, calc_returns,
+                            load_close_matrix)
+
+
+class Command(BaseCommand):
+    help = 'Calculate correlation matrix of tickers daily returns'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            'path', type=str, help='Path to file with tickers list'
+        )
+        parser.add_argument(
+            'output', type=str, help='Path to output CSV file'
+        )
+        parser.add_argument('--date-from', type=str, help='Start date')
+        parser.add_argument('--date-to', type=str, help='End date')
+        parser.add_argument(
+            '--min-periods', type=int, default=20,
+            help='Min num of common days for pair'
+        )
+        parser.add_argument(
+            '--memory-mb', type=int,
+            default=DEFAULT_MEMORY_LIMIT // 1024 ** 2,
+            help='Memory limit for arrays of calculation'
+        )
+        parser.add_argument(
+            '--covariance', action='store_true',
+            help='Write covariance matrix instead of correlation'
+        )
+
+    def handle(self, *args, **kwargs):
+        with open(kwargs['path'], 'r') as tickers_file:
+            tickers = [
+                ticker.lower().strip()
+                for ticker in tickers_file.readlines()
+                if ticker.strip()
+            ]
+
+        memory_limit = kwargs['memory_mb'] * 1024 ** 2
+        try:
+            tickers, dates, prices = load_close_matrix(
+                tickers, kwargs.get('date_from'), kwargs.get('date_to'),
+                memory_limit=memory_limit,
+            )
+            if not tickers:
+                raise CommandError('There are no prices for selected tickers')
+
+            correlation, covariance = calc_correlation(
+                calc_returns(prices),
+                min_periods=kwargs['min_periods'],
+                memory_limit=memory_limit,
+            )
+        except MemoryLimitError as exc:
+            raise CommandError(str(exc))
+        matrix = covariance if kwargs['covariance'] else correlation
+
+        with open(kwargs['output'], 'w', newline='') as output_file:
+            writer = csv.writer(output_file)
+            writer.writerow([''] + tickers)
+            for ticker, row in zip(tickers, matrix):
+                writer.writerow([ticker] + [
+                    '' if value != value else f'{value:.8f}' for value in row
+                ])
+
+        self.stdout.write(
+            f'{len(tickers)} tickers, {len(dates)} days -> {kwargs["output"]}'
+        )
@@ -0,0 +1,45 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from ...models import Company
+from ...snapshots import export_snapshot
+
+
+class Command(BaseCommand):
+    help = 'Export price history of companies to memory-mapped snapshots'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            'tickers', nargs='*', type=str,
+            help='Tickers of companies (all companies by default)'
+        )
+        parser.add_argument(
+            '--path', type=str,
+            help='Snapshots directory (SNAPSHOTS_DIR setting by default)'
+        )
+        parser.add_argument(
+            '--full', action='store_true',
+            help='Export snapshots from scratch instead of appending new days'
+        )
+
+    def handle(self, *args, **kwargs):
+        companies = Company.objects.order_by('ticker')
+        if kwargs['tickers']:
+            companies = companies.filter(
+                ticker__in=[ticker.lower() for ticker in kwargs['tickers']]
+            )
+
+        start = time.perf_counter()
+        exported = days_count = 0
+        for company in companies.iterator():
+            days = export_snapshot(
+                company, path=kwargs['path'], full=kwargs['full']
+            )
+            exported += 1
+            days_count += days
+
+        self.stdout.write(
+            f'{exported} snapshots, {days_count} days exported '
+            f'in {time.perf_counter() - start:.2f}s'
+        )
@@ -1,6 +1,14 @@
-from django.core.management.base import BaseCommand
+from django.core.management.base import BaseCommand, CommandError
 
+from ...models import Company
 from ...parsers import parse_nasdaq_data
+from ...reload import ReloadError
+from ...scheduler import run_refresh_daemon
+from ...work_queue import enqueue_tickers, run_queue_worker
+
+# Options of parsing by command itself, daemon and queue don't use them
+PARSING_OPTIONS = ('full_reload', 'record', 'replay', 'force', 'profile',
+                   'report')
 
 
 class Command(BaseCommand):
@@ -8,20 +16,123 @@ class Command(BaseCommand):
 
     def add_arguments(self, parser):
         parser.add_argument(
-            'path', type=str, help='Path to file with tickers list'
+            'path', type=str, nargs='?',
+            help='Path to file with tickers list'
         )
         parser.add_argument(
             '--max-workers', type=int, help='Max num of workers'
         )
+        parser.add_argument(
+            '--record', type=str, metavar='ARCHIVE',
+            help='Record loaded pages into archive directory'
+        )
+        parser.add_argument(
+            '--replay', type=str, metavar='ARCHIVE',
+            help='Parse pages from archive directory instead of NASDAQ site'
+        )
+        parser.add_argument(
+            '--force', action='store_true',
+            help='Import tables even if they are unchanged since last import'
+        )
+        parser.add_argument(
+            '--full-reload', action='store_true',
+            help='Replace all prices and trades with parsed ones, tickers of '
+                 'all companies are parsed if path is not passed'
+        )
+        parser.add_argument(
+            '--daemon', action='store_true',
+            help='Refresh tickers continuously, most stale ones first'
+        )
+        parser.add_argument(
+            '--enqueue', action='store_true',
+            help='Add tickers to DB work queue'
+        )
+        parser.add_argument(
+            '--worker', action='store_true',
+            help='Process jobs from DB work queue'
+        )
+        parser.add_argument(
+            '--report', type=str, metavar='PATH',
+            help='Write JSON report with timings of parsing stages'
+        )
+        parser.add_argument(
+            '--profile', type=str, metavar='DIR',
+            help='Write cProfile stats of each worker into directory'
+        )
 
     def handle(self, *args, **kwargs):
         path = kwargs.get('path')
         max_workers = kwargs.get('max_workers')
+        record_path = kwargs.get('record')
+        replay_path = kwargs.get('replay')
+        report_path = kwargs.get('report')
+
+        if record_path and replay_path:
+            raise CommandError('Use only one of `--record` and `--replay`')
+
+        full_reload = kwargs.get('full_reload')
+        options = [
+            '--' + option.replace('_', '-')
+            for option in PARSING_OPTIONS if kwargs.get(option)
+        ]
+        for mode in ('daemon', 'enqueue', 'worker'):
+            if kwargs.get(mode) and options:
+                raise CommandError(
+                    f'{", ".join(options)} can not be used in {mode} mode'
+                )
+
+        if kwargs.get('worker'):
+            try:
+                run_queue_worker(max_workers=max_workers)
+            except KeyboardInterrupt:
+                self.stdout.write('Queue worker stopped')
+            return
+
+        if not path and not replay_path and not kwargs.get('daemon') and \
+                not full_reload:
+            raise CommandError('Path to file with tickers list is required')
+
+        tickers = []
+        if path:
+            with open(path, 'r') as tickers_file:
+                tickers = [
+                    ticker.lower().strip()
+                    for ticker in tickers_file.readlines()
+                ]
+
+        if kwargs.get('enqueue'):
+            created = enqueue_tickers(tickers)
+            self.stdout.write(f'{created} jobs added to queue')
+            return
+
+        if kwargs.get('daemon'):
+            if not tickers:
+                tickers = list(
+                    Company.objects.values_list('ticker', flat=True)
+                )
+
+            try:
+                run_refresh_daemon(tickers, max_workers=max_workers)
+            except KeyboardInterrupt:
+                self.stdout.write('Refresh daemon stopped')
+            return
+
+        if full_reload and not tickers and not replay_path:
+            tickers = list(Company.objects.values_list('ticker', flat=True))
+
+        try:
+            report = parse_nasdaq_data(
+                tickers, max_workers=max_workers,
+                archive_path=record_path or replay_path,
+                replay=bool(replay_path),
+                profile_dir=kwargs.get('profile'),
+                force=kwargs.get('force'),
+                reload=full_reload,
+            )
+        except ReloadError as error:
+            raise CommandError(str(error))
 
-        with open(path, 'r') as tickers_file:
-            tickers = [
-                ticker.lower().strip()
-                for ticker in tickers_file.readlines()
-            ]
+        self.stdout.write(report.format())
 
-        parse_nasdaq_data(tickers, max_workers=max_workers)
+        if report_path:
+            report.to_json(report_path)
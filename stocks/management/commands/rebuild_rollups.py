@@ -0,0 +1,41 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from ...models import Company
+from ...rollups import rebuild_insider_activity, verify_insider_activity
+
+
+class Command(BaseCommand):
+    help = 'Rebuild insider activity rollups from trades or verify them'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            'tickers', nargs='*', type=str,
+            help='Tickers of companies (all companies by default)'
+        )
+        parser.add_argument(
+            '--verify', action='store_true',
+            help='Only compare rollups with trades, without rebuild'
+        )
+
+    def handle(self, *args, **kwargs):
+        companies = Company.objects.order_by('ticker')
+        if kwargs['tickers']:
+            companies = companies.filter(
+                ticker__in=[ticker.lower() for ticker in kwargs['tickers']]
+            )
+
+        if not kwargs['verify']:
+            created = rebuild_insider_activity(companies)
+            self.stdout.write(f'{created} rollups are rebuilt')
+            return
+
+        mismatches = verify_insider_activity(companies)
+        for ticker, insider_id, month, expected, actual in mismatches:
+            self.stdout.write(
+                f'{ticker.upper()} insider={insider_id} {month:%Y-%m}: '
+                f'expected {expected}, actual {actual}'
+            )
+
+        if mismatches:
+            raise CommandError(f'{len(mismatches)} rollups are mismatched')
+        self.stdout.write('Rollups are consistent with trades')
@@ -0,0 +1,380 @@
+import atexit
+import fcntl
+import glob
+import json
+import os
+import threading
+import time
+import uuid
+from bisect import bisect_left
+from collections import defaultdict
+from contextlib import contextmanager
+
+from django.conf import settings
+
+__all__ = (
+    'registry', 'Counter', 'Histogram', 'record_cache',
+    'REQUEST_LATENCY', 'REQUESTS', 'DB_LATENCY', 'CACHE_REQUESTS',
+    'INGESTED_ROWS', 'INGESTION_TASKS', 'INGESTION_FAILURES',
+    'TICKER_REQUESTS',
+)
+
+
+def is_process_alive(pid):
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        pass
+    return True
+
+
+def merge_value(current, value):
+    """Merge sample values of counter (number) or histogram (list).
+    """
+    if current is None:
+        return value
+    if isinstance(current, list):
+        return [a + b for a, b in zip(current, value)]
+    return current + value
+
+
+class MetricsRegistry:
+    """In-process registry of counters and histograms.
+
+    Samples are kept in plain dicts, so recording costs one lock and one
+    dict update. If `METRICS_DIR` setting is defined, changed samples of
+    process are flushed into `<METRICS_DIR>/<pid>-<id>.json` by background
+    thread every `flush_interval` seconds (and at exit), and exposition
+    merges files of all processes (WSGI workers, `parse_stocks` runs), so
+    metrics are aggregated across them.
+
+    Files of finished processes are merged into `aggregate.json` and
+    removed on collection, so counters don't go down and directory doesn't
+    grow. Processes are checked by pid, so directory should be shared only
+    by processes of one host.
+    """
+    flush_interval = 1.0
+    aggregate_name = 'aggregate.json'
+
+    def __init__(self):
+        self.metrics = {}
+        self.lock = threading.Lock()
+        self._reset()
+        atexit.register(self._flush_at_exit)
+
+    def _reset(self):
+        self.pid = os.getpid()
+        self.token = uuid.uuid4().hex[:8]
+        self.samples = defaultdict(dict)
+        self.changed = False
+        self.flusher = None
+
+    def reset(self):
+        """Drop samples of current process (e.g. between tests).
+        """
+        with self.lock:
+            self.samples = defaultdict(dict)
+            self.changed = False
+
+    def register(self, metric):
+        metric.registry = self
+        self.metrics[metric.name] = metric
+        return metric
+
+    def update(self, metric, labels, func):
+        """Update sample of metric under lock.
+        """
+        with self.lock:
+            if os.getpid() != self.pid:
+                # Forked process shouldn't report samples of parent
+                self._reset()
+
+            samples = self.samples[metric.name]
+            samples[labels] = func(samples.get(labels))
+            self.changed = True
+
+            if self.directory and (
+                    self.flusher is None or not self.flusher.is_alive()):
+                self.flusher = threading.Thread(
+                    target=self._flush_periodically, name='metrics-flusher',
+                    daemon=True,
+                )
+                self.flusher.start()
+
+    def _flush_periodically(self):
+        # Stops when directory is unset, restarted by next update
+        while self.directory:
+            time.sleep(self.flush_interval)
+            if self.changed:
+                self.flush()
+
+    def _flush_at_exit(self):
+        if self.changed and os.getpid() == self.pid:
+            self.flush()
+
+    @property
+    def directory(self):
+        return getattr(settings, 'METRICS_DIR', None)
+
+    @property
+    def filename(self):
+        return os.path.join(self.directory, f'{self.pid}-{self.token}.json')
+
+    @property
+    def aggregate_filename(self):
+        return os.path.join(self.directory, self.aggregate_name)
+
+    def dump(self):
+        with self.lock:
+            return {
+                name: [
+                    [list(labels), list(value) if isinstance(value, list)
+                     else value]
+                    for labels, value in items.items()
+                ]
+                for name, items in self.samples.items()
+            }
+
+    def flush(self):
+        """Write samples of current process into metrics directory.
+        """
+        if not self.directory:
+            return
+
+        self.changed = False
+        os.makedirs(self.directory, exist_ok=True)
+        write_dump(self.filename, self.dump())
+
+    @contextmanager
+    def directory_lock(self):
+        """Lock metrics directory for merging of files between processes.
+        """
+        os.makedirs(self.directory, exist_ok=True)
+        with open(os.path.join(self.directory, '.lock'), 'w') as lock_file:
+            fcntl.flock(lock_file, fcntl.LOCK_EX)
+            yield
+
+    def prune(self):
+        """Merge files of finished processes into aggregate file and remove
+        them. Should be called under `directory_lock`.
+        """
+        dead_filenames = []
+        for filename in glob.glob(os.path.join(self.directory, '*-*.json')):
+            pid = os.path.basename(filename).split('-')[0]
+            if pid.isdigit() and not is_process_alive(int(pid)):
+                dead_filenames.append(filename)
+
+        if not dead_filenames:
+            return
+
+        merged = defaultdict(dict)
+        for filename in [self.aggregate_filename] + dead_filenames:
+            for name, items in read_dump(filename).items():
+                samples = merged[name]
+                for labels, value in items:
+                    labels = tuple(labels)
+                    samples[labels] = merge_value(samples.get(labels), value)
+
+        write_dump(self.aggregate_filename, {
+            name: [[list(labels), value] for labels, value in items.items()]
+            for name, items in merged.items()
+        })
+        for filename in dead_filenames:
+            os.remove(filename)
+
+    def collect(self):
+        """Get samples merged from all processes.
+
+        Returns:
+            dict - `{metric_name: {labels: value}}`.
+        """
+        dumps = [self.dump()]
+
+        if self.directory:
+            own_filename = self.filename
+            with self.directory_lock():
+                self.prune()
+                for filename in glob.glob(
+                        os.path.join(self.directory, '*.json')):
+                    if filename != own_filename:
+                        dumps.append(read_dump(filename))
+
+        merged = defaultdict(dict)
+        for dump in dumps:
+            for name, items in dump.items():
+                metric = self.metrics.get(name)
+                if metric is None:
+                    continue
+
+                samples = merged[name]
+                for labels, value in items:
+                    labels = tuple(labels)
+                    samples[labels] = metric.merge(samples.get(labels), value)
+
+        return merged
+
+    def exposition(self):
+        """Render merged samples in Prometheus text format.
+        """
+        collected = self.collect()
+        lines = []
+
+        for name, metric in sorted(self.metrics.items()):
+            lines.append(f'# HELP {name} {metric.documentation}')
+            lines.append(f'# TYPE {name} {metric.kind}')
+            for labels, value in sorted(collected.get(name, {}).items()):
+                lines.extend(metric.render(labels, value))
+
+        return '\n'.join(lines) + '\n'
+
+
+def read_dump(filename):
+    try:
+        with open(filename, 'r') as metrics_file:
+            return json.load(metrics_file)
+    except (OSError, ValueError):
+        return {}
+
+
+def write_dump(filename, dump):
+    tmp_filename = f'{filename}.{threading.get_ident()}.tmp'
+    with open(tmp_filename, 'w') as metrics_file:
+        json.dump(dump, metrics_file)
+    os.replace(tmp_filename, filename)
+
+
+def format_labels(names, values, **extra):
+    pairs = list(zip(names, values)) + list(extra.items())
+    if not pairs:
+        return ''
+
+    return '{' + ','.join(
+        '{}="{}"'.format(
+            name,
+            str(value).replace('\\', r'\\').replace('"', r'\"')
+            .replace('\n', r'\n')
+        )
+        for name, value in pairs
+    ) + '}'
+
+
+class Counter:
+    """Monotonically increasing counter.
+    """
+    kind = 'counter'
+
+    def __init__(self, name, documentation, labelnames=()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = labelnames
+
+    def inc(self, *labels, value=1):
+        self.registry.update(
+            self, labels, lambda current: (current or 0) + value
+        )
+
+    def merge(self, current, value):
+        return (current or 0) + value
+
+    def render(self, labels, value):
+        return [f'{self.name}{format_labels(self.labelnames, labels)} {value}']
+
+
+class Histogram:
+    """Histogram of observed values with cumulative buckets.
+
+    Sample is stored as list of per-bucket counts (last one is `+Inf`)
+    followed by sum of observed values.
+    """
+    kind = 'histogram'
+    default_buckets = (
+        .005, .01, .025, .05, .1, .25, .5, 1, 2.5, 5, 10,
+    )
+
+    def __init__(self, name, documentation, labelnames=(), buckets=None):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = labelnames
+        self.buckets = tuple(buckets or self.default_buckets)
+
+    def observe(self, value, *labels):
+        index = bisect_left(self.buckets, value)
+
+        def update(current):
+            current = current or [0] * (len(self.buckets) + 2)
+            current[index] += 1
+            current[-1] += value
+            return current
+
+        self.registry.update(self, labels, update)
+
+    def merge(self, current, value):
+        if current is None:
+            return list(value)
+        return [a + b for a, b in zip(current, value)]
+
+    def render(self, labels, value):
+        lines = []
+        cumulative = 0
+
+        for bound, count in zip(self.buckets + ('+Inf', ), value[:-1]):
+            cumulative += count
+            label_str = format_labels(self.labelnames, labels, le=bound)
+            lines.append(f'{self.name}_bucket{label_str} {cumulative}')
+
+        label_str = format_labels(self.labelnames, labels)
+        lines.append(f'{self.name}_sum{label_str} {value[-1]}')
+        lines.append(f'{self.name}_count{label_str} {cumulative}')
+        return lines
+
+
+registry = MetricsRegistry()
+
+REQUEST_LATENCY = registry.register(Histogram(
+    'stocks_http_request_duration_seconds',
+    'Latency of HTTP requests by URL name.',
+    ('view', ),
+))
+REQUESTS = registry.register(Counter(
+    'stocks_http_requests_total',
+    'Count of HTTP requests by URL name and response status.',
+    ('view', 'status'),
+))
+DB_LATENCY = registry.register(Histogram(
+    'stocks_db_query_duration_seconds',
+    'Latency of DB queries made while handling requests by URL name.',
+    ('view', ),
+))
+CACHE_REQUESTS = registry.register(Counter(
+    'stocks_cache_requests_total',
+    'Count of cache lookups by cache name and result (hit or miss).',
+    ('cache', 'result'),
+))
+TICKER_REQUESTS = registry.register(Counter(
+    'stocks_ticker_requests_total',
+    'Count of HTTP requests by company ticker.',
+    ('ticker', ),
+))
+INGESTED_ROWS = registry.register(Counter(
+    'stocks_ingested_rows_total',
+    'Count of rows saved in DB by parser class.',
+    ('parser', ),
+))
+INGESTION_TASKS = registry.register(Counter(
+    'stocks_ingestion_tasks_total',
+    'Count of parsing tasks by parser class and status.',
+    ('parser', 'status'),
+))
+INGESTION_FAILURES = registry.register(Counter(
+    'stocks_ingestion_failures_total',
+    'Count of failed parsing tasks by parser class.',
+    ('parser', ),
+))
+
+
+def record_cache(cache_name, hit):
+    """Record result of cache lookup.
+    """
+    CACHE_REQUESTS.inc(cache_name, 'hit' if hit else 'miss')
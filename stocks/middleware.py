@@ -0,0 +1,102 @@
+import time
+from contextlib import ExitStack
+
+from django.db import connections
+from django.middleware.gzip import GZipMiddleware
+
+from .metrics import DB_LATENCY, REQUEST_LATENCY, REQUESTS, TICKER_REQUESTS
+from .models import Company
+
+
+class KnownTickers:
+    """Set of tickers of companies, reloaded from DB at most once per
+    `timeout` seconds.
+    """
+    timeout = 60
+
+    def __init__(self):
+        self.tickers = frozenset()
+        self.loaded_at = None
+
+    def __contains__(self, ticker):
+        if self.loaded_at is None or \
+                time.monotonic() - self.loaded_at > self.timeout:
+            self.tickers = frozenset(
+                ticker.lower() for ticker in
+                Company.objects.values_list('ticker', flat=True)
+            )
+            self.loaded_at = time.monotonic()
+
+        return ticker in self.tickers
+
+
+class MetricsMiddleware:
+    """Record latency of requests and DB queries by URL name.
+
+    Also count successful requests by company ticker (used for refresh
+    scheduling). Only tickers of existing companies are counted, so junk
+    URLs don't create new series.
+
+    Should be the first middleware to measure full request handling time.
+    """
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.known_tickers = KnownTickers()
+
+    def __call__(self, request):
+        db_timings = []
+
+        def execute_wrapper(execute, sql, params, many, context):
+            start = time.perf_counter()
+            try:
+                return execute(sql, params, many, context)
+            finally:
+                db_timings.append(time.perf_counter() - start)
+
+        start = time.perf_counter()
+        with ExitStack() as stack:
+            for connection in connections.all():
+                stack.enter_context(
+                    connection.execute_wrapper(execute_wrapper)
+                )
+            response = self.get_response(request)
+        duration = time.perf_counter() - start
+
+        view = self.get_view_name(request)
+        REQUEST_LATENCY.observe(duration, view)
+        REQUESTS.inc(view, str(response.status_code))
+        for db_time in db_timings:
+            DB_LATENCY.observe(db_time, view)
+
+        ticker = self.get_ticker(request)
+        if ticker is not None and 200 <= response.status_code < 300 and \
+                ticker in self.known_tickers:
+            TICKER_REQUESTS.inc(ticker)
+
+        return response
+
+    def get_ticker(self, request):
+        resolver_match = getattr(request, 'resolver_match', None)
+        if resolver_match is None or 'ticker' not in resolver_match.kwargs:
+            return None
+        return resolver_match.kwargs['ticker'].lower()
+
+    def get_view_name(self, request):
+        resolver_match = getattr(request, 'resolver_match', None)
+        if resolver_match is None:
+            return 'unresolved'
+        return resolver_match.view_name
+
+
+class APIGZipMiddleware(GZipMiddleware):
+    """Compress responses of API only.
+
+    API responses are public data, while pages with secrets (admin, CSRF
+    tokens) are left uncompressed to avoid BREACH attack.
+    """
+    path_prefix = '/api/'
+
+    def process_response(self, request, response):
+        if not request.path.startswith(self.path_prefix):
+            return response
+        return super().process_response(request, response)
@@ -0,0 +1,39 @@
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('stocks', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='IngestJob',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('ticker', models.CharField(max_length=6)),
+                ('kind', models.CharField(choices=[('price', 'Prices'), ('trade', 'Trades')], max_length=16)),
+                ('due_at', models.DateTimeField()),
+                ('lease_until', models.DateTimeField(blank=True, null=True)),
+                ('worker', models.CharField(blank=True, max_length=128)),
+                ('status', models.CharField(blank=True, max_length=32)),
+                ('attempts', models.PositiveIntegerField(default=0)),
+                ('started_at', models.DateTimeField(blank=True, null=True)),
+                ('finished_at', models.DateTimeField(blank=True, null=True)),
+                ('duration', models.FloatField(blank=True, null=True)),
+                ('rows', models.PositiveIntegerField(default=0)),
+            ],
+            options={
+                'ordering': ('due_at',),
+            },
+        ),
+        migrations.AlterUniqueTogether(
+            name='ingestjob',
+            unique_together={('ticker', 'kind')},
+        ),
+        migrations.AlterIndexTogether(
+            name='ingestjob',
+            index_together={('due_at', 'lease_until')},
+        ),
+    ]
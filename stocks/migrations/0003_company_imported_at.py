@@ -0,0 +1,16 @@
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('stocks', '0002_ingestjob'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='company',
+            name='imported_at',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+    ]
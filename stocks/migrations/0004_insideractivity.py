@@ -0,0 +1,38 @@
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('stocks', '0003_company_imported_at'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='InsiderActivity',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('month', models.DateField()),
+                ('trades_count', models.PositiveIntegerField(default=0)),
+                ('bought_shares', models.BigIntegerField(default=0)),
+                ('sold_shares', models.BigIntegerField(default=0)),
+                ('net_shares', models.BigIntegerField(default=0)),
+                ('held_shares', models.BigIntegerField(default=0)),
+                ('last_date', models.DateField()),
+                ('company', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='insider_activities', to='stocks.Company')),
+                ('insider', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='activities', to='stocks.Insider')),
+            ],
+            options={
+                'ordering': ('-month',),
+            },
+        ),
+        migrations.AlterUniqueTogether(
+            name='insideractivity',
+            unique_together={('company', 'insider', 'month')},
+        ),
+        migrations.AlterIndexTogether(
+            name='insideractivity',
+            index_together={('insider', 'month')},
+        ),
+    ]
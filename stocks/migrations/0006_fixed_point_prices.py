@@ -0,0 +1,111 @@
+from django.conf import settings
+from django.db import migrations, models
+
+import stocks.fields
+
+PRICE_FIELDS = (
+    ('stockday', 'open_price'),
+    ('stockday', 'close_price'),
+    ('stockday', 'high_price'),
+    ('stockday', 'low_price'),
+    ('trade', 'last_price'),
+)
+
+# Decimal column of prices before migration
+DECIMAL_COLUMN = {'max_digits': 10, 'decimal_places': 4}
+
+# Column which holds units (max price 999999.9999) before type change
+WIDE_DECIMAL_COLUMN = {'max_digits': 14, 'decimal_places': 4}
+
+
+def get_column(model, name, field_class, **kwargs):
+    field = field_class(default=0, **kwargs)
+    field.set_attributes_from_name(name)
+    field.model = model
+    return field
+
+
+def check_constraints(schema_editor, model):
+    # Deferred foreign key checks of updated rows block ALTER TABLE on
+    # PostgreSQL
+    schema_editor.connection.check_constraints(
+        table_names=[model._meta.db_table]
+    )
+
+
+def convert_columns(apps, schema_editor, to_fixed_point):
+    """Convert price columns between `numeric` prices and `bigint` units.
+
+    Prices are multiplied in DB, so large tables are converted without
+    loading rows into Python. Storage of price fields is set to target one
+    while columns are converted, because SQLite rebuilds table with all
+    its columns on each change.
+    """
+    qn = schema_editor.quote_name
+    stocks.fields.set_price_storage(schema_editor.connection, to_fixed_point)
+
+    try:
+        for model_name, name in PRICE_FIELDS:
+            model = apps.get_model('stocks', model_name)
+            table, column = qn(model._meta.db_table), qn(name)
+            decimal = get_column(
+                model, name, models.DecimalField, **DECIMAL_COLUMN
+            )
+            wide = get_column(
+                model, name, models.DecimalField, **WIDE_DECIMAL_COLUMN
+            )
+            units = get_column(model, name, models.BigIntegerField)
+
+            if to_fixed_point:
+                schema_editor.alter_field(model, decimal, wide)
+                schema_editor.execute(
+                    f'UPDATE {table} SET {column} = ROUND({column} * 10000)'
+                )
+                check_constraints(schema_editor, model)
+                schema_editor.alter_field(model, wide, units)
+            else:
+                schema_editor.alter_field(model, units, wide)
+                schema_editor.execute(
+                    f'UPDATE {table} SET {column} = {column} / 10000.0'
+                )
+                check_constraints(schema_editor, model)
+                schema_editor.alter_field(model, wide, decimal)
+    finally:
+        stocks.fields.reset_price_storage()
+
+
+def to_fixed_point(apps, schema_editor):
+    """Convert prices into units only with `FIXED_POINT_PRICES` setting,
+    else columns are left as they are.
+    """
+    if settings.FIXED_POINT_PRICES:
+        convert_columns(apps, schema_editor, to_fixed_point=True)
+
+
+def to_decimal(apps, schema_editor):
+    """Convert prices back, if they were converted into units.
+    """
+    stocks.fields.reset_price_storage()
+    if stocks.fields.is_fixed_point(schema_editor.connection):
+        convert_columns(apps, schema_editor, to_fixed_point=False)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('stocks', '0005_insider_name_trgm'),
+    ]
+
+    operations = [
+        # Column of price field is the same `numeric` column until
+        # conversion into units
+        migrations.SeparateDatabaseAndState(state_operations=[
+            migrations.AlterField(
+                model_name=model,
+                name=field,
+                field=stocks.fields.FixedPointPriceField(default=0),
+            )
+            for model, field in PRICE_FIELDS
+        ]),
+        migrations.RunPython(to_fixed_point, to_decimal),
+    ]
@@ -1,8 +1,12 @@
-from django.db import connection, models
+import numpy as np
+from django.db import models
 from django.template.defaultfilters import slugify
 from django.urls import reverse
+from django.utils import timezone
 
-from .sql_queries import PERIOD_ANALYTICS_SQL
+from .fields import (FixedPointPriceField, PriceQuerySet, PriceUnits,
+                     format_price, from_price_units, to_price_units)
+from .periods import PriceSeries
 
 
 class Company(models.Model):
@@ -15,6 +19,10 @@ class Company(models.Model):
         max_length=6,
         unique=True,
     )
+    imported_at = models.DateTimeField(
+        null=True,
+        blank=True,
+    )
 
     class Meta:
         ordering = ('ticker', )
@@ -25,44 +33,168 @@ class Company(models.Model):
     def get_absolute_url(self):
         return reverse('stocks:company-detail', kwargs={'ticker': self.ticker})
 
-    def get_min_price_periods(self, price_type, min_diff):
+    def get_price_history(self, *fields, snapshot=None):
+        """Get price history of company as arrays ordered by date.
+
+        Args:
+            fields - names of `StockDay` fields.
+            snapshot - if passed, history is read from memory-mapped
+                snapshot (see `snapshots.load_snapshot`) instead of DB.
+        """
+        if snapshot is not None:
+            return snapshot.arrays(*fields)
+
+        return StockDay.objects \
+            .filter(company=self) \
+            .order_by('created_date') \
+            .price_arrays(*fields)
+
+    def get_prices_diffs(self, periods=1, snapshot=None):
+        """Get prices differences between each day and `periods` days before
+        (see `StockDayQuerySet.get_prices_diffs`).
+        """
+        return calc_prices_diffs(
+            self.get_price_history(
+                'created_date', *PRICE_FIELDS, snapshot=snapshot
+            ),
+            periods
+        )
+
+    def get_min_price_periods(self, price_types, min_diffs, snapshot=None):
         """Get Min periods which difference in price greater than `min_diff`.
+
+        Accepts single price type and difference or lists of them. Price
+        history is loaded once and each price type is prepared once for
+        all differences (see `periods.PriceSeries`). Periods from snapshot
+        have no ids of `StockDay`.
+
+        Returns:
+            list - periods, if single type and difference are passed.
+            dict - periods by `(price_type, min_diff)` otherwise.
+        """
+        single = isinstance(price_types, str) and \
+            not isinstance(min_diffs, (list, tuple))
+        if isinstance(price_types, str):
+            price_types = [price_types]
+        if not isinstance(min_diffs, (list, tuple)):
+            min_diffs = [min_diffs]
+
+        price_types = list(dict.fromkeys(price_types))
+        history = self.get_price_history(
+            'created_date', *([] if snapshot is not None else ['id']),
+            *[f'{price_type}_price' for price_type in price_types],
+            snapshot=snapshot
+        )
+        dates = history['created_date'].tolist()
+        ids = history['id'].tolist() if 'id' in history else \
+            [None] * len(dates)
+
+        results = {}
+        for price_type in price_types:
+            prices = history[f'{price_type}_price']
+            series = PriceSeries(prices)
+
+            for min_diff in min_diffs:
+                starts, ends = series.find_periods(to_price_units(min_diff))
+                results[(price_type, min_diff)] = [
+                    {
+                        'id1': ids[start],
+                        'price1': from_price_units(prices[start]),
+                        'date1': dates[start],
+                        'id2': ids[end],
+                        'price2': from_price_units(prices[end]),
+                        'date2': dates[end],
+                        'diff': from_price_units(prices[end] - prices[start]),
+                    }
+                    for start, end in zip(starts.tolist(), ends.tolist())
+                ]
+
+        if single:
+            return results[(price_types[0], min_diffs[0])]
+        return results
+
+
+PRICE_FIELDS = ('open_price', 'close_price', 'high_price', 'low_price')
+
+
+def calc_prices_diffs(arrays, periods=1):
+    """Calculate prices differences over arrays of price history.
+    """
+    return arrays['created_date'][periods:], {
+        field: arrays[field][periods:] - arrays[field][:-periods]
+        for field in PRICE_FIELDS
+    }
+
+
+class StockDayQuerySet(PriceQuerySet):
+
+    def price_arrays(self, *fields):
+        """Get values of fields as NumPy arrays (in queryset order).
+
+        Dates are `datetime64[D]` arrays, prices are int64 arrays of 1e-4
+        units (see `fields.PriceUnits`), so arithmetic over them is
+        vectorized and exact.
         """
-        with connection.cursor() as cursor:
-            cursor.execute(
-                PERIOD_ANALYTICS_SQL.format(
-                    type=price_type, min_diff=min_diff,
-                    company_id=self.id
-                ))
-            columns = [col[0] for col in cursor.description]
+        rows = list(self.values_list(*[
+            PriceUnits(field) if self.is_price_field(field) else field
+            for field in fields
+        ]))
+        columns = zip(*rows) if rows else [()] * len(fields)
+
+        return {
+            field: np.array(
+                column, dtype=self.get_array_dtype(field)
+            )
+            for field, column in zip(fields, columns)
+        }
+
+    def is_price_field(self, field):
+        return isinstance(
+            self.model._meta.get_field(field), FixedPointPriceField
+        )
+
+    def get_array_dtype(self, field):
+        model_field = self.model._meta.get_field(field)
+        if self.is_price_field(field):
+            return np.int64
+        if isinstance(model_field, models.DateField):
+            return 'datetime64[D]'
+        if isinstance(model_field, models.IntegerField):
+            return np.int64
+        return None
 
-            return [
-                dict(zip(columns, row)) for row in cursor.fetchall()
-            ]
+    def get_prices_diffs(self, periods=1):
+        """Get prices differences between each day and `periods` days before.
+
+        Vectorized counterpart of `StockDay.get_prices_diff` for the whole
+        history, days are ordered by date.
+
+        Returns:
+            tuple - dates of days and dict with int64 arrays of differences
+            by price field.
+        """
+        arrays = self.order_by('created_date') \
+            .price_arrays('created_date', *PRICE_FIELDS)
+        return calc_prices_diffs(arrays, periods)
 
 
 class StockDay(models.Model):
     """Model for storing daily prices data for company stock.
+
+    Prices are loaded as `Decimal`, integer units of prices are loaded by
+    `StockDayQuerySet.price_arrays` (see `fields.FixedPointPriceField`).
     """
     created_date = models.DateField()
-    open_price = models.DecimalField(
-        max_digits=10,
-        decimal_places=4,
+    open_price = FixedPointPriceField(
         default=0
     )
-    close_price = models.DecimalField(
-        max_digits=10,
-        decimal_places=4,
+    close_price = FixedPointPriceField(
         default=0
     )
-    high_price = models.DecimalField(
-        max_digits=10,
-        decimal_places=4,
+    high_price = FixedPointPriceField(
         default=0
     )
-    low_price = models.DecimalField(
-        max_digits=10,
-        decimal_places=4,
+    low_price = FixedPointPriceField(
         default=0
     )
     volume = models.IntegerField()
@@ -72,14 +204,29 @@ class StockDay(models.Model):
         on_delete=models.CASCADE,
         related_name='prices'
     )
+    batch = models.ForeignKey(
+        'stocks.ImportBatch',
+        on_delete=models.SET_NULL,
+        related_name='+',
+        null=True,
+        blank=True,
+        db_index=False,
+    )
+
+    objects = StockDayQuerySet.as_manager()
 
     class Meta:
         unique_together = ('company', 'created_date', )
+        indexes = [
+            models.Index(
+                fields=['batch', 'id'], name='stocks_stockday_batch_idx'
+            ),
+        ]
         ordering = ('-created_date', )
 
     def __str__(self):
-        return \
-            f'({self.created_date}) {self.company.ticker} - {self.close_price}'
+        return f'({self.created_date}) {self.company.ticker} - ' \
+            f'{format_price(self.close_price)}'
 
     def get_prices_diff(self, end_stock):
         """Get dict with price different between self and `StockDay` instance.
@@ -115,9 +262,7 @@ class Trade(models.Model):
         null=True,
         blank=True,
     )
-    last_price = models.DecimalField(
-        max_digits=10,
-        decimal_places=4,
+    last_price = FixedPointPriceField(
         default=0,
     )
     traded_shares = models.PositiveIntegerField()
@@ -128,8 +273,23 @@ class Trade(models.Model):
         on_delete=models.CASCADE,
         related_name='trades',
     )
+    batch = models.ForeignKey(
+        'stocks.ImportBatch',
+        on_delete=models.SET_NULL,
+        related_name='+',
+        null=True,
+        blank=True,
+        db_index=False,
+    )
+
+    objects = PriceQuerySet.as_manager()
 
     class Meta:
+        indexes = [
+            models.Index(
+                fields=['batch', 'id'], name='stocks_trade_batch_idx'
+            ),
+        ]
         ordering = ('-last_date', )
 
     def __str__(self):
@@ -155,3 +315,169 @@ class Insider(models.Model):
         """
         self.slug = slugify(self.name)
         super().save()
+
+
+class ImportBatch(models.Model):
+    """Model for storing batch of rows inserted by one import.
+
+    Ids of batches are positions of change feed (see `stocks.changes`).
+    Batch is committed in the same transaction as its rows.
+    """
+    company = models.ForeignKey(
+        'stocks.Company',
+        on_delete=models.CASCADE,
+        related_name='import_batches',
+    )
+    model = models.CharField(
+        max_length=32,
+    )
+    rows_count = models.PositiveIntegerField(
+        default=0,
+    )
+    created_at = models.DateTimeField(
+        default=timezone.now,
+    )
+    committed_at = models.DateTimeField(
+        null=True,
+        blank=True,
+        db_index=True,
+    )
+
+    class Meta:
+        ordering = ('id', )
+
+    def __str__(self):
+        return f'{self.company} - {self.model} #{self.id}'
+
+
+class ImportFingerprint(models.Model):
+    """Model for storing fingerprint of chunk of imported table.
+
+    Table of ticker is imported by chunks of `batch_size` rows, chunk which
+    has the same fingerprint as on last import is skipped by parser.
+    """
+    company = models.ForeignKey(
+        'stocks.Company',
+        on_delete=models.CASCADE,
+        related_name='import_fingerprints',
+    )
+    model = models.CharField(
+        max_length=32,
+    )
+    chunk = models.PositiveIntegerField()
+    digest = models.CharField(
+        max_length=32,
+    )
+    updated_at = models.DateTimeField(
+        auto_now=True,
+    )
+
+    class Meta:
+        unique_together = ('company', 'model', 'chunk')
+
+    def __str__(self):
+        return f'{self.company} - {self.model} #{self.chunk}'
+
+
+class InsiderActivity(models.Model):
+    """Model for storing monthly rollup of insider trades for company.
+
+    Rows are updated incrementally on import of new trades
+    (see `stocks.rollups`).
+    """
+    company = models.ForeignKey(
+        'stocks.Company',
+        on_delete=models.CASCADE,
+        related_name='insider_activities',
+    )
+    insider = models.ForeignKey(
+        'stocks.Insider',
+        on_delete=models.CASCADE,
+        related_name='activities',
+    )
+    month = models.DateField()
+    trades_count = models.PositiveIntegerField(
+        default=0,
+    )
+    bought_shares = models.BigIntegerField(
+        default=0,
+    )
+    sold_shares = models.BigIntegerField(
+        default=0,
+    )
+    net_shares = models.BigIntegerField(
+        default=0,
+    )
+    held_shares = models.BigIntegerField(
+        default=0,
+    )
+    last_date = models.DateField()
+
+    class Meta:
+        unique_together = ('company', 'insider', 'month', )
+        index_together = ('insider', 'month', )
+        ordering = ('-month', )
+
+    def __str__(self):
+        return f'{self.company} - {self.insider} ({self.month:%Y-%m})'
+
+
+class IngestJob(models.Model):
+    """Model for storing jobs of cooperative ingestion queue.
+
+    Job is claimed by `parse_stocks --worker` process for `lease_until`
+    time. If worker crashes, job can be claimed again after lease expiry.
+    """
+    PRICE = 'price'
+    TRADE = 'trade'
+    KIND_CHOICES = (
+        (PRICE, 'Prices'),
+        (TRADE, 'Trades'),
+    )
+
+    ticker = models.CharField(
+        max_length=6,
+    )
+    kind = models.CharField(
+        max_length=16,
+        choices=KIND_CHOICES,
+    )
+    due_at = models.DateTimeField()
+    lease_until = models.DateTimeField(
+        null=True,
+        blank=True,
+    )
+    worker = models.CharField(
+        max_length=128,
+        blank=True,
+    )
+    status = models.CharField(
+        max_length=32,
+        blank=True,
+    )
+    attempts = models.PositiveIntegerField(
+        default=0,
+    )
+    started_at = models.DateTimeField(
+        null=True,
+        blank=True,
+    )
+    finished_at = models.DateTimeField(
+        null=True,
+        blank=True,
+    )
+    duration = models.FloatField(
+        null=True,
+        blank=True,
+    )
+    rows = models.PositiveIntegerField(
+        default=0,
+    )
+
+    class Meta:
+        unique_together = ('ticker', 'kind', )
+        index_together = ('due_at', 'lease_until', )
+        ordering = ('due_at', )
+
+    def __str__(self):
+        return f'{self.ticker} - {self.kind} ({self.due_at})'
@@ -1,26 +1,68 @@
+import hashlib
 import logging
+import re
+import time
 from concurrent import futures
 from datetime import date, datetime
+from functools import lru_cache, partial
 
 import requests
 from bs4 import BeautifulSoup
-
-from .models import Company, StockDay, Trade, Insider
-
-__all__ = ('parse_nasdaq_data', )
+from django.apps import apps
+from django.conf import settings
+from django.db import connection, connections, transaction
+from django.utils import timezone
+from django.utils.functional import cached_property
+
+from . import metrics
+from .archive import PageArchive
+from .changes import commit_batch, start_batch
+from .models import Company, ImportFingerprint, Insider, StockDay, Trade
+from .profiling import RunReport, StageTimer, worker_profile
+from .reload import (ReloadError, create_shadow_tables, drop_shadow_tables,
+                     get_shadow_model, swap_shadow_tables)
+from .rollups import update_insider_activity
+
+__all__ = ('parse_nasdaq_data', 'init_worker', 'create_executor')
 
 logger = logging.getLogger(__name__)
 
+# DB connections inherited by worker from parent process
+_inherited_connections = []
+
 
 def parse_date(value):
     if ':' in value:
         return date.today()
 
+    return _parse_date(value)
+
+
+@lru_cache(maxsize=16384)
+def _parse_date(value):
+    """Memoized `strptime`, tables of different tickers share same dates.
+    """
     return datetime.strptime(value, '%m/%d/%Y').date()
 
 
+def get_fingerprint(columns):
+    """Get digest of cleaned table columns.
+
+    Cleaned values are hashed instead of raw ones, so fix of cleaning or
+    converters changes fingerprint and table is imported again.
+    """
+    content = '\x1e'.join('\x1f'.join(map(str, column)) for column in columns)
+    return hashlib.blake2b(content.encode(), digest_size=16).hexdigest()
+
+
 def parse_int(value):
-    return value.replace(',', '')
+    return int(value.replace(',', ''))
+
+
+def parse_price(value):
+    """Empty price is replaced with model default.
+    """
+    return value or 0
 
 
 class BaseNASDAQParser:
@@ -29,41 +71,132 @@ class BaseNASDAQParser:
     Provide main logic for grabbing and parsing data. Also has an interface
     for using as async tasks (`BaseNASDAQAParser.as_task` classmethod).
     After parsing, check `Company` model and save instances in DB in bulk.
+
+    Pages are processed as a stream: rows are extracted page by page and
+    cleaned and saved in batches of `batch_size` rows, so memory usage
+    doesn't depend on length of history. Batch is cleaned column by column:
+    each value is cleaned by `clean_value` and converted by function from
+    `converters` dict for its field. Rows are kept as tuples of values in
+    `fields` order.
+
+    Batch which has the same fingerprint of cleaned values as on last import
+    of ticker is skipped right after cleaning (if all batches are skipped,
+    status is `Unchanged`). With `force` flag all batches are imported.
+
+    With `reload` flag rows are loaded into shadow table of full reload
+    (see `stocks.reload`), without fingerprints, change feed batches and
+    insider rollups, which are made on swap of tables.
+
+    If `archive` is passed, each loaded page is recorded into it. With
+    `replay` flag pages are taken from archive instead of NASDAQ site.
     """
-    base_url = 'http://www.nasdaq.com/symbol/'
     model = None
     fields = ()
+    converters = {}
     identify_args = ()
     paginated = True
+    max_pages = 10
+    batch_size = 1000
 
-    def __init__(self, ticker):
+    def __init__(self, ticker, archive=None, replay=False, force=False,
+                 reload=False):
         self.ticker = ticker.lower()
+        self.archive = archive
+        self.replay = replay
+        self.force = force
+        self.reload = reload
+        self.timer = StageTimer()
+        self.status = None
+
+        if replay and archive is None:
+            raise ValueError('Archive is required for replay mode')
+
+        if reload:
+            self.model = get_shadow_model(self.model)
+            # Shadow table has no index for dedupe query, table of ticker
+            # is loaded only by this parser, so keys are kept in memory
+            self.reloaded_keys = set()
+
+    def fetch_page(self, related_url, page=None):
+        """Load raw HTML page from NASDAQ site or from archive.
+        """
+        self.timer.count('pages')
 
-    def load_table(self, related_url, page=None, handle_pagination=True):
-        """Build URL for parsing, load HTML page and extract table with data.
+        if self.replay:
+            with self.timer.stage('fetch'):
+                return self.archive.read(related_url, page)
 
-        Returns:
-            list - array of rows with price day data.
-        """
         url = self.base_url + related_url
         params = {'page': page} if page else None
 
-        html = requests.get(url, params=params).content
-        soup = BeautifulSoup(html, 'html.parser')
-        rows = self.parse_table(soup)
+        with self.timer.stage('fetch'):
+            html = requests.get(url, params=params).content
+
+        if self.archive is not None:
+            self.archive.write(self.ticker, related_url, page, html)
+
+        return html
+
+    def load_page(self, related_url, page=None, handle_pagination=False):
+        """Load HTML page and extract table with data.
+
+        Soup of page is destroyed right after extraction of rows.
+
+        Returns:
+            tuple - array of rows and number of last page (if pagination
+            is handled, else None).
+        """
+        html = self.fetch_page(related_url, page)
+
+        with self.timer.stage('soup'):
+            soup = BeautifulSoup(html, 'html.parser')
+
+        with self.timer.stage('extract'):
+            rows = self.parse_table(soup)
+            last_page = \
+                self.parse_last_page(soup) if handle_pagination else None
+            soup.decompose()
+
+        # Skip table header and empty row after it
+        if len(rows) > 1 and '\n' in rows[1]:
+            return rows[2:], last_page
+        return rows[1:], last_page
+
+    def iter_table(self, related_url, handle_pagination=True):
+        """Load pages one by one and yield rows of table.
+        """
+        rows, last_page = self.load_page(
+            related_url, handle_pagination=handle_pagination
+        )
+        yield from rows
 
         if handle_pagination:
-            # Load other pages and append to main table
-            last_page = self.parse_last_page(soup)
+            # Load pages from 2 to last_page (but <= `max_pages`)
+            for page in range(2, min(self.max_pages, last_page or 1) + 1):
+                rows, _ = self.load_page(related_url, page=page)
+                yield from rows
 
-            # Page pages from 2 to last_page (but <= 10)
-            for pag_page in range(2, min(11, last_page + 1)):
-                pag_rows = self.load_table(
-                    related_url, page=pag_page, handle_pagination=False
-                )
-                rows += pag_rows
+    def load_table(self, related_url, handle_pagination=True):
+        """Load all pages and extract table with data.
+
+        Returns:
+            list - array of rows with price day data.
+        """
+        return list(self.iter_table(related_url, handle_pagination))
+
+    def iter_batches(self):
+        """Yield batches of raw rows with `batch_size` length.
+        """
+        batch = []
+        for row in self.iter_table(self.url, self.paginated):
+            batch.append(row)
 
-        return rows[1:] if '\n' not in rows[1] else rows[2:]
+            if len(batch) >= self.batch_size:
+                yield batch
+                batch = []
+
+        if batch:
+            yield batch
 
     def parse_table(self, soup):
         """Convert HTML table to 2-dimensional list.
@@ -85,61 +218,197 @@ class BaseNASDAQParser:
             'id': 'quotes_content_left_lb_LastPage'}
         ).attrs.get('href')
 
-        if last_page_link:
-            return int(last_page_link.strip('page=')[-1])
+        match = re.search(r'page=(\d+)', last_page_link or '')
+        if match:
+            return int(match.group(1))
 
     def clean_value(self, value):
         """Clean HTML table value from NASDAQ page.
         """
         return value.replace('\r\n', '').strip()
 
-    def convert_obj_values(self, obj):
+    def clean_table(self, raw_table):
+        """Clean and convert values of table column by column.
+
+        Rows which are shorter than `fields` (e.g. table headers) are skipped.
+
+        Returns:
+            dict - list of column values by field name.
+        """
+        rows = [row for row in raw_table if len(row) >= len(self.fields)]
+        columns = {}
+
+        for field, column in zip(self.fields, zip(*rows)):
+            column = map(self.clean_value, column)
+
+            converter = self.converters.get(field)
+            if converter is not None:
+                column = map(converter, column)
+
+            columns[field] = list(column)
+
+        return columns
+
+    def convert_columns(self, columns):
         """Base method which used for custom data cleaning.
         """
-        return obj
+        return columns
 
-    def import_data(self):
+    def import_data(self, data):
         """Get instance data of models, create instances in bulk.
 
         On creation, method check by `identify_args` already existed
-        instances in database and pop from instance dict.
+        instances in database and skip them. Existed instances are looked up
+        only by values of first identify arg which are present in `data`.
+        New instances are inserted as one import batch of change feed (see
+        `stocks.changes`).
+
+        Returns:
+            list - created instances.
         """
-        existed_qs = self.model.objects \
-            .filter(company=self.company) \
-            .values_list(*self.identify_args)
+        company = self.company
+        attnames = [
+            self.model._meta.get_field(field).attname for field in self.fields
+        ]
+        key_indexes = [self.fields.index(arg) for arg in self.identify_args]
+        lookup = {
+            f'{self.identify_args[0]}__in':
+                {row[key_indexes[0]] for row in data}
+        }
+
+        with self.timer.stage('dedupe'):
+            if self.reload:
+                existed = self.reloaded_keys
+            else:
+                existed = set(
+                    self.model.objects
+                    .filter(company=company, **lookup)
+                    .values_list(*self.identify_args)
+                )
+
+        with self.timer.stage('insert'):
+            rows = []
+            for row in data:
+                key = tuple([row[index] for index in key_indexes])
+                if key in existed:
+                    continue
+
+                existed.add(key)
+                rows.append(row)
+
+            if not rows:
+                return []
+
+            if self.reload:
+                created = self.model.objects.bulk_create([
+                    self.model(company=company, **dict(zip(attnames, row)))
+                    for row in rows
+                ])
+                self.timer.count('created', len(created))
+                return created
+
+            batch = start_batch(company, self.model, len(rows))
+            instances = [
+                self.model(
+                    company=company, batch=batch, **dict(zip(attnames, row))
+                )
+                for row in rows
+            ]
+
+        with transaction.atomic():
+            with self.timer.stage('insert'):
+                created = self.model.objects.bulk_create(instances)
+                commit_batch(batch)
+                Company.objects.filter(pk=company.pk).update(
+                    imported_at=timezone.now()
+                )
+
+            self.after_import(created)
+
+        self.timer.count('created', len(created))
+        return created
+
+    def after_import(self, created):
+        """Hook for updates which depend on created instances.
 
-        self.model.objects.bulk_create([
-            self.model(company=self.company, **instance_data)
-            for instance_data in self.data
-            if tuple([
-                instance_data[arg] for arg in self.identify_args
-            ]) not in existed_qs
-        ])
+        Called in transaction of import, so instances are rolled back if
+        update fails. Not called by full reload.
+        """
 
     def process_parsing(self):
         """Main function for parsing data.
 
-        Load data from NASDAQ site, clean and validate and save in transaction.
+        Load data from NASDAQ site, clean and validate and save by batches.
         """
-        raw_table = self.load_table(
-            self.url, handle_pagination=self.paginated
-        )
-        # Clean values and convert to list of dicts
-        self.data = [dict(zip(
-            self.fields, [self.clean_value(value) for value in row]
-        )) for row in raw_table]
-
-        if not self.data:
-            self.status = 'Not Found'
+        rows_count = 0
+        unchanged_count = 0
+
+        for chunk, raw_batch in enumerate(self.iter_batches()):
+            with self.timer.stage('clean'):
+                columns = self.clean_table(raw_batch)
+
+            if not columns:
+                continue
+
+            digest = None
+            if not self.reload:
+                with self.timer.stage('fingerprint'):
+                    digest = get_fingerprint(
+                        [columns[field] for field in self.fields]
+                    )
+                    if not self.force and \
+                            self.fingerprints.get(chunk) == digest:
+                        unchanged_count += len(columns[self.fields[0]])
+                        continue
+
+            with self.timer.stage('convert'):
+                columns = self.convert_columns(columns)
+                data = list(zip(*[columns[field] for field in self.fields]))
+
+            rows_count += len(data)
+            self.import_data(data)
+
+            if digest is not None:
+                with self.timer.stage('fingerprint'):
+                    self.save_fingerprint(chunk, digest)
+
+        if unchanged_count:
+            self.timer.count('unchanged', unchanged_count)
+
+        if not rows_count:
+            self.status = 'Unchanged' if unchanged_count else 'Not Found'
             return
 
-        for obj in self.data:
-            obj = self.convert_obj_values(obj)
-
-        self.import_data()
+        self.timer.count('rows', rows_count)
         self.status = 'Parsed'
 
+    @cached_property
+    def fingerprints(self):
+        """Get fingerprints of batches from last import by num of batch.
+        """
+        return dict(
+            ImportFingerprint.objects
+            .filter(
+                company__ticker=self.ticker,
+                model=self.model._meta.model_name,
+            )
+            .values_list('chunk', 'digest')
+        )
+
+    def save_fingerprint(self, chunk, digest):
+        """Save fingerprint of imported batch.
+        """
+        ImportFingerprint.objects.update_or_create(
+            company=self.company, model=self.model._meta.model_name,
+            chunk=chunk, defaults={'digest': digest},
+        )
+        self.fingerprints[chunk] = digest
+
     @property
+    def base_url(self):
+        return settings.NASDAQ_BASE_URL
+
+    @cached_property
     def company(self):
         company, _ = Company.objects.get_or_create(ticker=self.ticker)
         return company
@@ -151,17 +420,64 @@ class BaseNASDAQParser:
         )
 
     @classmethod
-    def as_task(cls, ticker):
+    def as_task(cls, ticker, archive_path=None, replay=False, force=False,
+                reload=False):
         """Get parser class as task.
 
         By call `BaseNASDAQParser.as_task(ticker)` we can initiate and run
         parser which is cose to use in concurrent workers
         such as `ProcessPoolExecutor`.
         """
-        instance = cls(ticker)
+        archive = PageArchive(archive_path) if archive_path else None
+        instance = cls(
+            ticker, archive=archive, replay=replay, force=force, reload=reload
+        )
         instance.process_parsing()
         return instance.status
 
+    @classmethod
+    def as_report_task(cls, ticker, archive_path=None, replay=False,
+                       profile_dir=None, force=False, reload=False):
+        """Get parser class as task which returns report of parsing.
+
+        Errors are logged and reported with `Error` status, so single broken
+        ticker doesn't interrupt the whole run. If `profile_dir` is passed,
+        task is profiled by `cProfile` (see `profiling.worker_profile`).
+        """
+        archive = PageArchive(archive_path) if archive_path else None
+        instance = cls(
+            ticker, archive=archive, replay=replay, force=force, reload=reload
+        )
+        start = time.perf_counter()
+
+        # Reconnect only if previous task broke persistent connection
+        if connection.connection is not None and connection.errors_occurred:
+            if connection.is_usable():
+                connection.errors_occurred = False
+            else:
+                connection.close()
+
+        with worker_profile(profile_dir):
+            try:
+                instance.process_parsing()
+            except Exception:
+                logger.exception(f'{ticker.upper()} - {cls.__name__} failed')
+                instance.status = 'Error'
+
+        return instance.get_report(time.perf_counter() - start)
+
+    def get_report(self, total):
+        """Get dict with status, stage timings and counters of parsing.
+        """
+        return {
+            'ticker': self.ticker,
+            'parser': self.__class__.__name__,
+            'status': self.status,
+            'total': total,
+            'timings': dict(self.timer.timings),
+            'counts': dict(self.timer.counts),
+        }
+
 
 class NASDAQPriceParser(BaseNASDAQParser):
     """Parser class for handling page with historical stock prices.
@@ -174,6 +490,10 @@ class NASDAQPriceParser(BaseNASDAQParser):
         'created_date', 'open_price', 'high_price',
         'low_price', 'close_price', 'volume',
     )
+    converters = {
+        'created_date': parse_date,
+        'volume': parse_int,
+    }
     identify_args = ('created_date', )
     paginated = False
 
@@ -181,12 +501,6 @@ class NASDAQPriceParser(BaseNASDAQParser):
     def url(self):
         return f'{self.ticker}/historical'
 
-    def convert_obj_values(self, obj):
-        obj['volume'] = parse_int(obj['volume'])
-        obj['created_date'] = parse_date(obj['created_date'])
-
-        return obj
-
 
 class NASDAQTradeParser(BaseNASDAQParser):
     """Parser class for handling page with insider trade.
@@ -199,8 +513,14 @@ class NASDAQTradeParser(BaseNASDAQParser):
         'insider', 'relation', 'last_date', 'transaction_type',
         'owner_type', 'traded_shares', 'last_price', 'held_shares',
     )
+    converters = {
+        'last_date': parse_date,
+        'traded_shares': parse_int,
+        'held_shares': parse_int,
+        'last_price': parse_price,
+    }
     identify_args = (
-        'insider', 'relation', 'last_date', 'transaction_type', 
+        'last_date', 'insider', 'relation', 'transaction_type',
         'traded_shares'
     )
 
@@ -208,37 +528,152 @@ class NASDAQTradeParser(BaseNASDAQParser):
     def url(self):
         return f'{self.ticker}/insider-trades'
 
-    def convert_obj_values(self, obj):
-        obj['traded_shares'] = parse_int(obj['traded_shares'])
-        obj['held_shares'] = parse_int(obj['held_shares'])
-        obj['last_date'] = parse_date(obj['last_date'])
-        obj['insider'], _ = Insider.objects.get_or_create(name=obj['insider'])
+    def convert_columns(self, columns):
+        """Replace insider names with `Insider` ids.
 
-        if not obj['last_price']:
-            obj.pop('last_price')
+        Existed insiders are loaded by one query, only new ones are created.
+        """
+        names = columns['insider']
+        insiders = Insider.objects.in_bulk(set(names), field_name='name')
+
+        for name in set(names).difference(insiders):
+            insiders[name], _ = Insider.objects.get_or_create(name=name)
+
+        columns['insider'] = [insiders[name].pk for name in names]
+        return columns
+
+    def after_import(self, created):
+        """Add created trades to insider activity rollups.
+        """
+        with self.timer.stage('rollup'):
+            update_insider_activity(self.company, created)
+
+
+def init_worker():
+    """Initializer of parser worker process.
 
-        return obj
+    Drops DB connections inherited from parent process and opens own
+    connection which is reused by all tasks of worker. Inherited
+    connections are not closed (closing would terminate server sessions
+    of parent), just kept referenced. Also warms up models and parsers.
+    """
+    for conn in connections.all():
+        if conn.connection is not None:
+            _inherited_connections.append(conn.connection)
+            conn.connection = None
+
+    connection.ensure_connection()
+
+    apps.get_models()
+    BeautifulSoup('<div class="genTable"></div>', 'html.parser')
+
+
+def create_executor(max_workers=None):
+    """Create process pool for parsing tasks.
+
+    Parent connections are closed before workers are forked, so pool with
+    N workers holds exactly N DB connections.
+    """
+    connections.close_all()
+    return futures.ProcessPoolExecutor(max_workers, initializer=init_worker)
 
 
-def parse_nasdaq_data(tickers_list, max_workers=None):
+def parse_nasdaq_data(tickers_list, max_workers=None, archive_path=None,
+                      replay=False, profile_dir=None, force=False,
+                      reload=False):
     """
     Main function for grabbing data about stock prices and trades from
     NASDAQ site.
+
+    With `archive_path` all loaded pages are recorded into `PageArchive`.
+    With `replay` flag pages are parsed from archive without network access
+    (all archived tickers are used if `tickers_list` is empty). With
+    `force` flag tables are imported even if they are unchanged since last
+    import.
+
+    With `reload` flag all prices and trades are replaced by parsed ones:
+    tickers are loaded into shadow tables, which are swapped with live
+    tables if all tasks succeeded (see `stocks.reload`), otherwise
+    `ReloadError` is raised and live tables are kept.
+
+    Returns:
+        RunReport - aggregated timings and counters of all tasks.
     """
-    with futures.ProcessPoolExecutor(max_workers) as executor:
+    if replay and not tickers_list:
+        tickers_list = PageArchive(archive_path).tickers()
+
+    task_kwargs = {
+        'archive_path': archive_path, 'replay': replay,
+        'profile_dir': profile_dir, 'force': force, 'reload': reload,
+    }
+    reports = []
+    start = time.perf_counter()
+
+    if reload:
+        # Table of ticker should be loaded into shadow tables only once
+        tickers_list = list(dict.fromkeys(tickers_list))
+        create_shadow_tables()
+
+    try:
+        run_tasks(tickers_list, reports, max_workers, task_kwargs)
+    except BaseException:
+        if reload:
+            drop_shadow_tables()
+        raise
+
+    for report in reports:
+        record_report_metrics(report)
+    metrics.registry.flush()
+
+    if reload:
+        failed = [
+            f'{report["ticker"].upper()} ({report["parser"]})'
+            for report in reports if report['status'] == 'Error'
+        ]
+        if failed:
+            drop_shadow_tables()
+            raise ReloadError(
+                f'Tables are not reloaded, tasks failed: {", ".join(failed)}'
+            )
+
+        logger.info('Swapping reloaded tables...')
+        swap_shadow_tables()
+
+    return RunReport(reports, time.perf_counter() - start)
+
+
+def run_tasks(tickers_list, reports, max_workers, task_kwargs):
+    """Run parsing tasks of prices and trades, add reports of them.
+    """
+    with create_executor(max_workers) as executor:
         price_futures = executor.map(
-            NASDAQPriceParser.as_task, tickers_list
+            partial(NASDAQPriceParser.as_report_task, **task_kwargs),
+            tickers_list
         )
         trade_futures = executor.map(
-            NASDAQTradeParser.as_task, tickers_list
+            partial(NASDAQTradeParser.as_report_task, **task_kwargs),
+            tickers_list
         )
 
         logger.info('Parsing stock prices...')
-        for ticker, status in zip(tickers_list, price_futures):
-            logger.info(f'{ticker.upper()} - {status}')
+        for ticker, report in zip(tickers_list, price_futures):
+            logger.info(f'{ticker.upper()} - {report["status"]}')
+            reports.append(report)
 
         logger.info('Parsing trades...')
-        for ticker, status in zip(tickers_list, trade_futures):
-            logger.info(f'{ticker.upper()} - {status}')
+        for ticker, report in zip(tickers_list, trade_futures):
+            logger.info(f'{ticker.upper()} - {report["status"]}')
+            reports.append(report)
 
         logger.info('------\nDone.')
+
+
+def record_report_metrics(report):
+    """Record ingestion metrics from report of parsing task.
+    """
+    metrics.INGESTION_TASKS.inc(report['parser'], report['status'])
+    metrics.INGESTED_ROWS.inc(
+        report['parser'], value=report['counts'].get('created', 0)
+    )
+    if report['status'] == 'Error':
+        metrics.INGESTION_FAILURES.inc(report['parser'])
@@ -0,0 +1,91 @@
+"""Min price periods: shortest periods with price change of at least N.
+
+Period of days `(i, j)` is kept when `j` is the first day after `i` with
+`|price[j] - price[i]| >= N` and `i` is the last day before `j` with such
+difference (same result as previous SQL query over cartesian join of days,
+but without quadratic number of pairs).
+
+First day with difference is found for all days at once by binary lifting
+over sparse tables of range max/min. Tables depend only on prices, so they
+are built once per price series and reused for any number of thresholds.
+"""
+import numpy as np
+
+__all__ = ('PriceSeries', )
+
+
+class RangeTable:
+    """Sparse table of range max and min of array.
+
+    Level `k` has max/min of `values[i:i + 2 ** k]` for each `i`.
+    """
+    def __init__(self, values):
+        self.size = len(values)
+        self.max_levels = [values]
+        self.min_levels = [values]
+
+        width = 1
+        while width * 2 <= self.size:
+            prev_max, prev_min = self.max_levels[-1], self.min_levels[-1]
+            self.max_levels.append(
+                np.maximum(prev_max[:-width], prev_max[width:])
+            )
+            self.min_levels.append(
+                np.minimum(prev_min[:-width], prev_min[width:])
+            )
+            width *= 2
+
+    def find_first(self, start, upper, lower):
+        """Find first index from `start` with value >= `upper` or value <=
+        `lower` (`size` if there is no such index), for arrays of queries.
+        """
+        pos = start.copy()
+        for level in reversed(range(len(self.max_levels))):
+            width = 1 << level
+            fits = pos + width <= self.size
+            index = np.where(fits, pos, 0)
+            # Skip block if all of its values are strictly between bounds
+            skip = fits & \
+                (self.max_levels[level][index] < upper) & \
+                (self.min_levels[level][index] > lower)
+            pos = np.where(skip, pos + width, pos)
+
+        return pos
+
+
+class PriceSeries:
+    """Price series prepared for min periods queries.
+    """
+    def __init__(self, prices):
+        self.prices = np.asarray(prices)
+        self.size = len(self.prices)
+        self.forward = RangeTable(self.prices)
+        self.backward = RangeTable(self.prices[::-1])
+
+    def find_periods(self, min_diff):
+        """Get indexes of start and end days of min periods.
+
+        Returns:
+            tuple - arrays of start and end indexes, ordered by start.
+        """
+        if self.size < 2:
+            empty = np.empty(0, dtype=np.int64)
+            return empty, empty
+
+        days = np.arange(self.size)
+        reversed_prices = self.prices[::-1]
+
+        # First day after each day with enough difference
+        next_day = self.forward.find_first(
+            days + 1, self.prices + min_diff, self.prices - min_diff
+        )
+        # Last day before each day (search over reversed series)
+        prev_day = self.size - 1 - self.backward.find_first(
+            days + 1, reversed_prices + min_diff, reversed_prices - min_diff
+        )[::-1]
+
+        starts = np.flatnonzero(next_day < self.size)
+        ends = next_day[starts]
+        keep = prev_day[ends] == starts
+
+        return starts[keep], ends[keep]
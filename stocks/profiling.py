@@ -0,0 +1,176 @@
+import cProfile
+import json
+import os
+import time
+from collections import Counter, defaultdict
+from contextlib import contextmanager
+
+__all__ = ('StageTimer', 'RunReport', 'worker_profile')
+
+_worker_profile = None
+
+
+class StageTimer:
+    """Collect wall-clock time and counters of parsing stages.
+    """
+    def __init__(self):
+        self.timings = defaultdict(float)
+        self.counts = defaultdict(int)
+
+    @contextmanager
+    def stage(self, name):
+        """Measure time of code block and add it to `name` stage.
+        """
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.timings[name] += time.perf_counter() - start
+
+    def count(self, name, value=1):
+        self.counts[name] += value
+
+
+@contextmanager
+def worker_profile(profile_dir):
+    """Profile code block with `cProfile` profiler of current process.
+
+    Stats are accumulated across all tasks of worker process and dumped
+    into `<profile_dir>/worker-<pid>.prof` after each block.
+    """
+    global _worker_profile
+
+    if not profile_dir:
+        yield
+        return
+
+    if _worker_profile is None:
+        _worker_profile = cProfile.Profile()
+
+    _worker_profile.enable()
+    try:
+        yield
+    finally:
+        _worker_profile.disable()
+        os.makedirs(profile_dir, exist_ok=True)
+        _worker_profile.dump_stats(
+            os.path.join(profile_dir, f'worker-{os.getpid()}.prof')
+        )
+
+
+def percentile(values, percent):
+    """Get percentile of values by nearest-rank method.
+    """
+    if not values:
+        return 0
+
+    values = sorted(values)
+    index = max(0, int(round(percent / 100 * len(values))) - 1)
+    return values[index]
+
+
+class RunReport:
+    """Aggregated report of parsing run.
+
+    Built from list of task reports (see `BaseNASDAQParser.get_report`)
+    and total wall-clock time of run.
+    """
+    percentiles = (50, 90, 99)
+    slowest_limit = 10
+
+    def __init__(self, reports, elapsed):
+        self.reports = list(reports)
+        self.elapsed = elapsed
+
+    def summary(self):
+        """Get report data as dict, grouped by parser.
+        """
+        by_parser = defaultdict(list)
+        for report in self.reports:
+            by_parser[report['parser']].append(report)
+
+        rows = sum(report['counts'].get('rows', 0) for report in self.reports)
+
+        return {
+            'elapsed': self.elapsed,
+            'tasks': len(self.reports),
+            'rows': rows,
+            'rows_per_sec': rows / self.elapsed if self.elapsed else 0,
+            'parsers': {
+                parser: self.parser_summary(reports)
+                for parser, reports in by_parser.items()
+            },
+        }
+
+    def parser_summary(self, reports):
+        stages = defaultdict(list)
+        counts = Counter()
+
+        for report in reports:
+            counts.update(report['counts'])
+            for stage, value in report['timings'].items():
+                stages[stage].append(value)
+
+        slowest = sorted(reports, key=lambda r: r['total'], reverse=True)
+
+        return {
+            'tasks': len(reports),
+            'statuses': dict(Counter(report['status'] for report in reports)),
+            'counts': dict(counts),
+            'stages': {
+                stage: dict(
+                    total=sum(values),
+                    max=max(values),
+                    **{
+                        f'p{percent}': percentile(values, percent)
+                        for percent in self.percentiles
+                    }
+                )
+                for stage, values in stages.items()
+            },
+            'slowest': [
+                {'ticker': report['ticker'], 'total': report['total']}
+                for report in slowest[:self.slowest_limit]
+            ],
+        }
+
+    def format(self):
+        """Get human-readable report text.
+        """
+        summary = self.summary()
+        lines = [
+            f"Tasks: {summary['tasks']}, rows: {summary['rows']}, "
+            f"time: {summary['elapsed']:.2f}s, "
+            f"rows/sec: {summary['rows_per_sec']:.1f}",
+        ]
+
+        for parser, data in summary['parsers'].items():
+            lines.append(f'\n{parser}: {data["statuses"]}, {data["counts"]}')
+            lines.append(
+                f'  {"stage":<10}{"total":>9}  ' +
+                ''.join(f'{"p" + str(p):>9} ' for p in self.percentiles) +
+                f'{"max":>9}'
+            )
+            for stage, values in data['stages'].items():
+                lines.append(
+                    f'  {stage:<10}{values["total"]:>8.2f}s  ' +
+                    ''.join(
+                        f'{values[f"p{p}"]:>8.3f}s ' for p in self.percentiles
+                    ) +
+                    f'{values["max"]:>8.3f}s'
+                )
+            lines.append('  slowest: ' + ', '.join(
+                f'{item["ticker"].upper()} ({item["total"]:.2f}s)'
+                for item in data['slowest']
+            ))
+
+        return '\n'.join(lines)
+
+    def to_json(self, path):
+        """Write report summary and raw task reports to JSON file.
+        """
+        with open(path, 'w') as report_file:
+            json.dump(
+                dict(self.summary(), reports=self.reports),
+                report_file, indent=2,
+            )
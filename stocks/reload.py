@@ -0,0 +1,295 @@
+"""Full reload of imported tables through shadow tables (PostgreSQL only).
+
+Parsers load rows of all tickers into shadow tables (`<table>_reload`).
+These have the columns and defaults of live tables (ids are taken from the
+same sequences) but no indexes and constraints, so inserts don't maintain
+indexes and readers of live tables don't see partially loaded data.
+
+Then shadow tables are swapped with live ones in one transaction:
+
+1. Constraints and indexes of live tables are built on shadow tables under
+   temporary names, insider rollups are rebuilt from shadow trades.
+2. Rows are published in change feed: one import batch per company and
+   table. `ImportBatch` table is locked against new batches from here
+   until commit, so feed readers can't skip reloaded rows.
+3. Sequences and grants are moved to shadow tables, live tables are
+   dropped, shadow tables and their indexes and constraints are renamed to
+   names of live ones.
+
+Readers of live tables are blocked only by the last step, imports of new
+batches by the last two steps.
+
+All reloaded rows get new ids and batches, so change feed returns all
+rows of reloaded tables again, after rows of earlier batches. Consumers
+of feed should replace data of tickers by rows of reload batches.
+"""
+import re
+from functools import lru_cache
+
+from django.db import connection, models, transaction
+from django.utils import timezone
+
+from .models import (Company, ImportBatch, ImportFingerprint, StockDay,
+                     Trade)
+from .rollups import rebuild_insider_activity
+
+__all__ = (
+    'RELOAD_MODELS', 'ReloadError', 'get_shadow_model',
+    'create_shadow_tables', 'drop_shadow_tables', 'swap_shadow_tables',
+)
+
+RELOAD_MODELS = (StockDay, Trade)
+
+# Order in which constraints are built: unique ones first, so foreign keys
+# and queries of rollups can use their indexes
+CONSTRAINT_TYPES = ('p', 'u', 'c', 'f')
+
+INDEX_DEFINITION = re.compile(r'^(CREATE (?:UNIQUE )?INDEX )\S+ ON \S+ ')
+
+
+class ReloadError(Exception):
+    pass
+
+
+def get_shadow_table(model):
+    return f'{model._meta.db_table}_reload'
+
+
+@lru_cache(maxsize=None)
+def get_shadow_model(model):
+    """Get unmanaged model with fields of model for its shadow table.
+    """
+    attrs = {
+        '__module__': __name__,
+        'Meta': type('Meta', (), {
+            'app_label': model._meta.app_label,
+            'db_table': get_shadow_table(model),
+            'managed': False,
+        }),
+    }
+    for field in model._meta.local_fields:
+        name, _, args, kwargs = field.deconstruct()
+        if field.is_relation:
+            kwargs['related_name'] = '+'
+        attrs[name] = field.__class__(*args, **kwargs)
+
+    return type(f'{model.__name__}Reload', (models.Model, ), attrs)
+
+
+def check_vendor():
+    if connection.vendor != 'postgresql':
+        raise ReloadError('Full reload is supported only by PostgreSQL')
+
+
+def create_shadow_tables(reload_models=RELOAD_MODELS):
+    """Create empty shadow tables without indexes and constraints.
+
+    Shadow tables which are left by failed reload are replaced.
+    """
+    check_vendor()
+    qn = connection.ops.quote_name
+
+    with connection.cursor() as cursor:
+        for model in reload_models:
+            table, shadow = model._meta.db_table, get_shadow_table(model)
+
+            cursor.execute(
+                'SELECT conrelid::regclass::text FROM pg_constraint '
+                'WHERE confrelid = %s::regclass AND conrelid <> confrelid',
+                [table]
+            )
+            referencing = [row[0] for row in cursor.fetchall()]
+            if referencing:
+                raise ReloadError(
+                    f'Table {table} is referenced by {referencing}'
+                )
+
+            cursor.execute(f'DROP TABLE IF EXISTS {qn(shadow)}')
+            cursor.execute(
+                f'CREATE TABLE {qn(shadow)} '
+                f'(LIKE {qn(table)} INCLUDING DEFAULTS)'
+            )
+
+
+def drop_shadow_tables(reload_models=RELOAD_MODELS):
+    qn = connection.ops.quote_name
+
+    with connection.cursor() as cursor:
+        for model in reload_models:
+            cursor.execute(
+                f'DROP TABLE IF EXISTS {qn(get_shadow_table(model))}'
+            )
+
+
+def publish_shadow_rows(cursor, model):
+    """Add rows of shadow table to change feed, by one batch per company.
+
+    Batches are created as committed, `ImportBatch` table should be locked
+    until end of transaction. Shadow table is analyzed after its batch ids
+    are set.
+    """
+    qn = connection.ops.quote_name
+    shadow = qn(get_shadow_table(model))
+    batch_table = qn(ImportBatch._meta.db_table)
+
+    cursor.execute(f'SELECT COALESCE(MAX(id), 0) FROM {batch_table}')
+    last_batch_id = cursor.fetchone()[0]
+
+    cursor.execute(
+        f'INSERT INTO {batch_table} '
+        f'(company_id, model, rows_count, created_at, committed_at) '
+        f'SELECT company_id, %s, COUNT(*), now(), now() FROM {shadow} '
+        f'GROUP BY company_id ORDER BY company_id',
+        [model._meta.model_name]
+    )
+    cursor.execute(
+        f'UPDATE {shadow} AS target SET batch_id = batch.id '
+        f'FROM {batch_table} AS batch '
+        f'WHERE batch.id > %s AND batch.model = %s '
+        f'AND batch.company_id = target.company_id',
+        [last_batch_id, model._meta.model_name]
+    )
+    cursor.execute(f'ANALYZE {shadow}')
+
+
+def build_shadow_indexes(cursor, model):
+    """Build constraints and indexes of live table on shadow table.
+
+    Returns:
+        list - `(kind, temporary name, name)` of built constraints and
+        indexes.
+    """
+    qn = connection.ops.quote_name
+    table, shadow = model._meta.db_table, get_shadow_table(model)
+    built = []
+
+    cursor.execute(
+        'SELECT conname, contype, pg_get_constraintdef(oid) '
+        'FROM pg_constraint '
+        'WHERE conrelid = %s::regclass AND contype = ANY(%s) '
+        'ORDER BY conname',
+        [table, list(CONSTRAINT_TYPES)]
+    )
+    constraints = sorted(
+        cursor.fetchall(), key=lambda row: CONSTRAINT_TYPES.index(row[1])
+    )
+    for name, _, definition in constraints:
+        temp_name = f'{shadow}_c{len(built)}'
+        cursor.execute(
+            f'ALTER TABLE {qn(shadow)} '
+            f'ADD CONSTRAINT {qn(temp_name)} {definition}'
+        )
+        built.append(('constraint', temp_name, name))
+
+    # Indexes which don't belong to constraints
+    cursor.execute(
+        'SELECT class.relname, pg_get_indexdef(class.oid) '
+        'FROM pg_index JOIN pg_class AS class '
+        'ON class.oid = pg_index.indexrelid '
+        'WHERE pg_index.indrelid = %s::regclass AND NOT EXISTS ('
+        '  SELECT 1 FROM pg_constraint '
+        '  WHERE conrelid = pg_index.indrelid '
+        '  AND conindid = pg_index.indexrelid'
+        ') ORDER BY class.relname',
+        [table]
+    )
+    for name, definition in cursor.fetchall():
+        temp_name = f'{shadow}_i{len(built)}'
+        cursor.execute(INDEX_DEFINITION.sub(
+            lambda match: f'{match.group(1)}{qn(temp_name)} '
+                          f'ON {qn(shadow)} ',
+            definition
+        ))
+        built.append(('index', temp_name, name))
+
+    return built
+
+
+def replace_live_table(cursor, model, built):
+    """Replace live table with shadow table which has its indexes.
+    """
+    qn = connection.ops.quote_name
+    table, shadow = model._meta.db_table, get_shadow_table(model)
+
+    cursor.execute(
+        'SELECT grantee, privilege_type '
+        'FROM information_schema.role_table_grants '
+        'WHERE table_schema = current_schema() AND table_name = %s',
+        [table]
+    )
+    for grantee, privilege in cursor.fetchall():
+        grantee = grantee if grantee == 'PUBLIC' else qn(grantee)
+        cursor.execute(f'GRANT {privilege} ON {qn(shadow)} TO {grantee}')
+
+    # Ids of shadow table are taken from sequence of live table, so it
+    # should not be dropped with live table
+    cursor.execute(
+        'SELECT attname, pg_get_serial_sequence(%s, attname) '
+        'FROM pg_attribute '
+        'WHERE attrelid = %s::regclass AND attnum > 0 AND NOT attisdropped',
+        [table, table]
+    )
+    for column, sequence in cursor.fetchall():
+        if sequence:
+            cursor.execute(
+                f'ALTER SEQUENCE {sequence} '
+                f'OWNED BY {qn(shadow)}.{qn(column)}'
+            )
+
+    cursor.execute(f'DROP TABLE {qn(table)}')
+    cursor.execute(f'ALTER TABLE {qn(shadow)} RENAME TO {qn(table)}')
+
+    for kind, temp_name, name in built:
+        if kind == 'constraint':
+            cursor.execute(
+                f'ALTER TABLE {qn(table)} '
+                f'RENAME CONSTRAINT {qn(temp_name)} TO {qn(name)}'
+            )
+        else:
+            cursor.execute(
+                f'ALTER INDEX {qn(temp_name)} RENAME TO {qn(name)}'
+            )
+
+
+def swap_shadow_tables(reload_models=RELOAD_MODELS):
+    """Replace live tables with loaded shadow tables in one transaction.
+
+    Also resets fingerprints of imports, which were calculated by rows of
+    live tables. Time of import of companies is updated (reset for ones
+    without reloaded rows), so their cached analytics are recalculated.
+
+    Indexes and rollups are built before `ImportBatch` table is locked, it
+    is locked only while rows are published and tables are renamed.
+    """
+    check_vendor()
+    qn = connection.ops.quote_name
+
+    with transaction.atomic(), connection.cursor() as cursor:
+        built = {
+            model: build_shadow_indexes(cursor, model)
+            for model in reload_models
+        }
+
+        if Trade in reload_models:
+            rebuild_insider_activity(model=get_shadow_model(Trade))
+
+        # Companies without reloaded rows have no data now
+        not_reloaded = Company.objects.all()
+        for model in reload_models:
+            company_ids = get_shadow_model(model).objects.values('company_id')
+            Company.objects \
+                .filter(pk__in=company_ids) \
+                .update(imported_at=timezone.now())
+            not_reloaded = not_reloaded.exclude(pk__in=company_ids)
+            ImportFingerprint.objects \
+                .filter(model=model._meta.model_name) \
+                .delete()
+        not_reloaded.update(imported_at=None)
+
+        cursor.execute(
+            f'LOCK TABLE {qn(ImportBatch._meta.db_table)} IN EXCLUSIVE MODE'
+        )
+        for model in reload_models:
+            publish_shadow_rows(cursor, model)
+        for model in reload_models:
+            replace_live_table(cursor, model, built[model])
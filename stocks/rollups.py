@@ -0,0 +1,170 @@
+"""Monthly rollups of insider trades (`InsiderActivity` model).
+
+Rollups are updated incrementally by trade parser with trades created by
+import, so aggregates by insider and company are read without scanning
+`Trade` table. Trade is counted as bought or sold shares by its
+transaction type, other types (e.g. gifts) only increase trades count.
+Held shares of month are taken from its latest trade (first one of trades
+at the same date, as NASDAQ table lists newest trades first).
+"""
+from collections import defaultdict
+
+from django.db import transaction
+
+from .models import Company, InsiderActivity, Trade
+
+__all__ = (
+    'get_trade_direction', 'aggregate_trades', 'update_insider_activity',
+    'rebuild_insider_activity', 'verify_insider_activity',
+)
+
+BOUGHT_TYPES = ('buy', 'acquisition', 'option')
+SOLD_TYPES = ('sell', 'sale', 'disposition')
+
+ROLLUP_FIELDS = (
+    'trades_count', 'bought_shares', 'sold_shares', 'net_shares',
+    'held_shares', 'last_date',
+)
+
+
+def get_trade_direction(transaction_type):
+    """Get 1 for trades which increase holding, -1 for decreasing and 0 for
+    others.
+    """
+    value = (transaction_type or '').lower()
+    if any(name in value for name in SOLD_TYPES):
+        return -1
+    if any(name in value for name in BOUGHT_TYPES):
+        return 1
+    return 0
+
+
+def aggregate_trades(trades):
+    """Aggregate trades by insider and month.
+
+    Args:
+        trades - iterable of `Trade` instances (or objects with same attrs).
+
+    Returns:
+        dict - rollup values by `(insider_id, month)`.
+    """
+    rollups = defaultdict(lambda: dict.fromkeys(ROLLUP_FIELDS, 0))
+
+    for trade in trades:
+        month = trade.last_date.replace(day=1)
+        rollup = rollups[(trade.insider_id, month)]
+        direction = get_trade_direction(trade.transaction_type)
+
+        rollup['trades_count'] += 1
+        if direction > 0:
+            rollup['bought_shares'] += trade.traded_shares
+        elif direction < 0:
+            rollup['sold_shares'] += trade.traded_shares
+        rollup['net_shares'] += direction * trade.traded_shares
+
+        if not rollup['last_date'] or trade.last_date > rollup['last_date']:
+            rollup['last_date'] = trade.last_date
+            rollup['held_shares'] = trade.held_shares
+
+    return dict(rollups)
+
+
+def update_insider_activity(company, trades):
+    """Add new trades of company to rollups.
+
+    Only trades which are not counted yet should be passed (e.g. created
+    by import), each affected month is updated by 2 queries.
+    """
+    rollups = aggregate_trades(trades)
+
+    with transaction.atomic():
+        for (insider_id, month), values in sorted(rollups.items()):
+            activity, created = InsiderActivity.objects \
+                .select_for_update() \
+                .get_or_create(
+                    company=company, insider_id=insider_id, month=month,
+                    defaults=values,
+                )
+            if created:
+                continue
+
+            for field in ('trades_count', 'bought_shares', 'sold_shares',
+                          'net_shares'):
+                setattr(
+                    activity, field, getattr(activity, field) + values[field]
+                )
+            if values['last_date'] > activity.last_date:
+                activity.last_date = values['last_date']
+                activity.held_shares = values['held_shares']
+
+            activity.save()
+
+    return len(rollups)
+
+
+def iter_company_trades(company, model=Trade):
+    return model.objects \
+        .filter(company=company) \
+        .order_by('-last_date', 'pk') \
+        .only(
+            'insider_id', 'last_date', 'transaction_type', 'traded_shares',
+            'held_shares',
+        ) \
+        .iterator()
+
+
+def rebuild_insider_activity(companies=None, model=Trade):
+    """Rebuild rollups from scratch by trades of companies (all by default).
+
+    Trades are read by `model` (e.g. shadow model of full reload).
+
+    Returns:
+        int - num of created rollups.
+    """
+    companies = companies if companies is not None else Company.objects.all()
+    created = 0
+
+    for company in companies:
+        with transaction.atomic():
+            InsiderActivity.objects.filter(company=company).delete()
+            rollups = aggregate_trades(iter_company_trades(company, model))
+            InsiderActivity.objects.bulk_create([
+                InsiderActivity(
+                    company=company, insider_id=insider_id, month=month,
+                    **values
+                )
+                for (insider_id, month), values in rollups.items()
+            ])
+        created += len(rollups)
+
+    return created
+
+
+def verify_insider_activity(companies=None):
+    """Compare rollups with aggregates of trades.
+
+    Returns:
+        list - `(ticker, insider_id, month, expected, actual)` tuples of
+        mismatched rollups, missed or extra rollup has `None` values.
+    """
+    companies = companies if companies is not None else Company.objects.all()
+    mismatches = []
+
+    for company in companies:
+        expected = aggregate_trades(iter_company_trades(company))
+        actual = {
+            (row['insider_id'], row['month']): {
+                field: row[field] for field in ROLLUP_FIELDS
+            }
+            for row in InsiderActivity.objects
+            .filter(company=company)
+            .values('insider_id', 'month', *ROLLUP_FIELDS)
+        }
+
+        for key in sorted(set(expected) | set(actual)):
+            if expected.get(key) != actual.get(key):
+                mismatches.append(
+                    (company.ticker, *key, expected.get(key), actual.get(key))
+                )
+
+    return mismatches
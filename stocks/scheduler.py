@@ -0,0 +1,306 @@
+import heapq
+import itertools
+import logging
+import os
+import time as time_module
+from collections import defaultdict
+from concurrent import futures
+from concurrent.futures.process import BrokenProcessPool
+from datetime import datetime, time, timedelta
+
+import pytz
+from django.conf import settings
+from django.utils import timezone
+
+from . import metrics
+from .parsers import (NASDAQPriceParser, NASDAQTradeParser,
+                      create_executor, record_report_metrics)
+
+__all__ = ('TradingCalendar', 'RefreshScheduler', 'run_refresh_daemon')
+
+logger = logging.getLogger(__name__)
+
+PARSERS = {
+    'price': NASDAQPriceParser,
+    'trade': NASDAQTradeParser,
+}
+
+
+class TradingCalendar:
+    """Calendar of regular NASDAQ trading sessions.
+
+    Sessions are 9:30-16:00 New York time on weekdays, exchange holidays
+    are not considered (extra refresh on holiday is harmless).
+    """
+    timezone = pytz.timezone('America/New_York')
+    open_time = time(9, 30)
+    close_time = time(16, 0)
+
+    def session_bound(self, day, bound_time):
+        return self.timezone.localize(datetime.combine(day, bound_time))
+
+    def is_open(self, moment):
+        local = moment.astimezone(self.timezone)
+        return (
+            local.weekday() < 5 and
+            self.open_time <= local.time() < self.close_time
+        )
+
+    def last_close(self, moment):
+        """Get close time of last session which finished before `moment`.
+        """
+        day = moment.astimezone(self.timezone).date()
+        while True:
+            close = self.session_bound(day, self.close_time)
+            if day.weekday() < 5 and close <= moment:
+                return close
+            day -= timedelta(days=1)
+
+    def next_open(self, moment):
+        """Get open time of next session (`moment` if session is open).
+        """
+        if self.is_open(moment):
+            return moment
+
+        day = moment.astimezone(self.timezone).date()
+        while True:
+            session_open = self.session_bound(day, self.open_time)
+            if day.weekday() < 5 and session_open > moment:
+                return session_open
+            day += timedelta(days=1)
+
+
+class RefreshScheduler:
+    """Priority queue of refresh jobs `(ticker, kind)` ordered by due time.
+
+    Due time of job is time of last refresh plus refresh interval of its
+    kind, which is shortened for tickers often requested through the site
+    and API (down to `min_interval`). Prices are not refreshed while
+    market is closed, except one refresh after close of session. Jobs which
+    were never refreshed are due immediately. On equal due time, popular
+    tickers go first.
+    """
+    intervals = {
+        'price': timedelta(hours=1),
+        'trade': timedelta(hours=12),
+    }
+    min_interval = timedelta(minutes=5)
+    close_delay = timedelta(minutes=15)
+    # Interval is divided by `1 + popularity_weight * requests per minute`
+    popularity_weight = 1.0
+    # Weight of last measurement in moving average of requests rate
+    popularity_smoothing = 0.5
+
+    def __init__(self, tickers, calendar=None, now=None):
+        self.calendar = calendar or TradingCalendar()
+        self.last_refresh = {}
+        self.popularity = defaultdict(float)
+        self.queue = []
+        self.counter = itertools.count()
+        self.requests_snapshot = None
+
+        now = now or timezone.now()
+        self.pending = {
+            (ticker, kind): now
+            for ticker in tickers for kind in self.intervals
+        }
+        self.rebuild()
+
+    def get_interval(self, ticker, kind):
+        interval = self.intervals[kind] / (
+            1 + self.popularity_weight * self.popularity[ticker]
+        )
+        return max(interval, self.min_interval)
+
+    def get_due(self, job, now):
+        ticker, kind = job
+        last_refresh = self.last_refresh.get(job)
+        if last_refresh is None:
+            return now
+
+        due = last_refresh + self.get_interval(ticker, kind)
+        if kind != 'price' or self.calendar.is_open(due):
+            return due
+
+        # Market is closed: catch close prices once, then wait for session
+        close = self.calendar.last_close(due)
+        if last_refresh < close + self.close_delay:
+            return max(close + self.close_delay, last_refresh)
+        return self.calendar.next_open(due)
+
+    def push(self, job, due):
+        self.pending[job] = due
+        heapq.heappush(
+            self.queue,
+            (due, -self.popularity[job[0]], next(self.counter), job)
+        )
+
+    def rebuild(self):
+        """Rebuild queue by current due times of pending jobs.
+        """
+        self.queue = [
+            (due, -self.popularity[job[0]], next(self.counter), job)
+            for job, due in self.pending.items()
+        ]
+        heapq.heapify(self.queue)
+
+    def pop_due(self, now, limit):
+        """Pop up to `limit` jobs which are due at `now`.
+        """
+        jobs = []
+        while self.queue and len(jobs) < limit:
+            due, _, _, job = self.queue[0]
+            if self.pending.get(job) != due:
+                # Entry was rescheduled, skip stale one
+                heapq.heappop(self.queue)
+                continue
+            if due > now:
+                break
+
+            heapq.heappop(self.queue)
+            del self.pending[job]
+            jobs.append(job)
+
+        return jobs
+
+    def next_due(self):
+        return min(self.pending.values(), default=None)
+
+    def complete(self, job, now):
+        """Mark job as refreshed at `now` and schedule next refresh.
+        """
+        self.last_refresh[job] = now
+        self.push(job, self.get_due(job, now))
+
+    def update_popularity(self, requests_counts, now):
+        """Update requests rate of tickers and reschedule pending jobs.
+
+        Args:
+            requests_counts - dict with total requests count by ticker.
+            now - time of measurement.
+        """
+        if self.requests_snapshot is not None:
+            prev_counts, prev_time = self.requests_snapshot
+            minutes = (now - prev_time).total_seconds() / 60
+
+            if minutes > 0:
+                tickers = set(self.popularity) | set(requests_counts)
+                for ticker in tickers:
+                    rate = (
+                        requests_counts.get(ticker, 0) -
+                        prev_counts.get(ticker, 0)
+                    ) / minutes
+                    self.popularity[ticker] = (
+                        self.popularity_smoothing * max(rate, 0) +
+                        (1 - self.popularity_smoothing) *
+                        self.popularity[ticker]
+                    )
+
+        self.requests_snapshot = (dict(requests_counts), now)
+
+        for job in self.pending:
+            if job in self.last_refresh:
+                self.pending[job] = self.get_due(job, now)
+        self.rebuild()
+
+
+def get_ticker_requests():
+    """Get total count of requests by ticker from metrics of all processes.
+    """
+    samples = metrics.registry.collect().get(metrics.TICKER_REQUESTS.name, {})
+    return {labels[0]: value for labels, value in samples.items()}
+
+
+def get_job_report(job, future):
+    """Get report of finished refresh job.
+
+    If task failed outside of parser (e.g. worker process died), failure
+    is logged and error report is returned.
+    """
+    try:
+        return future.result()
+    except Exception:
+        ticker, kind = job
+        logger.exception(f'{ticker.upper()} ({kind}) - failed')
+        return {
+            'ticker': ticker,
+            'parser': PARSERS[kind].__name__,
+            'status': 'Error',
+            'counts': {},
+        }
+
+
+def run_refresh_daemon(tickers_list, max_workers=None,
+                       popularity_interval=60, max_sleep=30):
+    """Refresh data of tickers continuously, most stale tickers first.
+
+    Process pool is created once and kept warm between refreshes (it is
+    recreated if worker process dies). Failed jobs are logged and
+    scheduled as refreshed ones. Runs until interrupted.
+
+    Popularity of tickers is taken from metrics of web processes, which
+    are shared only through `METRICS_DIR` directory.
+    """
+    workers_count = max_workers or os.cpu_count() or 1
+    scheduler = RefreshScheduler(tickers_list)
+    running = {}
+    popularity_updated = None
+
+    logger.info(f'Refresh daemon started for {len(tickers_list)} tickers')
+    if not settings.METRICS_DIR:
+        logger.warning(
+            'METRICS_DIR is not set, requests of web processes are not '
+            'visible and tickers are refreshed by staleness only'
+        )
+
+    executor = create_executor(workers_count)
+    try:
+        while True:
+            now = timezone.now()
+
+            if popularity_updated is None or \
+                    time_module.monotonic() - popularity_updated > \
+                    popularity_interval:
+                scheduler.update_popularity(get_ticker_requests(), now)
+                popularity_updated = time_module.monotonic()
+
+            for job in scheduler.pop_due(now, workers_count - len(running)):
+                ticker, kind = job
+                future = executor.submit(PARSERS[kind].as_report_task, ticker)
+                running[future] = job
+
+            next_due = scheduler.next_due()
+            timeout = max_sleep
+            if next_due is not None and len(running) < workers_count:
+                timeout = min(
+                    timeout, max((next_due - now).total_seconds(), 0)
+                )
+
+            if not running:
+                time_module.sleep(timeout)
+                continue
+
+            done, _ = futures.wait(
+                running, timeout=timeout, return_when=futures.FIRST_COMPLETED
+            )
+            broken = False
+            for future in done:
+                job = running.pop(future)
+                report = get_job_report(job, future)
+                broken = broken or \
+                    isinstance(future.exception(), BrokenProcessPool)
+
+                logger.info(
+                    f'{job[0].upper()} ({job[1]}) - {report["status"]}'
+                )
+                record_report_metrics(report)
+                scheduler.complete(job, timezone.now())
+
+            if broken:
+                # Tasks of broken pool fail right away, they are reported
+                # on next iterations
+                logger.warning('Worker process died, restarting pool')
+                executor.shutdown(wait=False)
+                executor = create_executor(workers_count)
+    finally:
+        executor.shutdown()
@@ -0,0 +1,92 @@
+"""Search of companies by ticker and insiders by name.
+
+Prefix matches are found by B-tree indexes over `Company.ticker` and
+`Insider.slug` and go first. Rest of insiders are found by word similarity
+of names (best match of query with part of name, so partial names and
+surnames are found) with trigram GIN index on PostgreSQL (`pg_trgm`),
+other databases fall back to substring search.
+"""
+from django.contrib.postgres.lookups import PostgresSimpleLookup
+from django.db import connections
+from django.db.models import CharField, FloatField, Func, Value
+from django.db.models.functions import Length
+from django.template.defaultfilters import slugify
+
+from .models import Company, Insider
+
+__all__ = ('search_companies', 'search_insiders')
+
+
+@CharField.register_lookup
+class TrigramWordSimilar(PostgresSimpleLookup):
+    """Word similarity of query with field is above
+    `pg_trgm.word_similarity_threshold` (0.6 by default).
+    """
+    lookup_name = 'trigram_word_similar'
+    operator = '%%>'
+
+
+class TrigramWordSimilarity(Func):
+    """Greatest similarity of string with continuous part of expression.
+    """
+    function = 'WORD_SIMILARITY'
+
+    def __init__(self, expression, string, **extra):
+        if not hasattr(string, 'resolve_expression'):
+            string = Value(string)
+        super().__init__(
+            string, expression, output_field=FloatField(), **extra
+        )
+
+
+def search_companies(query, limit):
+    """Get tickers which start with query, shortest (exact) first.
+    """
+    return list(
+        Company.objects
+        .filter(ticker__startswith=query.strip().lower())
+        .order_by(Length('ticker'), 'ticker')
+        .values_list('ticker', flat=True)[:limit]
+    )
+
+
+def search_insiders(query, limit):
+    """Get insiders ranked by match of name with query.
+
+    Returns:
+        list - `(name, slug, score)` tuples, score of prefix match is 1.
+    """
+    prefix = slugify(query)
+    results = []
+    if prefix:
+        results = [
+            (name, slug, 1.0) for name, slug in
+            Insider.objects
+            .filter(slug__startswith=prefix)
+            .order_by('slug', 'name')
+            .values_list('name', 'slug')[:limit]
+        ]
+
+    if len(results) >= limit:
+        return results
+
+    qs = Insider.objects.exclude(slug__startswith=prefix) \
+        if prefix else Insider.objects.all()
+    limit -= len(results)
+
+    if connections[qs.db].vendor == 'postgresql':
+        results += list(
+            qs.filter(name__trigram_word_similar=query)
+            .annotate(score=TrigramWordSimilarity('name', query))
+            .order_by('-score', 'name')
+            .values_list('name', 'slug', 'score')[:limit]
+        )
+    else:
+        results += [
+            (name, slug, 0.0) for name, slug in
+            qs.filter(name__icontains=query)
+            .order_by('name')
+            .values_list('name', 'slug')[:limit]
+        ]
+
+    return results
@@ -0,0 +1,183 @@
+"""Per-ticker columnar snapshots of price history for offline analytics.
+
+Snapshot of ticker is directory `<SNAPSHOTS_DIR>/<ticker>/` with raw
+fixed-width column files (`<field>.bin`: dates as `datetime64[D]`, prices
+as int64 1e-4 units, volume as int64) ordered by date, and small
+`header.json` with num of rows, last date, last import batch of rows and
+time of last import of company.
+
+Export is incremental: only days after last date of snapshot are appended
+to columns. Snapshot is exported from scratch (column files are replaced)
+if days up to last date were changed since export: num of them or their
+last import batch differs from header (e.g. day was backfilled or prices
+were fully reloaded). Header is replaced
+atomically after columns are written, so readers which map `rows` items
+from header always see consistent columns (bytes of interrupted append
+are dropped by next export).
+"""
+import json
+import os
+
+import numpy as np
+from django.conf import settings
+from django.db.models import Count, Max
+
+from .models import StockDay
+
+__all__ = ('Snapshot', 'export_snapshot', 'load_snapshot', 'COLUMNS')
+
+VERSION = 2
+
+COLUMNS = {
+    'created_date': np.dtype('<M8[D]'),
+    'open_price': np.dtype('<i8'),
+    'high_price': np.dtype('<i8'),
+    'low_price': np.dtype('<i8'),
+    'close_price': np.dtype('<i8'),
+    'volume': np.dtype('<i8'),
+}
+
+
+def get_snapshot_dir(ticker, path=None):
+    return os.path.join(path or settings.SNAPSHOTS_DIR, ticker.lower())
+
+
+def read_header(snapshot_dir):
+    try:
+        with open(os.path.join(snapshot_dir, 'header.json')) as header_file:
+            header = json.load(header_file)
+    except FileNotFoundError:
+        return None
+
+    if header.get('version') != VERSION:
+        return None
+    return header
+
+
+def write_header(snapshot_dir, header):
+    header_path = os.path.join(snapshot_dir, 'header.json')
+    with open(f'{header_path}.tmp', 'w') as header_file:
+        json.dump(header, header_file)
+    os.replace(f'{header_path}.tmp', header_path)
+
+
+class Snapshot:
+    """Price history of ticker as read-only memory-mapped columns.
+
+    Columns are NumPy arrays (see `COLUMNS`) available by field name, e.g.
+    `snapshot['close_price']`, data are not copied into memory.
+    """
+    def __init__(self, snapshot_dir, header):
+        self.dir = snapshot_dir
+        self.header = header
+        self.rows = header['rows']
+        self.columns = {}
+
+    def __len__(self):
+        return self.rows
+
+    def __getitem__(self, field):
+        if field not in self.columns:
+            self.columns[field] = self.map_column(field)
+        return self.columns[field]
+
+    def map_column(self, field):
+        dtype = COLUMNS[field]
+        if not self.rows:
+            return np.empty(0, dtype=dtype)
+
+        return np.memmap(
+            os.path.join(self.dir, f'{field}.bin'),
+            dtype=dtype, mode='r', shape=(self.rows, ),
+        )
+
+    def arrays(self, *fields):
+        return {field: self[field] for field in fields}
+
+
+def load_snapshot(ticker, path=None):
+    """Load snapshot of ticker (`None` if it is not exported yet).
+    """
+    snapshot_dir = get_snapshot_dir(ticker, path)
+    header = read_header(snapshot_dir)
+    if header is None:
+        return None
+    return Snapshot(snapshot_dir, header)
+
+
+def is_changed(qs, header):
+    """Check whether days up to last date of snapshot were added, deleted or
+    imported again since export.
+    """
+    exported = qs \
+        .filter(created_date__lte=header['last_date']) \
+        .aggregate(rows=Count('id'), batch_id=Max('batch_id'))
+    return (exported['rows'], exported['batch_id']) != \
+        (header['rows'], header['batch_id'])
+
+
+def export_snapshot(company, path=None, full=False):
+    """Append days which are missed in snapshot of company.
+
+    If company data were not imported since last export, DB is not
+    queried at all. With `full` or if exported days were changed, snapshot
+    is exported from scratch.
+
+    Returns:
+        int - num of exported days.
+    """
+    snapshot_dir = get_snapshot_dir(company.ticker, path)
+    os.makedirs(snapshot_dir, exist_ok=True)
+
+    header = None if full else read_header(snapshot_dir)
+    imported_at = company.imported_at.isoformat() \
+        if company.imported_at else None
+    if header is not None and header['imported_at'] == imported_at:
+        return 0
+
+    qs = StockDay.objects.filter(company=company).order_by('created_date')
+    if header is not None and header['last_date']:
+        if is_changed(qs, header):
+            header = None
+        else:
+            qs = qs.filter(created_date__gt=header['last_date'])
+    arrays = qs.price_arrays(*COLUMNS, 'batch_id')
+
+    rows = header['rows'] if header is not None else 0
+    new_rows = len(arrays['created_date'])
+    batch_ids = [
+        batch_id for batch_id in arrays['batch_id'].tolist()
+        if batch_id is not None
+    ]
+    if header is not None and header['batch_id'] is not None:
+        batch_ids.append(header['batch_id'])
+
+    for field, dtype in COLUMNS.items():
+        column_path = os.path.join(snapshot_dir, f'{field}.bin')
+        data = arrays[field].astype(dtype).tobytes()
+
+        if header is None:
+            # Replace file, so columns mapped by readers stay valid
+            with open(f'{column_path}.tmp', 'wb') as column_file:
+                column_file.write(data)
+            os.replace(f'{column_path}.tmp', column_path)
+            continue
+
+        with open(column_path, 'ab') as column_file:
+            # Drop bytes of interrupted export
+            column_file.truncate(rows * dtype.itemsize)
+            column_file.write(data)
+
+    last_date = str(arrays['created_date'][-1]) if new_rows else \
+        (header['last_date'] if header is not None else None)
+    write_header(snapshot_dir, {
+        'version': VERSION,
+        'ticker': company.ticker,
+        'rows': rows + new_rows,
+        'last_date': last_date,
+        'batch_id': max(batch_ids, default=None),
+        'imported_at': imported_at,
+        'columns': {field: dtype.str for field, dtype in COLUMNS.items()},
+    })
+
+    return new_rows
@@ -0,0 +1,195 @@
+"""Local stub of NASDAQ site for load tests of ingestion.
+
+Serves synthetic `<ticker>/historical` and `<ticker>/insider-trades` pages
+with the same `genTable` and pagination markup as NASDAQ site, so parsers
+can be run against it by `NASDAQ_BASE_URL` setting. Tables are generated
+deterministically by ticker and page, so repeated runs get the same data.
+
+Each response is delayed by `latency` +- `jitter` seconds and fails with
+500 status with `error_rate` probability.
+"""
+import random
+import re
+import threading
+import time
+from datetime import date, timedelta
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlsplit
+
+__all__ = ('StubConfig', 'create_stub_server', 'start_stub_server')
+
+PATH = re.compile(
+    r'^/symbol/(?P<ticker>\w+)/(?P<page>historical|insider-trades)$'
+)
+
+LAST_DATE = date(2018, 11, 30)
+
+TRANSACTION_TYPES = (
+    'Buy', 'Sell', 'Automatic Sell', 'Option Execute', 'Gift',
+)
+
+
+class StubConfig:
+    """Settings of stub server.
+
+    Args:
+        days - num of rows of historical prices table.
+        pages - num of pages of insider trades table.
+        rows - num of rows on page of insider trades table.
+        latency, jitter - delay of response, in seconds.
+        error_rate - probability of 500 response.
+    """
+    def __init__(self, days=250, pages=3, rows=50, latency=0.0, jitter=0.0,
+                 error_rate=0.0, seed=0):
+        self.days = days
+        self.pages = pages
+        self.rows = rows
+        self.latency = latency
+        self.jitter = jitter
+        self.error_rate = error_rate
+        self.seed = seed
+
+
+def format_cell(value):
+    """Format value of table cell with whitespace as on NASDAQ pages.
+
+    Empty values are rendered without whitespace, else first row with
+    empty cell is taken by parsers for empty row after table header.
+    """
+    if not value:
+        return '<td></td>'
+    return f'<td>\r\n                    {value}\r\n                </td>'
+
+
+def render_table(headers, rows, last_page=None):
+    header = ''.join(f'<th>{name}</th>' for name in headers)
+    body = '\n'.join(
+        '<tr>' + ''.join(format_cell(value) for value in row) + '</tr>'
+        for row in rows
+    )
+    html = (
+        f'<html><body><div class="genTable"><table>\n'
+        f'<thead><tr>{header}</tr></thead>\n'
+        f'<tbody>\n{body}\n</tbody></table></div>\n'
+    )
+    if last_page is not None:
+        html += (
+            f'<a id="quotes_content_left_lb_LastPage" '
+            f'href="?page={last_page}">last &gt;&gt;</a>\n'
+        )
+    return html + '</body></html>'
+
+
+def render_prices(config, ticker):
+    """Render historical prices page, newest days first.
+    """
+    rng = random.Random(f'{config.seed}:{ticker}:prices')
+    price = rng.uniform(10, 500)
+    rows = []
+
+    day = LAST_DATE
+    while len(rows) < config.days:
+        if day.weekday() < 5:
+            open_price = price
+            price = max(price * rng.uniform(0.97, 1.03), 0.01)
+            rows.append((
+                f'{day:%m/%d/%Y}', f'{open_price:.2f}',
+                f'{max(open_price, price) * 1.01:.2f}',
+                f'{min(open_price, price) * 0.99:.2f}',
+                f'{price:.2f}', f'{rng.randint(10 ** 4, 10 ** 7):,}',
+            ))
+        day -= timedelta(days=1)
+
+    return render_table(
+        ('Date', 'Open', 'High', 'Low', 'Close / Last', 'Volume'), rows
+    )
+
+
+def render_trades(config, ticker, page):
+    """Render page of insider trades, newest trades first.
+    """
+    rng = random.Random(f'{config.seed}:{ticker}:trades:{page}')
+    start = LAST_DATE - timedelta(days=(page - 1) * config.rows)
+    rows = []
+
+    for num in range(config.rows):
+        rows.append((
+            f'{ticker.upper()} INSIDER {rng.randint(1, 20)}',
+            rng.choice(('Director', 'Officer', 'President')),
+            f'{start - timedelta(days=num):%m/%d/%Y}',
+            rng.choice(TRANSACTION_TYPES),
+            rng.choice(('Direct', 'Indirect')),
+            f'{rng.randint(1, 10 ** 5):,}',
+            f'{rng.uniform(1, 500):.2f}' if rng.random() > 0.1 else '',
+            f'{rng.randint(10 ** 5, 10 ** 7):,}',
+        ))
+
+    return render_table(
+        ('Insider', 'Relation', 'Last Date', 'Transaction', 'Owner Type',
+         'Shares Traded', 'Last Price', 'Shares Held'),
+        rows, last_page=config.pages
+    )
+
+
+class StubHandler(BaseHTTPRequestHandler):
+    """Handler of stub pages, config is taken from server.
+    """
+    def do_GET(self):
+        config = self.server.config
+        delay = config.latency + random.uniform(-config.jitter, config.jitter)
+        if delay > 0:
+            time.sleep(delay)
+
+        url = urlsplit(self.path)
+        match = PATH.match(url.path)
+        if match is None:
+            return self.respond(404, 'Not Found')
+        if random.random() < config.error_rate:
+            return self.respond(500, 'Internal Server Error')
+
+        ticker = match.group('ticker').lower()
+        if match.group('page') == 'historical':
+            return self.respond(200, render_prices(config, ticker))
+
+        try:
+            page = int(parse_qs(url.query).get('page', ['1'])[0])
+        except ValueError:
+            return self.respond(404, 'Not Found')
+        if not 1 <= page <= config.pages:
+            return self.respond(404, 'Not Found')
+
+        return self.respond(200, render_trades(config, ticker, page))
+
+    def respond(self, status, html):
+        content = html.encode()
+        self.send_response(status)
+        self.send_header('Content-Type', 'text/html; charset=utf-8')
+        self.send_header('Content-Length', str(len(content)))
+        self.end_headers()
+        self.wfile.write(content)
+
+    def log_message(self, format, *args):
+        pass
+
+
+def create_stub_server(config, host='127.0.0.1', port=0):
+    """Create stub server (port is chosen by OS by default).
+    """
+    server = ThreadingHTTPServer((host, port), StubHandler)
+    server.daemon_threads = True
+    server.config = config
+    return server
+
+
+def start_stub_server(config, host='127.0.0.1', port=0):
+    """Start stub server in background thread.
+
+    Returns:
+        tuple - server and base URL for `NASDAQ_BASE_URL` setting.
+    """
+    server = create_stub_server(config, host, port)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+
+    host, port = server.server_address[:2]
+    return server, f'http://{host}:{port}/symbol/'
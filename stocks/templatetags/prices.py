@@ -0,0 +1,14 @@
+from django import template
+
+from ..fields import format_price
+
+register = template.Library()
+
+
+@register.filter
+def price(value):
+    """Format price with 4 decimal places (see `fields.format_price`).
+    """
+    if value is None or value == '':
+        return ''
+    return format_price(value)
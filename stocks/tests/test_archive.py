@@ -0,0 +1,41 @@
+import tempfile
+
+from django.test import SimpleTestCase
+
+from ..archive import PageArchive
+
+
+class TestPageArchive(SimpleTestCase):
+    """Tests for `PageArchive` class.
+    """
+    def setUp(self):
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.archive = PageArchive(self.tmp_dir.name)
+
+    def tearDown(self):
+        self.tmp_dir.cleanup()
+
+    def test_write_and_read(self):
+        """Ensure that recorded pages can be read back by url and page.
+        """
+        self.archive.write('abc', 'abc/insider-trades', None, b'first')
+        self.archive.write('abc', 'abc/insider-trades', 2, b'second')
+
+        self.assertEqual(self.archive.read('abc/insider-trades'), b'first')
+        self.assertEqual(self.archive.read('abc/insider-trades', 2), b'second')
+        self.assertEqual(self.archive.tickers(), ['abc'])
+
+    def test_latest_record_wins(self):
+        """Ensure that page recorded later replaces previous one on read.
+        """
+        self.archive.write('abc', 'abc/historical', None, b'old')
+        self.archive.write('abc', 'abc/historical', None, b'new')
+
+        archive = PageArchive(self.tmp_dir.name)
+        self.assertEqual(archive.read('abc/historical'), b'new')
+
+    def test_missing_page(self):
+        """Ensure that reading of not recorded page raises `KeyError`.
+        """
+        with self.assertRaises(KeyError):
+            self.archive.read('abc/historical')
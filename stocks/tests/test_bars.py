@@ -0,0 +1,102 @@
+from datetime import date, timedelta
+from decimal import Decimal
+from unittest.mock import patch
+
+from django.core.cache import cache
+from django.test import SimpleTestCase, TestCase
+
+from ..bars import get_period_starts
+from ..factories import CompanyFactory, StockDayFactory
+from ..models import StockDay
+from ..parsers import NASDAQPriceParser
+
+
+class TestBars(SimpleTestCase):
+    """Tests for aggregation of prices into bars.
+    """
+    def test_get_period_starts(self):
+        dates = [date(2018, 12, 30), date(2018, 12, 31), date(2019, 1, 6)]
+
+        self.assertEqual(
+            get_period_starts(dates, 'week').tolist(),
+            [date(2018, 12, 24), date(2018, 12, 31), date(2018, 12, 31)]
+        )
+        self.assertEqual(
+            get_period_starts(dates, 'month').tolist(),
+            [date(2018, 12, 1), date(2018, 12, 1), date(2019, 1, 1)]
+        )
+        self.assertEqual(
+            get_period_starts(dates, 'quarter').tolist(),
+            [date(2018, 10, 1), date(2018, 10, 1), date(2019, 1, 1)]
+        )
+
+
+class TestStockBarsAPIView(TestCase):
+    """Tests for bars endpoint.
+    """
+    def setUp(self):
+        cache.clear()
+        self.company = CompanyFactory(ticker='abc')
+        # Three days of November and two days of December
+        for num, price in enumerate((10, 12, 11, 13, 9)):
+            StockDayFactory(
+                company=self.company, open_price=Decimal(price),
+                high_price=Decimal(price + 1), low_price=Decimal(price - 1),
+                close_price=Decimal(price), volume=100,
+                created_date=date(2018, 11, 28) + timedelta(days=num),
+            )
+
+    def get_bars(self, **params):
+        response = self.client.get('/api/abc/bars/', params)
+        self.assertEqual(response.status_code, 200)
+        return response.json()['analytics']['bars']
+
+    def test_monthly_bars(self):
+        bars = self.get_bars(interval='month')
+
+        self.assertEqual(bars, [
+            {'date': '2018-11-01', 'open': '10.0000', 'high': '13.0000',
+             'low': '9.0000', 'close': '11.0000', 'volume': 300, 'days': 3},
+            {'date': '2018-12-01', 'open': '13.0000', 'high': '14.0000',
+             'low': '8.0000', 'close': '9.0000', 'volume': 200, 'days': 2},
+        ])
+
+    def test_closed_bars_are_cached(self):
+        """Ensure that only open bar is recalculated.
+        """
+        self.get_bars(interval='month')
+        # Change of closed period is not visible, change of open one is
+        StockDay.objects.filter(created_date=date(2018, 11, 28)).delete()
+        StockDayFactory(
+            company=self.company, open_price=Decimal(20),
+            high_price=Decimal(30), low_price=Decimal(5),
+            close_price=Decimal(25), volume=100,
+            created_date=date(2018, 12, 3),
+        )
+
+        bars = self.get_bars(interval='month')
+
+        self.assertEqual(bars[0]['open'], '10.0000')
+        self.assertEqual(bars[1]['high'], '30.0000')
+        self.assertEqual(bars[1]['close'], '25.0000')
+        self.assertEqual(bars[1]['days'], 3)
+
+    def test_backfilled_day(self):
+        """Ensure that import of day of closed period resets cached bars.
+        """
+        self.get_bars(interval='month')
+        table = [['11/27/2018', '5', '6', '4', '5', '100']]
+        with patch.object(NASDAQPriceParser, 'iter_table', lambda *_: table):
+            NASDAQPriceParser.as_task('abc')
+
+        bars = self.get_bars(interval='month')
+
+        self.assertEqual(bars[0]['open'], '5.0000')
+        self.assertEqual(bars[0]['days'], 4)
+
+    def test_date_range(self):
+        bars = self.get_bars(interval='month', date_from='2018-12-01')
+        self.assertEqual([bar['date'] for bar in bars], ['2018-12-01'])
+
+        bars = self.get_bars(interval='week', date_to='2018-12-01')
+        self.assertEqual([bar['date'] for bar in bars], ['2018-11-26'])
@@ -0,0 +1,96 @@
+from datetime import timedelta
+from unittest.mock import patch
+
+from django.test import TestCase
+from django.utils import timezone
+
+from ..changes import (BatchAbandoned, commit_batch, get_changes,
+                       get_watermark, start_batch)
+from ..factories import CompanyFactory
+from ..models import ImportBatch, StockDay
+from ..parsers import NASDAQPriceParser
+
+
+def load_stocks_table(*args, **kwargs):
+    return [
+        ['11/19/2018', '120.30', '122.1', '132.10', '119.2', '300000'],
+        ['11/18/2018', '120.30', '122.1', '132.10', '119.2', '300000'],
+    ]
+
+
+@patch('stocks.parsers.BaseNASDAQParser.iter_table', load_stocks_table)
+class TestChanges(TestCase):
+    """Tests for change feed of imported rows.
+    """
+    def test_import_creates_batch(self):
+        NASDAQPriceParser.as_task('abc')
+        NASDAQPriceParser.as_task('abc')
+
+        batch = ImportBatch.objects.get()
+        self.assertEqual(batch.model, 'stockday')
+        self.assertEqual(batch.rows_count, 2)
+        self.assertIsNotNone(batch.committed_at)
+        self.assertEqual(StockDay.objects.filter(batch=batch).count(), 2)
+
+    def test_keyset_pagination(self):
+        NASDAQPriceParser.as_task('abc')
+        NASDAQPriceParser.as_task('xyz')
+
+        rows, position = get_changes(limit=3)
+        self.assertEqual(len(rows), 3)
+
+        next_rows, next_position = get_changes(position, limit=3)
+        self.assertEqual(
+            [instance.company.ticker for _, instance in rows + next_rows],
+            ['abc', 'abc', 'xyz', 'xyz']
+        )
+        self.assertEqual(get_changes(next_position), ([], next_position))
+
+    def test_pending_batch_hides_later_batches(self):
+        """Ensure that feed doesn't skip batch committed after later one.
+        """
+        pending = start_batch(CompanyFactory(), StockDay, 1)
+        NASDAQPriceParser.as_task('abc')
+
+        self.assertEqual(get_watermark(), pending.id - 1)
+        self.assertEqual(get_changes()[0], [])
+
+        commit_batch(pending)
+        self.assertEqual(len(get_changes()[0]), 2)
+
+    def test_abandoned_batch(self):
+        pending = start_batch(CompanyFactory(), StockDay, 1)
+        ImportBatch.objects.filter(pk=pending.pk).update(
+            created_at=timezone.now() - timedelta(hours=1)
+        )
+        NASDAQPriceParser.as_task('abc')
+
+        self.assertEqual(len(get_changes()[0]), 2)
+        with self.assertRaises(BatchAbandoned):
+            commit_batch(pending)
+
+    def test_changes_api(self):
+        NASDAQPriceParser.as_task('abc')
+
+        response = self.client.get('/api/_/changes/', {'limit': 1})
+        data = response.json()
+        self.assertEqual(data['changes'][0]['model'], 'stockday')
+        self.assertEqual(data['changes'][0]['ticker'], 'abc')
+        self.assertEqual(data['changes'][0]['data']['close_price'], '119.2000')
+        self.assertEqual(
+            data['changes'][0]['data']['batch'], ImportBatch.objects.get().pk
+        )
+
+        response = self.client.get('/api/_/changes/', {'since': data['next']})
+        self.assertEqual(len(response.json()['changes']), 1)
+
+        response = self.client.get('/api/_/changes/', {'since': 'abc'})
+        self.assertIn('since', response.json()['errors'])
+
+    def test_batch_is_not_exposed(self):
+        """Ensure that API of ticker has no import batches of rows.
+        """
+        NASDAQPriceParser.as_task('abc')
+
+        response = self.client.get('/api/abc/')
+        self.assertNotIn('batch', response.json()[0])
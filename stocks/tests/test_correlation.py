@@ -0,0 +1,128 @@
+from datetime import date, timedelta
+from decimal import Decimal
+from unittest import mock
+
+import numpy as np
+from django.test import SimpleTestCase, TestCase
+
+from ..api.views import CorrelationAPIView
+from ..correlation import (MemoryLimitError, calc_correlation, calc_returns,
+                           get_fixed_memory, load_close_matrix)
+from ..factories import CompanyFactory, StockDayFactory
+
+
+class TestCalcCorrelation(SimpleTestCase):
+    """Tests for pairwise correlation calculation.
+    """
+    def setUp(self):
+        random = np.random.RandomState(42)
+        self.returns = random.normal(0, 0.01, size=(200, 7))
+        # Missing days of some tickers
+        self.returns[:30, 2] = np.nan
+        self.returns[100:120, 5] = np.nan
+
+    def expected(self, i, j):
+        both = ~np.isnan(self.returns[:, i]) & ~np.isnan(self.returns[:, j])
+        x, y = self.returns[both, i], self.returns[both, j]
+        return np.corrcoef(x, y)[0, 1], np.cov(x, y)[0, 1]
+
+    def test_pairwise_complete(self):
+        """Ensure that result matches pairwise calculation for any block size.
+        """
+        # Limit of the smallest block and unlimited one
+        min_limit = get_fixed_memory(200, 7) + 80 + 48 * 200
+        for memory_limit in (min_limit, 10 ** 9):
+            correlation, covariance = calc_correlation(
+                self.returns, memory_limit=memory_limit
+            )
+            for i in range(7):
+                for j in range(7):
+                    corr, cov = self.expected(i, j)
+                    self.assertAlmostEqual(correlation[i, j], corr)
+                    self.assertAlmostEqual(covariance[i, j], cov)
+
+    def test_min_periods(self):
+        correlation, _ = calc_correlation(self.returns, min_periods=190)
+
+        self.assertTrue(np.isnan(correlation[0, 2]))
+        self.assertFalse(np.isnan(correlation[0, 1]))
+
+    def test_memory_limit(self):
+        """Ensure that result matrices are counted in memory limit.
+        """
+        with self.assertRaises(MemoryLimitError):
+            calc_correlation(
+                self.returns, memory_limit=get_fixed_memory(200, 7)
+            )
+
+
+class TestLoadCloseMatrix(TestCase):
+    """Tests for loading of aligned close prices.
+    """
+    @classmethod
+    def setUpTestData(cls):
+        start = date(2018, 12, 3)
+        for ticker, days in (('abc', (0, 1, 2)), ('xyz', (1, 2))):
+            company = CompanyFactory(ticker=ticker)
+            for day in days:
+                StockDayFactory(
+                    company=company, created_date=start + timedelta(day),
+                    close_price=Decimal(10 + day),
+                )
+
+    @mock.patch('stocks.correlation.CHUNK_SIZE', 2)
+    def test_alignment(self):
+        """Ensure that prices are aligned on days with NaN for missing ones.
+        """
+        tickers, dates, prices = load_close_matrix(
+            ['xyz', 'abc', 'nope'], memory_limit=10 ** 6
+        )
+
+        self.assertEqual(tickers, ['xyz', 'abc'])
+        self.assertEqual(len(dates), 3)
+        self.assertTrue(np.isnan(prices[0, 0]))
+        self.assertEqual(prices[2].tolist(), [12, 12])
+        self.assertTrue(np.isnan(calc_returns(prices)[0, 0]))
+
+    def test_memory_limit(self):
+        """Ensure that prices aren't loaded over memory limit, by counts of
+        days and tickers.
+        """
+        with self.assertNumQueries(1), self.assertRaises(MemoryLimitError):
+            load_close_matrix(
+                ['abc', 'xyz'], memory_limit=get_fixed_memory(3, 2)
+            )
+
+        load_close_matrix(
+            ['abc', 'xyz'], memory_limit=get_fixed_memory(3, 2) + 80 + 48 * 3
+        )
+
+
+class TestCorrelationAPI(TestCase):
+    """Tests for correlation endpoint.
+    """
+    @classmethod
+    def setUpTestData(cls):
+        start = date(2018, 12, 3)
+        for ticker in ('abc', 'xyz'):
+            company = CompanyFactory(ticker=ticker)
+            for day in range(5):
+                StockDayFactory(
+                    company=company, created_date=start + timedelta(day),
+                    close_price=Decimal(10 + day),
+                )
+
+    def test_correlation(self):
+        response = self.client.get(
+            '/api/_/correlation/?tickers=abc,xyz&min_periods=2'
+        )
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()['analytics']['days'], 5)
+
+    def test_over_memory_limit(self):
+        with mock.patch.object(CorrelationAPIView, 'memory_limit', 256):
+            response = self.client.get('/api/_/correlation/?tickers=abc,xyz')
+
+        self.assertEqual(response.status_code, 400)
+        self.assertIn('limit', response.json()['errors'][0])
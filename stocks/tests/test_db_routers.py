@@ -0,0 +1,72 @@
+from datetime import datetime
+from unittest import mock
+
+from django.core.cache import cache
+from django.test import SimpleTestCase, override_settings
+
+from ..db_routers import ReplicaRouter, get_read_database, use_database
+from ..models import StockDay
+
+
+class TestReplicaRouter(SimpleTestCase):
+    """Tests for routing of reads to replicas.
+    """
+    router = ReplicaRouter()
+
+    def test_reads_routed_by_context(self):
+        """Ensure that only reads inside of `use_database` go to replica.
+        """
+        self.assertIsNone(self.router.db_for_read(StockDay))
+
+        with use_database('replica1'):
+            self.assertEqual(self.router.db_for_read(StockDay), 'replica1')
+            self.assertEqual(self.router.db_for_write(StockDay), 'default')
+
+        self.assertIsNone(self.router.db_for_read(StockDay))
+
+    def test_migrate_only_primary(self):
+        self.assertTrue(self.router.allow_migrate('default', 'stocks'))
+        self.assertFalse(self.router.allow_migrate('replica1', 'stocks'))
+
+    @override_settings(REPLICA_DATABASES=[])
+    def test_without_replicas(self):
+        self.assertEqual(get_read_database('abc'), 'default')
+
+    @override_settings(REPLICA_DATABASES=['replica1', 'replica2'])
+    def test_replica_selected(self):
+        self.assertIn(get_read_database(), ('replica1', 'replica2'))
+
+
+@override_settings(REPLICA_DATABASES=['replica1'])
+class TestReplicaLag(SimpleTestCase):
+    """Tests for fallback to primary when replica lags behind.
+    """
+    def setUp(self):
+        cache.clear()
+        self.imported_at = {'default': datetime(2018, 12, 3, 10)}
+        patcher = mock.patch(
+            'stocks.db_routers.get_imported_at',
+            side_effect=lambda ticker, using: self.imported_at.get(using)
+        )
+        self.get_imported_at = patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def test_lagging_replica(self):
+        self.imported_at['replica1'] = datetime(2018, 12, 2, 10)
+
+        self.assertEqual(get_read_database('abc'), 'default')
+
+    def test_caught_up_replica(self):
+        self.imported_at['replica1'] = self.imported_at['default']
+
+        self.assertEqual(get_read_database('abc'), 'replica1')
+
+    def test_lag_check_cached(self):
+        """Ensure that databases are queried once for repeated reads.
+        """
+        self.imported_at['replica1'] = self.imported_at['default']
+
+        for _ in range(3):
+            self.assertEqual(get_read_database('abc'), 'replica1')
+
+        self.assertEqual(self.get_imported_at.call_count, 2)
@@ -0,0 +1,182 @@
+from datetime import date, timedelta
+from decimal import Decimal
+
+from importlib import import_module
+
+from django.apps import apps
+from django.db import connection
+from django.test import (SimpleTestCase, TestCase, TransactionTestCase,
+                         override_settings)
+
+from ..factories import CompanyFactory, StockDayFactory
+from ..fields import (PriceUnits, format_price, format_price_units,
+                      from_price_units, is_fixed_point, reset_price_storage,
+                      to_price_units)
+from ..models import StockDay
+
+
+class TestPriceUnits(SimpleTestCase):
+    """Tests for conversion of prices to fixed-point units.
+    """
+    def test_to_price_units(self):
+        self.assertEqual(to_price_units('120.30'), 1203000)
+        self.assertEqual(to_price_units(Decimal('0.00005')), 1)
+        self.assertEqual(to_price_units(10.1), 101000)
+        self.assertEqual(to_price_units(120), 1200000)
+
+    def test_format_price(self):
+        self.assertEqual(format_price(Decimal('4.6')), '4.6000')
+        self.assertEqual(format_price(-4), '-4.0000')
+        self.assertEqual(format_price_units(-46000), '-4.6000')
+        self.assertEqual(from_price_units(-46000), Decimal('-4.6'))
+
+
+class TestFixedPointPriceField(TestCase):
+    """Tests for price fields.
+    """
+    @classmethod
+    def setUpTestData(cls):
+        cls.company = CompanyFactory(ticker='abc')
+        for num, price in enumerate(('10.5', '11.25', '10.0001')):
+            StockDayFactory(
+                company=cls.company, open_price=Decimal(price),
+                close_price=price, high_price=price, low_price=price,
+                created_date=date(2018, 12, 1) + timedelta(days=num),
+            )
+
+    def test_load_and_filter(self):
+        day = StockDay.objects.get(close_price=Decimal('11.25'))
+
+        self.assertEqual(day.close_price, Decimal('11.25'))
+        self.assertEqual(str(day.close_price), '11.2500')
+        self.assertEqual(str(day), '(2018-12-02) abc - 11.2500')
+        self.assertEqual(
+            StockDay.objects.filter(open_price__gt='10.5').count(), 1
+        )
+
+    def test_numbers_are_currency(self):
+        """Ensure that int, Decimal and float prices are the same price
+        on assignment, saving and filtering.
+        """
+        for num, price in enumerate((120, Decimal('120'), 120.0)):
+            day = StockDay.objects.create(
+                company=self.company, created_date=date(2019, 1, 1 + num),
+                open_price=price, volume=1,
+            )
+            self.assertEqual(str(day.open_price), '120.0000')
+            day.refresh_from_db()
+            self.assertEqual(str(day.open_price), '120.0000')
+
+            self.assertEqual(
+                StockDay.objects.filter(open_price=price).count(), num + 1
+            )
+            self.assertEqual(
+                StockDay.objects.filter(open_price__gt=price - 1).count(),
+                num + 1
+            )
+
+    def test_unsaved_instance(self):
+        day = StockDay(open_price=10, close_price=10.25)
+
+        self.assertEqual(str(day.open_price), '10.0000')
+        self.assertEqual(str(day.close_price), '10.2500')
+
+    def test_price_units(self):
+        self.assertEqual(
+            sorted(StockDay.objects.values_list(
+                PriceUnits('close_price'), flat=True
+            )),
+            [100001, 105000, 112500]
+        )
+
+    @override_settings(FIXED_POINT_PRICES=True)
+    def test_storage_by_schema(self):
+        """Ensure that storage is taken from price columns, not setting.
+        """
+        reset_price_storage()
+        self.addCleanup(reset_price_storage)
+
+        self.assertFalse(is_fixed_point(connection))
+        self.assertEqual(
+            StockDay.objects.get(close_price='11.25').close_price,
+            Decimal('11.25')
+        )
+
+    def test_get_prices_diffs(self):
+        """Ensure that vectorized diffs are exact and match row diffs.
+        """
+        dates, diffs = StockDay.objects.get_prices_diffs()
+        first, second = StockDay.objects.order_by('created_date')[:2]
+
+        self.assertEqual(list(dates), [date(2018, 12, 2), date(2018, 12, 3)])
+        self.assertEqual(diffs['close_price'].tolist(), [7500, -12499])
+        self.assertEqual(
+            from_price_units(diffs['open_price'][0]),
+            first.get_prices_diff(second)['open_price']
+        )
+
+    def test_api_representation(self):
+        response = self.client.get('/api/abc/')
+
+        self.assertEqual(
+            sorted(row['close_price'] for row in response.json()),
+            ['10.0001', '10.5000', '11.2500']
+        )
+
+
+class TestFixedPointStorage(TransactionTestCase):
+    """Tests for prices stored as integer units.
+    """
+    migration = import_module('stocks.migrations.0006_fixed_point_prices')
+
+    def setUp(self):
+        self.company = CompanyFactory(ticker='abc')
+        StockDayFactory(
+            company=self.company, created_date=date(2018, 12, 1),
+            open_price='10.5', close_price='999999.9999',
+        )
+        self.convert_columns(to_fixed_point=True)
+        self.addCleanup(self.convert_columns, to_fixed_point=False)
+
+    def convert_columns(self, to_fixed_point):
+        with connection.schema_editor() as schema_editor:
+            self.migration.convert_columns(
+                apps, schema_editor, to_fixed_point
+            )
+
+    def test_converted_prices(self):
+        day = StockDay.objects.get()
+
+        self.assertTrue(is_fixed_point(connection))
+        self.assertEqual(day.open_price, Decimal('10.5'))
+        self.assertEqual(str(day.close_price), '999999.9999')
+        self.assertEqual(
+            StockDay.objects.values_list('close_price', flat=True).get(),
+            Decimal('999999.9999')
+        )
+
+    def test_fixed_point_storage(self):
+        day = StockDay.objects.create(
+            company=self.company, created_date=date(2019, 1, 1),
+            open_price=12, volume=1,
+        )
+        raw = StockDay.objects \
+            .filter(pk=day.pk) \
+            .values_list(PriceUnits('open_price'), flat=True) \
+            .get()
+
+        self.assertEqual(raw, 120000)
+        self.assertEqual(
+            StockDay.objects.get(open_price=12.0).open_price, Decimal('12')
+        )
+        self.assertEqual(StockDay.objects.filter(open_price__gt=10).count(), 2)
+
+    def test_lazy_conversion(self):
+        """Ensure that loaded instances keep integer units until prices are
+        read.
+        """
+        day = StockDay.objects.get()
+
+        self.assertEqual(day.__dict__['open_price'], 105000)
+        self.assertEqual(str(day.open_price), '10.5000')
+        self.assertEqual(day.__dict__['open_price'], Decimal('10.5'))
@@ -0,0 +1,74 @@
+from datetime import date, timedelta
+from decimal import Decimal
+
+import numpy as np
+from django.test import SimpleTestCase, TestCase
+
+from ..factories import CompanyFactory, StockDayFactory
+from ..indicators import calc_indicators
+
+
+class TestIndicators(SimpleTestCase):
+    """Tests for vectorized indicators calculation.
+    """
+    prices = [10.0, 11.0, 10.5, 12.0, 12.5, 12.0, 13.0]
+
+    def test_sma(self):
+        result = calc_indicators(self.prices, [('sma', 3)])['sma:3']
+
+        self.assertTrue(np.isnan(result[:2]).all())
+        for i in range(2, len(self.prices)):
+            self.assertAlmostEqual(
+                result[i], sum(self.prices[i - 2:i + 1]) / 3
+            )
+
+    def test_returns(self):
+        result = calc_indicators(self.prices, [('returns', 2)])['returns:2']
+
+        self.assertTrue(np.isnan(result[:2]).all())
+        self.assertAlmostEqual(result[2], 10.5 / 10 - 1)
+
+    def test_volatility(self):
+        result = calc_indicators(self.prices, [('volatility', 3)])
+
+        daily_returns = np.array(self.prices[1:]) / self.prices[:-1] - 1
+        self.assertAlmostEqual(
+            result['volatility:3'][-1], np.std(daily_returns[-3:], ddof=1)
+        )
+
+    def test_rsi(self):
+        result = calc_indicators(self.prices, [('rsi', 2)])['rsi:2']
+
+        # Last changes are -0.5 and +1.0
+        self.assertAlmostEqual(result[-1], 100 - 100 / (1 + 1.0 / 0.5))
+        # Only gains: 10.5 -> 12 -> 12.5
+        self.assertEqual(result[4], 100)
+
+
+class TestStockIndicatorsAPIView(TestCase):
+    """Tests for indicators endpoint.
+    """
+    @classmethod
+    def setUpTestData(cls):
+        cls.company = CompanyFactory(ticker='abc')
+        for num, price in enumerate(TestIndicators.prices):
+            StockDayFactory(
+                company=cls.company, close_price=Decimal(price),
+                created_date=date(2018, 12, 1) + timedelta(days=num),
+            )
+
+    def test_indicators(self):
+        response = self.client.get(
+            '/api/abc/indicators/', {'indicators': 'sma:3,rsi:2'}
+        )
+        result = response.json()['analytics']
+
+        self.assertEqual(len(result['dates']), 7)
+        self.assertIsNone(result['indicators']['sma:3'][0])
+        self.assertEqual(result['indicators']['sma:3'][2], 10.5)
+
+    def test_unknown_indicator(self):
+        response = self.client.get(
+            '/api/abc/indicators/', {'indicators': 'macd:3'}
+        )
+        self.assertIn('indicators', response.json()['errors'])
@@ -0,0 +1,156 @@
+import glob
+import json
+import os
+import subprocess
+import tempfile
+import time
+
+from django.test import SimpleTestCase, TestCase, override_settings
+
+from ..factories import CompanyFactory
+from ..metrics import (TICKER_REQUESTS, Counter, Histogram, MetricsRegistry,
+                       registry)
+
+
+class TestMetricsRegistry(SimpleTestCase):
+    """Tests for metrics registry and Prometheus exposition.
+    """
+    def setUp(self):
+        self.registry = MetricsRegistry()
+        self.counter = self.registry.register(Counter(
+            'test_events_total', 'Test counter.', ('kind', )
+        ))
+        self.histogram = self.registry.register(Histogram(
+            'test_duration_seconds', 'Test histogram.', buckets=(0.1, 1)
+        ))
+
+    def get_dead_pid(self):
+        process = subprocess.Popen(['true'])
+        process.wait()
+        return process.pid
+
+    def test_exposition(self):
+        """Ensure that samples are rendered in Prometheus text format.
+        """
+        self.counter.inc('a')
+        self.counter.inc('a', value=2)
+        self.histogram.observe(0.05)
+        self.histogram.observe(5)
+
+        text = self.registry.exposition()
+
+        self.assertIn('# TYPE test_events_total counter', text)
+        self.assertIn('test_events_total{kind="a"} 3', text)
+        self.assertIn('test_duration_seconds_bucket{le="0.1"} 1', text)
+        self.assertIn('test_duration_seconds_bucket{le="1"} 1', text)
+        self.assertIn('test_duration_seconds_bucket{le="+Inf"} 2', text)
+        self.assertIn('test_duration_seconds_count 2', text)
+
+    def test_merge_processes(self):
+        """Ensure that samples flushed by other processes are merged.
+        """
+        with tempfile.TemporaryDirectory() as metrics_dir, \
+                override_settings(METRICS_DIR=metrics_dir):
+            other_filename = os.path.join(metrics_dir, '1-other.json')
+            with open(other_filename, 'w') as metrics_file:
+                json.dump({'test_events_total': [[['b'], 5]]}, metrics_file)
+
+            self.counter.inc('b')
+            self.registry.flush()
+
+            self.assertEqual(len(glob.glob(f'{metrics_dir}/*.json')), 2)
+            self.assertIn(
+                'test_events_total{kind="b"} 6', self.registry.exposition()
+            )
+
+    def test_prune_finished_processes(self):
+        """Ensure that files of finished processes are merged into aggregate
+        file once, so counters don't go down.
+        """
+        with tempfile.TemporaryDirectory() as metrics_dir, \
+                override_settings(METRICS_DIR=metrics_dir):
+            for num in range(2):
+                filename = os.path.join(
+                    metrics_dir, f'{self.get_dead_pid()}-dead.json'
+                )
+                with open(filename, 'w') as metrics_file:
+                    json.dump({
+                        'test_events_total': [[['b'], 5]],
+                        'test_duration_seconds': [[[], [1, 0, 0, 0.05]]],
+                    }, metrics_file)
+
+            for _ in range(2):
+                text = self.registry.exposition()
+
+                self.assertEqual(
+                    os.listdir(metrics_dir).count('aggregate.json'), 1
+                )
+                self.assertEqual(len(glob.glob(f'{metrics_dir}/*.json')), 1)
+                self.assertIn('test_events_total{kind="b"} 10', text)
+                self.assertIn('test_duration_seconds_count 2', text)
+
+    def test_background_flush(self):
+        """Ensure that samples are flushed without further updates, so idle
+        process doesn't export stale values.
+        """
+        self.registry.flush_interval = 0.01
+
+        with tempfile.TemporaryDirectory() as metrics_dir, \
+                override_settings(METRICS_DIR=metrics_dir):
+            self.counter.inc('c')
+
+            for _ in range(100):
+                time.sleep(0.01)
+                if not self.registry.changed:
+                    break
+
+            with open(self.registry.filename, 'r') as metrics_file:
+                self.assertEqual(
+                    json.load(metrics_file),
+                    {'test_events_total': [[['c'], 1]]}
+                )
+
+
+class TestMetricsMiddleware(TestCase):
+    """Tests for metrics of requests.
+    """
+    @classmethod
+    def setUpTestData(cls):
+        CompanyFactory(ticker='abc')
+
+    def setUp(self):
+        registry.reset()
+        self.addCleanup(registry.reset)
+
+    def get_count(self, ticker):
+        samples = registry.collect().get(TICKER_REQUESTS.name, {})
+        return samples.get((ticker, ), 0)
+
+    def test_metrics_view(self):
+        """Ensure that requests are recorded and exposed on endpoint.
+        """
+        self.client.get('/metrics/')
+        response = self.client.get('/metrics/')
+
+        self.assertEqual(response.status_code, 200)
+        self.assertIn(
+            'stocks_http_requests_total{view="metrics",status="200"}',
+            response.content.decode()
+        )
+
+    def test_known_ticker(self):
+        self.client.get('/api/ABC/')
+        self.client.get('/api/abc/')
+
+        self.assertEqual(self.get_count('abc'), 2)
+
+    def test_unknown_ticker(self):
+        """Ensure that tickers of missing companies and failed requests
+        are not counted.
+        """
+        self.client.get('/api/unknown/')
+        response = self.client.get('/api/abc/insiders/?month_from=x')
+
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(self.get_count('abc'), 0)
+        self.assertEqual(self.get_count('unknown'), 0)
@@ -1,9 +1,15 @@
-from unittest.mock import patch
+import tempfile
+from datetime import date
+from unittest.mock import Mock, patch
 
-from django.test import TestCase
+from bs4 import BeautifulSoup
+from django.db import connection
+from django.test import SimpleTestCase, TestCase
 
+from ..archive import PageArchive
 from ..models import StockDay, Trade
-from ..parsers import NASDAQPriceParser, NASDAQTradeParser
+from ..parsers import (NASDAQPriceParser, NASDAQTradeParser,
+                       _inherited_connections, init_worker)
 
 
 def load_stocks_table(*args, **kwargs):
@@ -12,6 +18,33 @@ def load_stocks_table(*args, **kwargs):
     return [['11/18/2018', '120.30', '122.1', '132.10', '119.2', '300000']]
 
 
+STOCKS_PAGE = b"""
+<div class="genTable"><table>
+    <tr><th>Date</th><th>Open</th><th>High</th><th>Low</th><th>Close</th>
+        <th>Volume</th></tr>
+    <tr><td>11/18/2018</td><td>120.30</td><td>122.1</td><td>132.10</td>
+        <td>119.2</td><td>300,000</td></tr>
+</table></div>
+"""
+
+
+TRADES_PAGE = """
+<div class="genTable"><table>
+    <tr><th>Insider</th></tr>
+    <tr><td>Walter Sobchak {page}</td><td>Friend</td><td>11/18/2018</td>
+        <td>Sell</td><td>Direct</td><td>1,000</td><td>10.5</td>
+        <td>2,000</td></tr>
+</table></div>
+<a id="quotes_content_left_lb_LastPage" href="?page=3">last</a>
+"""
+
+
+def fetch_trades_page(self, related_url, page=None):
+    """Mock function which returns paginated page with trades.
+    """
+    return TRADES_PAGE.format(page=page or 1).encode()
+
+
 def load_trades_table(*args, **kwargs):
     """Mock function which uses to mock ``NASDAQTradeParser`` parsing.
     """
@@ -22,7 +55,7 @@ def load_trades_table(*args, **kwargs):
 
 
 @patch(
-    'stocks.parsers.BaseNASDAQParser.load_table', load_stocks_table
+    'stocks.parsers.BaseNASDAQParser.iter_table', load_stocks_table
 )
 class TestNASDAQStockParser(TestCase):
     """Class for testing NASDAQ stock parser.
@@ -38,9 +71,34 @@ class TestNASDAQStockParser(TestCase):
             StockDay.objects.filter(company__ticker='abc').exists()
         )
 
+    def test_clean_table(self):
+        """Ensure that table is cleaned by columns and headers are skipped.
+        """
+        parser = NASDAQPriceParser('abc')
+        columns = parser.clean_table(
+            [[]] + load_stocks_table() + [
+                [' 11/19/2018\r\n', '1', '2', '3', '4', '1,000'],
+            ]
+        )
+
+        self.assertEqual(
+            columns['created_date'], [date(2018, 11, 18), date(2018, 11, 19)]
+        )
+        self.assertEqual(columns['volume'], [300000, 1000])
+
+    def test_price_parser_as_report_task(self):
+        """Ensure that parser task can return report with stages timings.
+        """
+        report = NASDAQPriceParser.as_report_task('abc')
+
+        self.assertEqual(report['status'], 'Parsed')
+        self.assertEqual(report['parser'], 'NASDAQPriceParser')
+        self.assertEqual(report['counts'], {'rows': 1, 'created': 1})
+        self.assertIn('insert', report['timings'])
+
 
 @patch(
-    'stocks.parsers.BaseNASDAQParser.load_table', load_trades_table
+    'stocks.parsers.BaseNASDAQParser.iter_table', load_trades_table
 )
 class TestNASDAQTradeParser(TestCase):
     """Class for testing NASDAQ stock parser.
@@ -55,3 +113,179 @@ class TestNASDAQTradeParser(TestCase):
         self.assertTrue(
             Trade.objects.filter(company__ticker='abc').exists()
         )
+
+    def test_trade_parser_batches(self):
+        """Ensure that all batches of rows are imported.
+        """
+        table = load_trades_table() * 2 + [
+            ['Maude Lebowski', 'Daughter', '11/19/2018', 'Buy', 'Direct',
+             '5', '', '5']
+        ]
+        with patch.object(NASDAQTradeParser, 'batch_size', 2), \
+                patch.object(
+                    NASDAQTradeParser, 'iter_table', lambda *args: table):
+            parser = NASDAQTradeParser('abc')
+            parser.process_parsing()
+
+        self.assertEqual(parser.timer.counts['rows'], 3)
+        self.assertEqual(parser.timer.counts['created'], 2)
+        self.assertEqual(
+            Trade.objects.filter(company__ticker='abc').count(), 2
+        )
+
+    def test_trade_parser_skip_existed(self):
+        """Ensure that already imported trades are not duplicated.
+        """
+        NASDAQTradeParser.as_task('abc')
+        NASDAQTradeParser.as_task('abc', force=True)
+
+        self.assertEqual(
+            Trade.objects.filter(company__ticker='abc').count(), 1
+        )
+
+    def test_trade_parser_skip_unchanged(self):
+        """Ensure that unchanged table is skipped before conversion and
+        import.
+        """
+        NASDAQTradeParser.as_task('abc')
+
+        with patch.object(NASDAQTradeParser, 'import_data') as import_data, \
+                patch.object(NASDAQTradeParser, 'convert_columns') as convert:
+            report = NASDAQTradeParser.as_report_task('abc')
+
+        import_data.assert_not_called()
+        convert.assert_not_called()
+        self.assertEqual(report['status'], 'Unchanged')
+        self.assertEqual(report['counts'], {'unchanged': 1})
+
+    def test_trade_parser_fingerprint_cleaned_values(self):
+        """Ensure that fingerprint depends on cleaned values, not raw ones.
+        """
+        NASDAQTradeParser.as_task('abc')
+
+        # Same values after cleaning
+        table = [
+            [f' {value}\r\n' for value in row] for row in load_trades_table()
+        ]
+        with patch.object(
+                NASDAQTradeParser, 'iter_table', lambda *args: table):
+            report = NASDAQTradeParser.as_report_task('abc')
+
+        self.assertEqual(report['status'], 'Unchanged')
+
+        # Fixed converter gives other values of the same raw table
+        converters = dict(
+            NASDAQTradeParser.converters, last_price=lambda value: '1'
+        )
+        with patch.object(NASDAQTradeParser, 'converters', converters):
+            report = NASDAQTradeParser.as_report_task('abc')
+
+        self.assertEqual(report['status'], 'Parsed')
+
+    def test_trade_parser_skip_unchanged_batches(self):
+        """Ensure that only changed batches of table are imported.
+        """
+        table = load_trades_table() + [
+            ['Maude Lebowski', 'Daughter', '11/19/2018', 'Buy', 'Direct',
+             '5', '', '5']
+        ]
+        with patch.object(NASDAQTradeParser, 'batch_size', 1), \
+                patch.object(
+                    NASDAQTradeParser, 'iter_table', lambda *args: table):
+            NASDAQTradeParser.as_task('abc')
+
+            table[1] = table[1][:5] + ['6', '', '6']
+            report = NASDAQTradeParser.as_report_task('abc')
+
+        self.assertEqual(report['status'], 'Parsed')
+        self.assertEqual(
+            report['counts'], {'unchanged': 1, 'rows': 1, 'created': 1}
+        )
+        self.assertEqual(
+            Trade.objects.filter(company__ticker='abc').count(), 3
+        )
+
+
+class TestNASDAQParserArchive(TestCase):
+    """Class for testing record and replay of NASDAQ pages.
+    """
+    def setUp(self):
+        self.tmp_dir = tempfile.TemporaryDirectory()
+
+    def tearDown(self):
+        self.tmp_dir.cleanup()
+
+    def test_record_and_replay(self):
+        """Ensure that recorded pages can be parsed again without network.
+        """
+        response = Mock(content=STOCKS_PAGE)
+        with patch('stocks.parsers.requests.get', return_value=response):
+            status = NASDAQPriceParser.as_task(
+                'abc', archive_path=self.tmp_dir.name
+            )
+        self.assertEqual(status, 'Parsed')
+        self.assertEqual(
+            PageArchive(self.tmp_dir.name).read('abc/historical'), STOCKS_PAGE
+        )
+
+        StockDay.objects.all().delete()
+        with patch('stocks.parsers.requests.get', side_effect=AssertionError):
+            status = NASDAQPriceParser.as_task(
+                'abc', archive_path=self.tmp_dir.name, replay=True,
+                force=True,
+            )
+        self.assertEqual(status, 'Parsed')
+        self.assertTrue(
+            StockDay.objects.filter(company__ticker='abc').exists()
+        )
+
+
+@patch('stocks.parsers.BaseNASDAQParser.fetch_page', fetch_trades_page)
+class TestNASDAQParserPagination(TestCase):
+    """Class for testing loading of paginated tables.
+    """
+    def test_iter_table(self):
+        """Ensure that rows of all pages are yielded without headers.
+        """
+        parser = NASDAQTradeParser('abc')
+        rows = list(parser.iter_table(parser.url))
+
+        self.assertEqual(
+            [row[0] for row in rows],
+            ['Walter Sobchak 1', 'Walter Sobchak 2', 'Walter Sobchak 3']
+        )
+
+    def test_parse_last_page(self):
+        """Ensure that multi-digit number of last page is parsed.
+        """
+        parser = NASDAQTradeParser('abc')
+        soup = BeautifulSoup(
+            '<a id="quotes_content_left_lb_LastPage" href="?page=12">',
+            'html.parser'
+        )
+
+        self.assertEqual(parser.parse_last_page(soup), 12)
+
+
+class TestInitWorker(SimpleTestCase):
+    """Tests for initializer of parser worker process.
+    """
+    allow_database_queries = True
+
+    def test_connection_replaced(self):
+        """Ensure that worker opens own connection and keeps inherited one
+        referenced instead of closing it.
+        """
+        connection.ensure_connection()
+        inherited = connection.connection
+
+        init_worker()
+        self.addCleanup(setattr, connection, 'connection', inherited)
+        self.addCleanup(_inherited_connections.remove, inherited)
+        self.addCleanup(connection.connection.close)
+
+        self.assertIsNotNone(connection.connection)
+        self.assertIsNot(connection.connection, inherited)
+        self.assertIn(inherited, _inherited_connections)
+        # Inherited connection is still open
+        inherited.cursor().execute('SELECT 1')
@@ -0,0 +1,99 @@
+import random
+from datetime import date, timedelta
+from decimal import Decimal
+
+from django.test import SimpleTestCase, TestCase
+
+from ..factories import CompanyFactory, StockDayFactory
+from ..periods import PriceSeries
+
+
+def find_periods_by_pairs(prices, min_diff):
+    """Reference implementation over all pairs of days (as previous SQL).
+    """
+    pairs = [
+        (i, j) for i in range(len(prices)) for j in range(i + 1, len(prices))
+        if abs(prices[j] - prices[i]) >= min_diff
+    ]
+    last_start, first_end = {}, {}
+    for i, j in pairs:
+        last_start[j] = max(last_start.get(j, i), i)
+        first_end[i] = min(first_end.get(i, j), j)
+
+    return sorted(
+        (i, j) for i, j in pairs if last_start[j] == i and first_end[i] == j
+    )
+
+
+class TestPriceSeries(SimpleTestCase):
+    """Tests for min periods search.
+    """
+    def test_find_periods(self):
+        """Ensure that result is same as of search over all pairs.
+        """
+        rnd = random.Random(0)
+        for _ in range(200):
+            prices = [rnd.randint(0, 30) for _ in range(rnd.randint(0, 40))]
+            series = PriceSeries(prices)
+
+            for min_diff in (0, 1, 5, 12):
+                starts, ends = series.find_periods(min_diff)
+                self.assertEqual(
+                    list(zip(starts.tolist(), ends.tolist())),
+                    find_periods_by_pairs(prices, min_diff)
+                )
+
+
+class TestStockPeriodsAnalyticsAPIView(TestCase):
+    """Tests for multi-type and multi-value price periods.
+    """
+    @classmethod
+    def setUpTestData(cls):
+        cls.company = CompanyFactory(ticker='abc')
+        for num, price in enumerate(('110.0', '112.2', '115.7', '109.8')):
+            StockDayFactory(
+                company=cls.company, open_price=Decimal(price),
+                close_price=Decimal(price) + 1,
+                created_date=date(2018, 12, 1) + timedelta(days=num),
+            )
+
+    def test_grouped_periods(self):
+        result = self.company.get_min_price_periods(
+            ['open', 'close'], [Decimal('5'), Decimal('2')]
+        )
+
+        self.assertEqual(
+            sorted(result),
+            [('close', Decimal('2')), ('close', Decimal('5')),
+             ('open', Decimal('2')), ('open', Decimal('5'))]
+        )
+        self.assertEqual(
+            [(period['date1'], period['date2'])
+             for period in result[('open', Decimal('5'))]],
+            [(date(2018, 12, 1), date(2018, 12, 3)),
+             (date(2018, 12, 3), date(2018, 12, 4))]
+        )
+        self.assertEqual(
+            result[('close', Decimal('5'))][1]['diff'], Decimal('-5.9')
+        )
+
+    def test_api(self):
+        response = self.client.get(
+            '/api/abc/delta/', {'type': 'open,close', 'value': '5,2'}
+        )
+        groups = response.json()['analytics']
+
+        self.assertEqual(
+            [(group['type'], group['value']) for group in groups],
+            [('open', 5), ('open', 2), ('close', 5), ('close', 2)]
+        )
+
+        response = self.client.get(
+            '/api/abc/delta/', {'type': 'open', 'value': '5'}
+        )
+        self.assertEqual(len(response.json()['analytics']), 2)
+
+        response = self.client.get(
+            '/api/abc/delta/', {'type': 'open,volume', 'value': '5'}
+        )
+        self.assertIn('type', response.json()['errors'])
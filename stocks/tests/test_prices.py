@@ -0,0 +1,79 @@
+from datetime import date, timedelta
+from decimal import Decimal
+
+from django.test import TestCase
+
+from ..factories import CompanyFactory, StockDayFactory
+
+
+class TestPricesAPIView(TestCase):
+    """Tests for multi-ticker prices endpoint.
+    """
+    def setUp(self):
+        for ticker, base in (('abc', 10), ('xyz', 20)):
+            company = CompanyFactory(ticker=ticker)
+            for num in range(3):
+                StockDayFactory(
+                    company=company, open_price=Decimal(base),
+                    close_price=Decimal(base + num), volume=100 + num,
+                    created_date=date(2018, 11, 28) + timedelta(days=num),
+                )
+        CompanyFactory(ticker='other')
+
+    def get_prices(self, **params):
+        response = self.client.get('/api/_/prices/', params)
+        self.assertEqual(response.status_code, 200)
+        return response.json()
+
+    def test_rows_layout(self):
+        data = self.get_prices(
+            tickers='abc,XYZ', fields='close,volume', date_from='2018-11-29'
+        )
+
+        self.assertEqual(data['fields'], ['date', 'close', 'volume'])
+        self.assertEqual(data['prices'], {
+            'abc': [
+                {'date': '2018-11-29', 'close': '11.0000', 'volume': 101},
+                {'date': '2018-11-30', 'close': '12.0000', 'volume': 102},
+            ],
+            'xyz': [
+                {'date': '2018-11-29', 'close': '21.0000', 'volume': 101},
+                {'date': '2018-11-30', 'close': '22.0000', 'volume': 102},
+            ],
+        })
+
+    def test_columnar_layout(self):
+        data = self.get_prices(
+            tickers='xyz', fields='open', date_to='2018-11-29',
+            layout='columnar',
+        )
+
+        self.assertEqual(data['prices'], {
+            'xyz': {
+                'date': ['2018-11-28', '2018-11-29'],
+                'open': ['20.0000', '20.0000'],
+            },
+        })
+
+    def test_one_query(self):
+        with self.assertNumQueries(1):
+            self.client.get('/api/_/prices/', {'tickers': 'abc,xyz'})
+
+    def test_wrong_params(self):
+        data = self.get_prices(tickers='abc', fields='close,company')
+        self.assertIn('fields', data['errors'])
+
+        data = self.get_prices(tickers=' , ')
+        self.assertIn('tickers', data['errors'])
+
+    def test_tickers_are_not_hidden(self):
+        """Ensure that tickers named as endpoints of several tickers have
+        their own prices.
+        """
+        for ticker in ('search', 'prices'):
+            company = CompanyFactory(ticker=ticker)
+            StockDayFactory(company=company, created_date=date(2018, 11, 28))
+
+            response = self.client.get(f'/api/{ticker}/')
+            self.assertEqual(response.status_code, 200)
+            self.assertEqual(len(response.json()), 1)
@@ -0,0 +1,52 @@
+from django.test import SimpleTestCase
+
+from ..profiling import RunReport, StageTimer
+
+
+class TestRunReport(SimpleTestCase):
+    """Tests for `RunReport` aggregation.
+    """
+    def make_report(self, ticker, total, status='Parsed'):
+        return {
+            'ticker': ticker,
+            'parser': 'NASDAQPriceParser',
+            'status': status,
+            'total': total,
+            'timings': {'fetch': total / 2, 'insert': total / 4},
+            'counts': {'rows': 10},
+        }
+
+    def test_summary(self):
+        """Ensure that tasks reports are aggregated by parser.
+        """
+        report = RunReport([
+            self.make_report('abc', 1.0),
+            self.make_report('def', 3.0),
+            self.make_report('ghi', 2.0, status='Not Found'),
+        ], elapsed=2.0)
+        summary = report.summary()
+        parser_summary = summary['parsers']['NASDAQPriceParser']
+
+        self.assertEqual(summary['rows'], 30)
+        self.assertEqual(summary['rows_per_sec'], 15)
+        self.assertEqual(
+            parser_summary['statuses'], {'Parsed': 2, 'Not Found': 1}
+        )
+        self.assertEqual(parser_summary['stages']['fetch']['total'], 3.0)
+        self.assertEqual(parser_summary['stages']['fetch']['max'], 1.5)
+        self.assertEqual(parser_summary['stages']['fetch']['p50'], 1.0)
+        self.assertEqual(parser_summary['slowest'][0]['ticker'], 'def')
+        self.assertIn('NASDAQPriceParser', report.format())
+
+    def test_stage_timer(self):
+        """Ensure that stage timer accumulates time and counters.
+        """
+        timer = StageTimer()
+        with timer.stage('fetch'):
+            pass
+        with timer.stage('fetch'):
+            pass
+        timer.count('rows', 5)
+
+        self.assertIn('fetch', timer.timings)
+        self.assertEqual(timer.counts['rows'], 5)
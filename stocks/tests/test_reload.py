@@ -0,0 +1,144 @@
+from datetime import date
+from unittest import skipIf, skipUnless
+from unittest.mock import patch
+
+from django.db import IntegrityError, connection, transaction
+from django.test import TestCase
+from django.utils import timezone
+
+from ..changes import get_changes, get_watermark
+from ..models import Company, InsiderActivity, StockDay, Trade
+from ..parsers import NASDAQPriceParser, NASDAQTradeParser
+from ..reload import (ReloadError, create_shadow_tables, get_shadow_model,
+                      swap_shadow_tables)
+from ..rollups import verify_insider_activity
+
+OLD_PRICES = [['11/18/2018', '120.30', '122.1', '132.10', '119.2', '300000']]
+
+NEW_PRICES = [
+    ['11/19/2018', '121.30', '123.1', '133.10', '120.2', '310000'],
+    ['11/20/2018', '122.30', '124.1', '134.10', '121.2', '320000'],
+]
+
+TRADES = [
+    ['Walter Sobchak', 'Friend', '11/18/2018', 'Buy', 'Direct', '1,000',
+     '10.5', '2,000'],
+    ['Walter Sobchak', 'Friend', '11/19/2018', 'Sell', 'Direct', '500',
+     '11.5', '1,500'],
+]
+
+
+def parse(parser_class, table, **kwargs):
+    with patch.object(parser_class, 'iter_table', lambda *args: table):
+        return parser_class.as_task('abc', **kwargs)
+
+
+def get_schema(table):
+    """Get names of indexes and constraints of table.
+    """
+    with connection.cursor() as cursor:
+        cursor.execute(
+            'SELECT indexname FROM pg_indexes WHERE tablename = %s', [table]
+        )
+        indexes = {row[0] for row in cursor.fetchall()}
+        cursor.execute(
+            'SELECT conname FROM pg_constraint '
+            'WHERE conrelid = %s::regclass', [table]
+        )
+        constraints = {row[0] for row in cursor.fetchall()}
+    return indexes, constraints
+
+
+@skipUnless(connection.vendor == 'postgresql', 'PostgreSQL is required')
+class TestFullReload(TestCase):
+    """Tests for full reload of tables through shadow tables.
+    """
+    def setUp(self):
+        parse(NASDAQPriceParser, OLD_PRICES)
+        parse(NASDAQTradeParser, TRADES[:1])
+        # Check deferred constraints of rows created by test, so tables
+        # can be altered in the same transaction
+        with connection.cursor() as cursor:
+            cursor.execute('SET CONSTRAINTS ALL IMMEDIATE')
+            cursor.execute('SET CONSTRAINTS ALL DEFERRED')
+
+    def reload(self):
+        create_shadow_tables()
+        parse(NASDAQPriceParser, NEW_PRICES + NEW_PRICES[:1], reload=True)
+        parse(NASDAQTradeParser, TRADES, reload=True)
+
+    def test_live_tables_are_kept_until_swap(self):
+        self.reload()
+
+        self.assertEqual(
+            list(StockDay.objects.values_list('created_date', flat=True)),
+            [date(2018, 11, 18)]
+        )
+        self.assertEqual(
+            get_shadow_model(StockDay).objects.count(), len(NEW_PRICES)
+        )
+        self.assertEqual(InsiderActivity.objects.get().trades_count, 1)
+
+    def test_swap(self):
+        schemas = {
+            model: get_schema(model._meta.db_table)
+            for model in (StockDay, Trade)
+        }
+        watermark = get_watermark()
+        self.reload()
+
+        swap_shadow_tables()
+
+        self.assertEqual(
+            list(
+                StockDay.objects
+                .order_by('created_date')
+                .values_list('created_date', flat=True)
+            ),
+            [date(2018, 11, 19), date(2018, 11, 20)]
+        )
+        self.assertEqual(Trade.objects.count(), 2)
+        for model, schema in schemas.items():
+            self.assertEqual(get_schema(model._meta.db_table), schema)
+
+        rows, _ = get_changes(since=(watermark + 1, 0))
+        self.assertEqual(len(rows), 4)
+
+        # Sequence of ids and constraints are kept
+        company = Company.objects.get(ticker='abc')
+        day = StockDay.objects.create(
+            company=company, created_date=date(2019, 1, 1), volume=1
+        )
+        self.assertGreater(day.id, max(
+            row[1].id for row in rows if isinstance(row[1], StockDay)
+        ))
+        with self.assertRaises(IntegrityError), transaction.atomic():
+            StockDay.objects.create(
+                company=company, created_date=date(2019, 1, 1), volume=1
+            )
+
+        self.assertEqual(verify_insider_activity(), [])
+        self.assertEqual(InsiderActivity.objects.get().trades_count, 2)
+
+    def test_swap_resets_import_time(self):
+        """Ensure that companies without reloaded rows get empty import
+        time, so their cached analytics are not used.
+        """
+        other = Company.objects.create(
+            ticker='xyz', imported_at=timezone.now()
+        )
+        self.reload()
+
+        swap_shadow_tables()
+
+        other.refresh_from_db()
+        self.assertIsNone(other.imported_at)
+        self.assertIsNotNone(Company.objects.get(ticker='abc').imported_at)
+
+
+@skipIf(connection.vendor == 'postgresql', 'PostgreSQL is supported')
+class TestFullReloadVendor(TestCase):
+
+    def test_postgresql_is_required(self):
+        with self.assertRaises(ReloadError):
+            create_shadow_tables()
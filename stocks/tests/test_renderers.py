@@ -0,0 +1,83 @@
+import gzip
+import json
+
+from django.test import SimpleTestCase, TestCase
+
+from ..api.renderers import to_columnar
+from ..factories import CompanyFactory, InsiderFactory, TradeFactory
+
+
+class TestColumnar(SimpleTestCase):
+    """Tests for conversion of lists to columnar layout.
+    """
+    def test_to_columnar(self):
+        insider = {'id': 5, 'name': 'John'}
+        rows = [
+            {'id': 1, 'insider': insider, 'price': '1.0000'},
+            {'id': 2, 'insider': None, 'price': '2.0000'},
+            {'id': 3, 'insider': dict(insider), 'price': '3.0000'},
+        ]
+
+        self.assertEqual(to_columnar(rows), {
+            'columns': ['id', 'insider', 'price'],
+            'data': {
+                'id': [1, 2, 3],
+                'insider': [5, None, 5],
+                'price': ['1.0000', '2.0000', '3.0000'],
+            },
+            'tables': {'insider': [insider]},
+        })
+
+    def test_empty(self):
+        self.assertEqual(
+            to_columnar([]), {'columns': [], 'data': {}, 'tables': {}}
+        )
+
+
+class TestTradeListColumnar(TestCase):
+    """Tests for columnar format and compression of trades list.
+    """
+    def setUp(self):
+        company = CompanyFactory(ticker='abc')
+        self.insiders = InsiderFactory.create_batch(2)
+        for num in range(20):
+            TradeFactory(company=company, insider=self.insiders[num % 2])
+
+    def test_columnar_format(self):
+        response = self.client.get('/api/abc/insider/', {'format': 'columnar'})
+        data = response.json()
+
+        self.assertEqual(len(data['data']['id']), 20)
+        self.assertEqual(
+            {insider['id'] for insider in data['tables']['insider']},
+            {insider.id for insider in self.insiders}
+        )
+        self.assertEqual(
+            set(data['data']['insider']),
+            {insider.id for insider in self.insiders}
+        )
+
+    def test_default_format(self):
+        response = self.client.get('/api/abc/insider/')
+        self.assertEqual(len(response.json()), 20)
+        self.assertIn('name', response.json()[0]['insider'])
+
+    def test_gzip(self):
+        response = self.client.get(
+            '/api/abc/insider/', HTTP_ACCEPT_ENCODING='gzip'
+        )
+
+        self.assertEqual(response['Content-Encoding'], 'gzip')
+        self.assertEqual(
+            len(json.loads(gzip.decompress(response.content))), 20
+        )
+
+    def test_no_gzip_outside_api(self):
+        """Ensure that pages outside of API are not compressed.
+        """
+        response = self.client.get(
+            '/admin/login/', HTTP_ACCEPT_ENCODING='gzip'
+        )
+
+        self.assertEqual(response.status_code, 200)
+        self.assertFalse(response.has_header('Content-Encoding'))
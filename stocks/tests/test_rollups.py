@@ -0,0 +1,170 @@
+from datetime import date
+from io import StringIO
+from unittest.mock import patch
+
+from django.core.management import CommandError, call_command
+from django.test import TestCase
+from django.urls import resolve
+
+from ..factories import CompanyFactory, InsiderFactory, TradeFactory
+from ..models import ImportBatch, ImportFingerprint, InsiderActivity, Trade
+from ..parsers import NASDAQTradeParser
+from ..rollups import (get_trade_direction, rebuild_insider_activity,
+                       verify_insider_activity)
+
+
+def load_trades_table(*args, **kwargs):
+    """Mock function with trades of two insiders in two months.
+    """
+    return [
+        ['Walter Sobchak', 'Friend', '12/05/2018', 'Buy', 'Direct',
+         '300', '10.5', '1,300'],
+        ['Walter Sobchak', 'Friend', '11/20/2018', 'Automatic Sell',
+         'Direct', '500', '10.5', '1,000'],
+        ['Walter Sobchak', 'Friend', '11/18/2018', 'Buy', 'Direct',
+         '1,000', '10.5', '1,500'],
+        ['Jeffrey Leboski', 'Dude', '11/18/2018', 'Gift', 'Direct',
+         '10', '0', '5,000'],
+    ]
+
+
+class TestTradeDirection(TestCase):
+    """Tests for classification of transaction types.
+    """
+    def test_get_trade_direction(self):
+        self.assertEqual(get_trade_direction('Buy'), 1)
+        self.assertEqual(get_trade_direction('Option Execute'), 1)
+        self.assertEqual(get_trade_direction('Automatic Sell'), -1)
+        self.assertEqual(
+            get_trade_direction('Disposition (Non Open Market)'), -1
+        )
+        self.assertEqual(get_trade_direction('Gift'), 0)
+        self.assertEqual(get_trade_direction(None), 0)
+
+
+@patch('stocks.parsers.BaseNASDAQParser.iter_table', load_trades_table)
+class TestInsiderActivity(TestCase):
+    """Tests for incremental insider activity rollups.
+    """
+    def test_import_updates_rollups(self):
+        """Ensure that parser adds new trades to monthly rollups.
+        """
+        NASDAQTradeParser.as_task('abc')
+
+        activity = InsiderActivity.objects.get(
+            company__ticker='abc', insider__name='Walter Sobchak',
+            month=date(2018, 11, 1),
+        )
+        self.assertEqual(activity.trades_count, 2)
+        self.assertEqual(activity.bought_shares, 1000)
+        self.assertEqual(activity.sold_shares, 500)
+        self.assertEqual(activity.net_shares, 500)
+        self.assertEqual(activity.held_shares, 1000)
+        self.assertEqual(activity.last_date, date(2018, 11, 20))
+        self.assertEqual(InsiderActivity.objects.count(), 3)
+
+    def test_reimport_doesnt_change_rollups(self):
+        """Ensure that existed trades are not counted twice.
+        """
+        NASDAQTradeParser.as_task('abc')
+        NASDAQTradeParser.as_task('abc', force=True)
+
+        self.assertEqual(verify_insider_activity(), [])
+
+    def test_incremental_update(self):
+        """Ensure that rollups of new trades are added to existed ones.
+        """
+        NASDAQTradeParser.as_task('abc')
+        walter = Trade.objects.filter(insider__name='Walter Sobchak')
+        # Drop newest trades, so rollup gets it on next import
+        walter.filter(last_date__gte=date(2018, 11, 20)).delete()
+        rebuild_insider_activity()
+
+        NASDAQTradeParser.as_task('abc', force=True)
+
+        self.assertEqual(verify_insider_activity(), [])
+        self.assertEqual(
+            InsiderActivity.objects.get(
+                insider__name='Walter Sobchak', month=date(2018, 11, 1)
+            ).net_shares,
+            500
+        )
+
+    @patch('stocks.parsers.update_insider_activity')
+    def test_failed_rollup(self, update_insider_activity):
+        """Ensure that trades are rolled back with failed rollup, so they
+        are imported again by next run.
+        """
+        update_insider_activity.side_effect = RuntimeError
+
+        with self.assertRaises(RuntimeError):
+            NASDAQTradeParser.as_task('abc')
+
+        self.assertFalse(Trade.objects.exists())
+        self.assertFalse(
+            ImportBatch.objects.filter(committed_at__isnull=False).exists()
+        )
+        self.assertFalse(ImportFingerprint.objects.exists())
+
+        update_insider_activity.side_effect = None
+        NASDAQTradeParser.as_task('abc')
+        self.assertEqual(Trade.objects.count(), 4)
+
+    def test_company_insiders_api(self):
+        NASDAQTradeParser.as_task('abc')
+
+        response = self.client.get('/api/abc/insiders/')
+
+        self.assertEqual(response.status_code, 200)
+        data = response.json()
+        self.assertEqual(
+            [row['insider'] for row in data],
+            ['Jeffrey Leboski', 'Walter Sobchak']
+        )
+        self.assertEqual(data[1]['net_shares'], 800)
+        self.assertEqual(data[1]['held_shares'], 1300)
+        self.assertEqual(data[1]['trades_count'], 3)
+
+        response = self.client.get(
+            '/api/abc/insiders/', {'month_from': '2018-11-01',
+                                   'month_to': '2018-11-30'}
+        )
+        self.assertEqual(response.json()[1]['held_shares'], 1000)
+
+    def test_insider_activity_api(self):
+        NASDAQTradeParser.as_task('abc')
+
+        response = self.client.get('/api/_/insiders/walter-sobchak/')
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(
+            [(row['ticker'], row['month']) for row in response.json()],
+            [('abc', '2018-12-01'), ('abc', '2018-11-01')]
+        )
+        # Trades of ticker with the same name are not hidden
+        self.assertEqual(
+            resolve('/api/insiders/insider/').url_name, 'trades-list'
+        )
+
+
+class TestRebuildRollupsCommand(TestCase):
+    """Tests for rebuild and verification of rollups.
+    """
+    def test_rebuild_and_verify(self):
+        company = CompanyFactory(ticker='abc')
+        insider = InsiderFactory()
+        for day in (1, 15):
+            TradeFactory(
+                company=company, insider=insider, transaction_type='Sell',
+                last_date=date(2018, 10, day),
+            )
+
+        with self.assertRaises(CommandError):
+            call_command('rebuild_rollups', verify=True, stdout=StringIO())
+
+        call_command('rebuild_rollups', stdout=StringIO())
+        call_command('rebuild_rollups', verify=True, stdout=StringIO())
+
+        activity = InsiderActivity.objects.get()
+        self.assertEqual(activity.trades_count, 2)
+        self.assertEqual(activity.sold_shares, -activity.net_shares)
@@ -0,0 +1,139 @@
+from concurrent import futures
+from concurrent.futures.process import BrokenProcessPool
+from datetime import datetime, timedelta
+
+import pytz
+from django.core.management import CommandError, call_command
+from django.test import SimpleTestCase
+
+from ..scheduler import (RefreshScheduler, TradingCalendar,
+                         get_job_report)
+
+NEW_YORK = pytz.timezone('America/New_York')
+
+
+def ny_time(*args):
+    return NEW_YORK.localize(datetime(*args))
+
+
+class TestTradingCalendar(SimpleTestCase):
+    """Tests for `TradingCalendar` sessions.
+    """
+    calendar = TradingCalendar()
+
+    def test_is_open(self):
+        self.assertTrue(self.calendar.is_open(ny_time(2018, 12, 3, 10)))
+        self.assertFalse(self.calendar.is_open(ny_time(2018, 12, 3, 17)))
+        # Saturday
+        self.assertFalse(self.calendar.is_open(ny_time(2018, 12, 1, 10)))
+
+    def test_session_bounds(self):
+        """Ensure that weekends are skipped when looking for sessions.
+        """
+        saturday = ny_time(2018, 12, 1, 12)
+
+        self.assertEqual(
+            self.calendar.last_close(saturday), ny_time(2018, 11, 30, 16)
+        )
+        self.assertEqual(
+            self.calendar.next_open(saturday), ny_time(2018, 12, 3, 9, 30)
+        )
+
+
+class TestRefreshScheduler(SimpleTestCase):
+    """Tests for `RefreshScheduler` priorities.
+    """
+    def setUp(self):
+        self.now = ny_time(2018, 12, 3, 10)
+        self.scheduler = RefreshScheduler(['abc', 'xyz'], now=self.now)
+
+    def test_new_jobs_are_due(self):
+        """Ensure that never refreshed jobs are due immediately.
+        """
+        jobs = self.scheduler.pop_due(self.now, limit=10)
+
+        self.assertEqual(len(jobs), 4)
+        self.assertEqual(self.scheduler.pop_due(self.now, limit=10), [])
+
+    def test_popular_ticker_refreshed_more_often(self):
+        """Ensure that often requested tickers get shorter interval.
+        """
+        for job in self.scheduler.pop_due(self.now, limit=10):
+            self.scheduler.complete(job, self.now)
+
+        self.scheduler.update_popularity({'xyz': 0}, self.now)
+        self.scheduler.update_popularity(
+            {'xyz': 100}, self.now + timedelta(minutes=1)
+        )
+
+        later = self.now + timedelta(minutes=30)
+        self.assertEqual(
+            self.scheduler.pop_due(later, limit=10),
+            [('xyz', 'price'), ('xyz', 'trade')]
+        )
+
+    def test_prices_not_refreshed_when_market_closed(self):
+        """Ensure that prices are refreshed once after close of session.
+        """
+        job = ('abc', 'price')
+        self.scheduler.pop_due(self.now, limit=10)
+
+        self.scheduler.complete(job, ny_time(2018, 12, 3, 15, 30))
+        self.assertEqual(
+            self.scheduler.pending[job], ny_time(2018, 12, 3, 16, 15)
+        )
+
+        self.scheduler.pop_due(ny_time(2018, 12, 3, 16, 15), limit=10)
+        self.scheduler.complete(job, ny_time(2018, 12, 3, 16, 15))
+        self.assertEqual(
+            self.scheduler.pending[job], ny_time(2018, 12, 4, 9, 30)
+        )
+
+
+class TestJobReport(SimpleTestCase):
+    """Tests for reports of finished refresh jobs.
+    """
+    def test_failed_task(self):
+        """Ensure that failed task gives error report instead of raising.
+        """
+        future = futures.Future()
+        future.set_exception(BrokenProcessPool('worker died'))
+
+        with self.assertLogs('stocks.scheduler', 'ERROR'):
+            report = get_job_report(('abc', 'price'), future)
+
+        self.assertEqual(report['ticker'], 'abc')
+        self.assertEqual(report['status'], 'Error')
+        self.assertEqual(report['counts'], {})
+
+    def test_finished_task(self):
+        future = futures.Future()
+        future.set_result({'ticker': 'abc', 'status': 'Success'})
+
+        report = get_job_report(('abc', 'price'), future)
+
+        self.assertEqual(report['status'], 'Success')
+
+
+class TestParseStocksCommand(SimpleTestCase):
+    """Tests for options of daemon and queue modes of `parse_stocks`.
+    """
+    def test_parsing_options_are_rejected(self):
+        """Ensure that options which daemon and worker don't use are not
+        ignored silently.
+        """
+        for mode, option in (
+            ('daemon', {'force': True}),
+            ('daemon', {'profile': 'profiles'}),
+            ('worker', {'record': 'archive'}),
+            ('worker', {'full_reload': True}),
+            ('enqueue', {'report': 'report.json'}),
+        ):
+            with self.subTest(mode=mode, option=option):
+                with self.assertRaisesMessage(
+                    CommandError, f'can not be used in {mode} mode'
+                ):
+                    call_command(
+                        'parse_stocks', 'tickers.txt', **{mode: True},
+                        **option
+                    )
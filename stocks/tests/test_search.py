@@ -0,0 +1,75 @@
+from unittest import skipUnless
+
+from django.db import connection
+from django.test import TestCase
+
+from ..factories import CompanyFactory, InsiderFactory
+from ..search import search_companies, search_insiders
+
+
+class TestSearch(TestCase):
+    """Tests for search of tickers and insiders.
+    """
+    @classmethod
+    def setUpTestData(cls):
+        for ticker in ('aa', 'aapl', 'aal', 'msft'):
+            CompanyFactory(ticker=ticker)
+        for name in ('Walter Sobchak', 'Walter White', 'Donny Kerabatsos',
+                     'Maude Walters'):
+            InsiderFactory(name=name)
+
+    def test_search_companies(self):
+        """Ensure that tickers are found by prefix, exact match first.
+        """
+        self.assertEqual(search_companies('AA', 10), ['aa', 'aal', 'aapl'])
+        self.assertEqual(search_companies('aa', 2), ['aa', 'aal'])
+
+    def test_search_insiders(self):
+        """Ensure that prefix matches go before other matches.
+        """
+        results = search_insiders('walter', 10)
+
+        self.assertEqual(
+            [name for name, _, _ in results],
+            ['Walter Sobchak', 'Walter White', 'Maude Walters']
+        )
+        self.assertEqual(results[0], ('Walter Sobchak', 'walter-sobchak', 1))
+        self.assertEqual(len(search_insiders('walter', 1)), 1)
+
+    @skipUnless(connection.vendor == 'postgresql', 'Requires pg_trgm')
+    def test_search_partial_names(self):
+        """Ensure that insiders are found by part of surname and ranked
+        by word similarity.
+        """
+        cases = (
+            ('sob', [('Walter Sobchak', 0.75)]),
+            ('kerab', [('Donny Kerabatsos', 0.8333)]),
+            ('walters', [('Maude Walters', 1), ('Walter Sobchak', 0.75),
+                         ('Walter White', 0.75)]),
+        )
+        for query, expected in cases:
+            results = search_insiders(query, 10)
+
+            self.assertEqual(
+                [name for name, _, _ in results],
+                [name for name, _ in expected]
+            )
+            for (_, _, score), (_, expected_score) in zip(results, expected):
+                self.assertAlmostEqual(score, expected_score, places=4)
+
+    @skipUnless(connection.vendor == 'postgresql', 'Requires pg_trgm')
+    def test_search_api(self):
+        response = self.client.get('/api/_/search/', {'q': 'sob'})
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()['companies'], [])
+        self.assertEqual(
+            response.json()['insiders'],
+            [{'name': 'Walter Sobchak', 'slug': 'walter-sobchak',
+              'score': 0.75}]
+        )
+
+    def test_search_api_errors(self):
+        response = self.client.get('/api/_/search/')
+
+        self.assertIn('q', response.json()['errors'])
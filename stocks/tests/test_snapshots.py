@@ -0,0 +1,118 @@
+import os
+import tempfile
+from datetime import date, timedelta
+from decimal import Decimal
+from io import StringIO
+
+import numpy as np
+from django.core.management import call_command
+from django.test import TestCase
+from django.utils import timezone
+
+from ..factories import CompanyFactory, StockDayFactory
+from ..models import ImportBatch, StockDay
+from ..snapshots import export_snapshot, load_snapshot
+
+
+class TestSnapshots(TestCase):
+    """Tests for export and loading of columnar price snapshots.
+    """
+    def setUp(self):
+        self.dir = tempfile.TemporaryDirectory()
+        self.path = self.dir.name
+        self.company = CompanyFactory(ticker='abc')
+        self.add_days(0, 3)
+
+    def tearDown(self):
+        self.dir.cleanup()
+
+    def add_days(self, start, end):
+        for num in range(start, end):
+            StockDayFactory(
+                company=self.company, close_price=Decimal(10 + num),
+                volume=100 + num,
+                created_date=date(2018, 12, 1) + timedelta(days=num),
+            )
+        self.company.imported_at = timezone.now()
+        self.company.save()
+
+    def test_export_and_load(self):
+        self.assertIsNone(load_snapshot('abc', self.path))
+        self.assertEqual(export_snapshot(self.company, self.path), 3)
+
+        snapshot = load_snapshot('abc', self.path)
+
+        self.assertEqual(len(snapshot), 3)
+        self.assertIsInstance(snapshot['close_price'], np.memmap)
+        self.assertEqual(
+            snapshot['close_price'].tolist(), [100000, 110000, 120000]
+        )
+        self.assertEqual(snapshot['volume'].tolist(), [100, 101, 102])
+        self.assertEqual(
+            snapshot['created_date'][-1], np.datetime64('2018-12-03')
+        )
+
+    def test_incremental_export(self):
+        """Ensure that only new days are appended and unchanged company
+        is skipped.
+        """
+        export_snapshot(self.company, self.path)
+        self.assertEqual(export_snapshot(self.company, self.path), 0)
+
+        self.add_days(3, 5)
+        # Bytes of interrupted export are dropped
+        with open(os.path.join(self.path, 'abc', 'volume.bin'), 'ab') as f:
+            f.write(b'garbage')
+
+        self.assertEqual(export_snapshot(self.company, self.path), 2)
+        snapshot = load_snapshot('abc', self.path)
+        self.assertEqual(snapshot['volume'].tolist(), list(range(100, 105)))
+        self.assertEqual(
+            snapshot['created_date'].tolist(),
+            [date(2018, 12, 1) + timedelta(days=num) for num in range(5)]
+        )
+
+    def test_backfilled_day(self):
+        """Ensure that snapshot is exported from scratch if day before last
+        date was added.
+        """
+        export_snapshot(self.company, self.path)
+        self.add_days(-1, 0)
+
+        self.assertEqual(export_snapshot(self.company, self.path), 4)
+        snapshot = load_snapshot('abc', self.path)
+        self.assertEqual(
+            snapshot['created_date'][0], np.datetime64('2018-11-30')
+        )
+        self.assertEqual(snapshot['volume'].tolist(), [99, 100, 101, 102])
+
+    def test_reimported_day(self):
+        """Ensure that snapshot is exported from scratch if exported day was
+        imported again (e.g. by full reload).
+        """
+        export_snapshot(self.company, self.path)
+        batch = ImportBatch.objects.create(
+            company=self.company, model='stockday'
+        )
+        StockDay.objects \
+            .filter(created_date=date(2018, 12, 1)) \
+            .update(close_price=Decimal(5), batch=batch)
+        self.add_days(3, 4)
+
+        self.assertEqual(export_snapshot(self.company, self.path), 4)
+        snapshot = load_snapshot('abc', self.path)
+        self.assertEqual(snapshot['close_price'][0], 50000)
+
+    def test_analytics_from_snapshot(self):
+        """Ensure that analytics from snapshot and from DB are equal.
+        """
+        call_command('export_snapshots', path=self.path, stdout=StringIO())
+        snapshot = load_snapshot('abc', self.path)
+
+        db_dates, db_diffs = self.company.get_prices_diffs()
+        dates, diffs = self.company.get_prices_diffs(snapshot=snapshot)
+
+        self.assertEqual(dates.tolist(), db_dates.tolist())
+        self.assertEqual(
+            diffs['close_price'].tolist(), db_diffs['close_price'].tolist()
+        )
@@ -0,0 +1,38 @@
+from django.test import TestCase, override_settings
+
+from ..models import StockDay, Trade
+from ..parsers import NASDAQPriceParser, NASDAQTradeParser
+from ..stub_server import StubConfig, start_stub_server
+
+
+class TestStubServer(TestCase):
+    """Tests for parsing of pages of local NASDAQ stub.
+    """
+    def start_server(self, **kwargs):
+        server, base_url = start_stub_server(StubConfig(**kwargs))
+        self.addCleanup(server.server_close)
+        self.addCleanup(server.shutdown)
+        return override_settings(NASDAQ_BASE_URL=base_url)
+
+    def test_parse_stub_pages(self):
+        with self.start_server(days=30, pages=12, rows=5):
+            price_status = NASDAQPriceParser.as_task('abc')
+            report = NASDAQTradeParser.as_report_task('abc')
+
+        self.assertEqual(price_status, 'Parsed')
+        self.assertEqual(StockDay.objects.count(), 30)
+        # Pages are limited by `max_pages` of parser
+        self.assertEqual(report['status'], 'Parsed')
+        self.assertEqual(
+            report['counts']['pages'], NASDAQTradeParser.max_pages
+        )
+        self.assertEqual(
+            report['counts']['rows'], NASDAQTradeParser.max_pages * 5
+        )
+        self.assertTrue(Trade.objects.exists())
+
+    def test_errors(self):
+        with self.start_server(error_rate=1):
+            status = NASDAQPriceParser.as_task('abc')
+
+        self.assertEqual(status, 'Not Found')
@@ -0,0 +1,116 @@
+from concurrent import futures
+from concurrent.futures.process import BrokenProcessPool
+from datetime import timedelta
+
+from django.test import TestCase
+from django.utils import timezone
+
+from ..models import IngestJob
+from ..work_queue import (RETRY_DELAY, LeaseLost, claim_jobs, complete_job,
+                          enqueue_tickers, finish_job, renew_leases)
+
+
+class TestWorkQueue(TestCase):
+    """Tests for DB-backed ingestion work queue.
+    """
+    def setUp(self):
+        enqueue_tickers(['abc', 'xyz'])
+
+    def test_enqueue(self):
+        """Ensure that jobs of all kinds are added only once.
+        """
+        self.assertEqual(enqueue_tickers(['abc', 'def']), 2)
+        self.assertEqual(IngestJob.objects.count(), 6)
+
+    def test_claim_jobs(self):
+        """Ensure that leased jobs are not claimed by other workers.
+        """
+        first = claim_jobs('worker-1', limit=3)
+        second = claim_jobs('worker-2', limit=3)
+
+        self.assertEqual(len(first), 3)
+        self.assertEqual(len(second), 1)
+        self.assertFalse({job.pk for job in first} & {second[0].pk})
+        self.assertEqual(claim_jobs('worker-3', limit=3), [])
+
+    def test_claim_expired_lease(self):
+        """Ensure that jobs of crashed workers are claimed again.
+        """
+        claim_jobs('worker-1', limit=4)
+        IngestJob.objects.update(
+            lease_until=timezone.now() - timedelta(seconds=1)
+        )
+
+        jobs = claim_jobs('worker-2', limit=4)
+        self.assertEqual(len(jobs), 4)
+        self.assertEqual(
+            IngestJob.objects.filter(worker='worker-2', attempts=2).count(), 4
+        )
+
+    def test_complete_job(self):
+        """Ensure that completed job is released and scheduled again.
+        """
+        job = claim_jobs('worker-1')[0]
+        complete_job(job, 'worker-1', {
+            'status': 'Parsed', 'total': 1.5, 'counts': {'rows': 10},
+        })
+        job.refresh_from_db()
+
+        self.assertIsNone(job.lease_until)
+        self.assertEqual(job.status, 'Parsed')
+        self.assertEqual(job.rows, 10)
+        self.assertGreater(job.due_at, timezone.now())
+
+    def test_renew_leases(self):
+        """Ensure that leases of running jobs are extended, lost ones are
+        returned.
+        """
+        first, second = claim_jobs('worker-1', limit=2)
+        IngestJob.objects.filter(pk=first.pk).update(
+            lease_until=timezone.now() - timedelta(seconds=1)
+        )
+        self.assertEqual(len(claim_jobs('worker-2', limit=4)), 3)
+
+        lost = renew_leases([first, second], 'worker-1')
+        self.assertEqual(lost, [first])
+        self.assertGreater(
+            IngestJob.objects.get(pk=second.pk).lease_until,
+            timezone.now() + timedelta(minutes=10)
+        )
+
+    def test_complete_lost_job(self):
+        """Ensure that job claimed again after expired lease can't be
+        completed by previous worker, even the same one.
+        """
+        job = claim_jobs('worker-1')[0]
+        IngestJob.objects.update(
+            lease_until=timezone.now() - timedelta(seconds=1)
+        )
+        claim_jobs('worker-1', limit=4)
+
+        with self.assertRaises(LeaseLost):
+            complete_job(job, 'worker-1', {
+                'status': 'Parsed', 'total': 1.5, 'counts': {},
+            })
+        self.assertEqual(
+            IngestJob.objects.get(pk=job.pk).status, 'Running'
+        )
+
+    def test_failed_task(self):
+        """Ensure that job of died worker process is failed and retried.
+        """
+        job = claim_jobs('worker-1')[0]
+        future = futures.Future()
+        future.set_exception(BrokenProcessPool('worker died'))
+
+        with self.assertLogs('stocks', 'INFO') as logs:
+            finish_job(job, 'worker-1', future)
+        job.refresh_from_db()
+
+        self.assertIn('ERROR:stocks.scheduler', logs.output[0])
+
+        self.assertIsNone(job.lease_until)
+        self.assertEqual(job.status, 'Error')
+        self.assertGreater(
+            job.due_at, timezone.now() + RETRY_DELAY - timedelta(minutes=1)
+        )
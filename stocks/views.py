@@ -1,16 +1,19 @@
-from django.views.generic import DetailView, ListView
+from django.http import HttpResponse
+from django.views.generic import DetailView, ListView, View
 
+from .db_routers import ReplicaReadMixin
+from .metrics import registry
 from .models import Company, Insider, StockDay, Trade
 
 
-class CompanyListView(ListView):
+class CompanyListView(ReplicaReadMixin, ListView):
     """View for displaying companies list.
     """
     model = Company
     template_name = 'companies_list.html'
 
 
-class CompanyDetailView(DetailView):
+class CompanyDetailView(ReplicaReadMixin, DetailView):
     """View for displaying prices for concrete stock.
     """
     model = Company
@@ -19,7 +22,7 @@ class CompanyDetailView(DetailView):
     template_name = 'company_detail.html'
 
 
-class TradeListView(ListView):
+class TradeListView(ReplicaReadMixin, ListView):
     """Base view for displaying stock insiders trades.
     """
     model = Trade
@@ -154,3 +157,14 @@ class StockPeriodsAnalyticsView(BaseAnalyticsView):
             'periods': self.object.get_min_price_periods(price_type, min_diff),
             'price_type': price_type
         }
+
+
+class MetricsView(View):
+    """View for exposing collected metrics in Prometheus text format.
+    """
+    content_type = 'text/plain; version=0.0.4; charset=utf-8'
+
+    def get(self, request, *args, **kwargs):
+        return HttpResponse(
+            registry.exposition(), content_type=self.content_type
+        )
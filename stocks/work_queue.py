@@ -0,0 +1,220 @@
+import logging
+import os
+import socket
+import time
+from concurrent import futures
+from concurrent.futures.process import BrokenProcessPool
+from datetime import timedelta
+
+from django.db import transaction
+from django.db.models import F, Q
+from django.utils import timezone
+
+from .models import IngestJob
+from .parsers import create_executor, record_report_metrics
+from .scheduler import PARSERS, RefreshScheduler, get_job_report
+
+__all__ = (
+    'LeaseLost', 'enqueue_tickers', 'claim_jobs', 'renew_leases',
+    'complete_job', 'run_queue_worker',
+)
+
+logger = logging.getLogger(__name__)
+
+LEASE_TIME = timedelta(minutes=15)
+# Leases of running jobs are renewed a few times per lease time
+HEARTBEAT_INTERVAL = LEASE_TIME / 3
+RETRY_DELAY = timedelta(minutes=5)
+
+
+class LeaseLost(Exception):
+    pass
+
+
+def get_worker_id():
+    return f'{socket.gethostname()}:{os.getpid()}'
+
+
+def enqueue_tickers(tickers_list):
+    """Add jobs of all kinds for tickers which are not in queue yet.
+
+    Returns:
+        int - num of created jobs.
+    """
+    now = timezone.now()
+    existed = set(IngestJob.objects.values_list('ticker', 'kind'))
+
+    jobs = IngestJob.objects.bulk_create([
+        IngestJob(ticker=ticker, kind=kind, due_at=now)
+        for ticker in tickers_list
+        for kind, _ in IngestJob.KIND_CHOICES
+        if (ticker, kind) not in existed
+    ])
+    return len(jobs)
+
+
+def claim_jobs(worker, limit=1, lease_time=LEASE_TIME):
+    """Claim due jobs which are not leased by other workers.
+
+    Rows are locked with `SELECT ... FOR UPDATE SKIP LOCKED`, so parallel
+    workers never claim the same job. Jobs with expired lease (e.g. of
+    crashed worker) are claimed again. Attempts of returned jobs identify
+    their leases (see `renew_leases`).
+    """
+    now = timezone.now()
+
+    with transaction.atomic():
+        jobs = list(
+            IngestJob.objects
+            .select_for_update(skip_locked=True)
+            .filter(due_at__lte=now)
+            .filter(Q(lease_until__isnull=True) | Q(lease_until__lt=now))
+            .order_by('due_at')[:limit]
+        )
+        IngestJob.objects.filter(pk__in=[job.pk for job in jobs]).update(
+            lease_until=now + lease_time,
+            worker=worker,
+            status='Running',
+            started_at=now,
+            attempts=F('attempts') + 1,
+        )
+
+    for job in jobs:
+        job.lease_until = now + lease_time
+        job.worker = worker
+        job.status = 'Running'
+        job.started_at = now
+        job.attempts += 1
+
+    return jobs
+
+
+def get_leased(job, worker):
+    # Job claimed again after expired lease has other attempt
+    return IngestJob.objects.filter(
+        pk=job.pk, worker=worker, attempts=job.attempts,
+        lease_until__isnull=False,
+    )
+
+
+def renew_leases(jobs, worker, lease_time=LEASE_TIME):
+    """Extend leases of running jobs, so long jobs are not claimed again.
+
+    Returns:
+        list - jobs whose leases were lost (e.g. worker was stalled longer
+        than lease time and jobs were claimed by other worker).
+    """
+    lease_until = timezone.now() + lease_time
+    lost = []
+    for job in jobs:
+        if get_leased(job, worker).update(lease_until=lease_until):
+            job.lease_until = lease_until
+        else:
+            lost.append(job)
+
+    return lost
+
+
+def complete_job(job, worker, report):
+    """Save results of job and schedule next run.
+
+    Failed jobs are retried after `RETRY_DELAY`, other ones after refresh
+    interval of their kind.
+
+    Raises:
+        LeaseLost - if lease of job was taken over (job was claimed again),
+        nothing is saved then.
+    """
+    now = timezone.now()
+    if report['status'] == 'Error':
+        due_at = now + RETRY_DELAY
+    else:
+        due_at = now + RefreshScheduler.intervals[job.kind]
+
+    updated = get_leased(job, worker).update(
+        due_at=due_at,
+        lease_until=None,
+        status=report['status'],
+        finished_at=now,
+        duration=report.get('total'),
+        rows=report['counts'].get('rows', 0),
+    )
+
+    if not updated:
+        raise LeaseLost(
+            f'Lease of job #{job.pk} ({job.ticker}, {job.kind}) is lost'
+        )
+
+
+def finish_job(job, worker, future):
+    """Save results of finished job.
+
+    Job whose task failed (e.g. worker process died) is saved as failed
+    one, results of job with lost lease are logged and dropped.
+    """
+    report = get_job_report((job.ticker, job.kind), future)
+    logger.info(f'{job.ticker.upper()} ({job.kind}) - {report["status"]}')
+    record_report_metrics(report)
+
+    try:
+        complete_job(job, worker, report)
+    except LeaseLost:
+        logger.exception('Results of job are dropped')
+
+
+def run_queue_worker(max_workers=None, poll_interval=5):
+    """Process jobs from DB queue until interrupted.
+
+    Several workers (on different hosts too) can share the same queue.
+    Leases of running jobs are renewed every `HEARTBEAT_INTERVAL`. Process
+    pool is recreated if worker process dies, its jobs are failed.
+    """
+    worker = get_worker_id()
+    workers_count = max_workers or os.cpu_count() or 1
+    running = {}
+    heartbeat = time.monotonic()
+
+    logger.info(f'Queue worker {worker} started')
+
+    executor = create_executor(workers_count)
+    try:
+        while True:
+            free_slots = workers_count - len(running)
+            if free_slots:
+                for job in claim_jobs(worker, limit=free_slots):
+                    future = executor.submit(
+                        PARSERS[job.kind].as_report_task, job.ticker
+                    )
+                    running[future] = job
+
+            if time.monotonic() - heartbeat > \
+                    HEARTBEAT_INTERVAL.total_seconds():
+                for job in renew_leases(running.values(), worker):
+                    logger.error(
+                        f'Lease of job #{job.pk} ({job.ticker}, {job.kind}) '
+                        f'is lost, job can be run twice'
+                    )
+                heartbeat = time.monotonic()
+
+            if not running:
+                time.sleep(poll_interval)
+                continue
+
+            done, _ = futures.wait(
+                running, timeout=poll_interval,
+                return_when=futures.FIRST_COMPLETED
+            )
+            broken = False
+            for future in done:
+                finish_job(running.pop(future), worker, future)
+                broken = broken or \
+                    isinstance(future.exception(), BrokenProcessPool)
+
+            if broken:
+                # Tasks of broken pool fail right away, they are failed on
+                # next iterations
+                logger.warning('Worker process died, restarting pool')
+                executor.shutdown(wait=False)
+                executor = create_executor(workers_count)
+    finally:
+        executor.shutdown()